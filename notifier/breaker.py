@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _WikiState:
+    """Recent outcomes of requests to one wiki."""
+
+    failure_count: int = 0
+    # When the breaker last opened or let a probe through, if it's open
+    opened_at: Optional[float] = None
+
+
+class CircuitBreaker:
+    """Stops requests being made to wikis that keep failing.
+
+    After enough consecutive failed requests to a wiki, its breaker opens
+    and further requests to it are refused without being sent. A request
+    that is retried counts once, after its last attempt. Once the
+    reset period has passed, a single request is let through as a probe; if
+    it succeeds the breaker closes, otherwise it stays open for another
+    period.
+
+    Safe to use from several threads at once.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_s: float,
+        *,
+        exempt_wiki_ids: Iterable[str] = (),
+    ):
+        """
+        :param failure_threshold: Number of consecutive failed requests to
+        a wiki after which requests to it are refused.
+        :param reset_s: Time after opening before a probe is let through.
+        :param exempt_wiki_ids: Wikis to which requests are never refused.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.exempt_wiki_ids = frozenset(exempt_wiki_ids)
+        self._wikis: Dict[str, _WikiState] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, wiki_id: str) -> bool:
+        """Whether a request to a wiki may be made."""
+        if wiki_id in self.exempt_wiki_ids:
+            return True
+        with self._lock:
+            state = self._wikis.setdefault(wiki_id, _WikiState())
+            if state.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - state.opened_at < self.reset_s:
+                return False
+            # Let this request through as a probe, and hold back any others
+            # until the next period
+            state.opened_at = now
+            logger.info("Probing unavailable wiki %s", {"wiki_id": wiki_id})
+            return True
+
+    def record_success(self, wiki_id: str) -> None:
+        """Record that a request to a wiki succeeded."""
+        with self._lock:
+            state = self._wikis.setdefault(wiki_id, _WikiState())
+            state.failure_count = 0
+            if state.opened_at is not None:
+                state.opened_at = None
+                logger.info("Wiki available again %s", {"wiki_id": wiki_id})
+
+    def record_failure(self, wiki_id: str) -> None:
+        """Record that a request to a wiki failed, e.g. with a connection
+        error or a 5xx."""
+        if wiki_id in self.exempt_wiki_ids:
+            return
+        with self._lock:
+            state = self._wikis.setdefault(wiki_id, _WikiState())
+            state.failure_count += 1
+            if state.opened_at is not None:
+                state.opened_at = time.monotonic()
+                return
+            if state.failure_count >= self.failure_threshold:
+                state.opened_at = time.monotonic()
+                logger.warning(
+                    "Wiki is failing; refusing further requests to it %s",
+                    {
+                        "wiki_id": wiki_id,
+                        "failure_count": state.failure_count,
+                        "reset_s": self.reset_s,
+                    },
+                )
+
+    def unavailable_wikis(self) -> List[str]:
+        """The wikis to which requests are currently being refused."""
+        with self._lock:
+            return sorted(
+                wiki_id
+                for wiki_id, state in self._wikis.items()
+                if state.opened_at is not None
+            )
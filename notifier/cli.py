@@ -4,6 +4,11 @@ import logging
 from notifier.config.local import read_local_auth, read_local_config
 from notifier.main import main
 from notifier.notify import notification_channels
+from notifier.onboarding import (
+    ONBOARDING_MAX_AGE_S,
+    ONBOARDING_REQUEST_BUDGET,
+    onboard_wikis,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +16,15 @@ logger = logging.getLogger(__name__)
 def cli() -> None:
     """Run main procedure as a command-line tool."""
     args = read_command_line_arguments()
+    if args.onboard_wikis is not None:
+        onboard_wikis(
+            config=read_local_config(args.config),
+            auth=read_local_auth(args.auth),
+            wiki_ids=args.onboard_wikis,
+            max_age_s=args.onboard_max_age_days * 60 * 60 * 24,
+            request_budget=args.onboard_request_budget,
+        )
+        return
     main(
         config=read_local_config(args.config),
         auth=read_local_auth(args.auth),
@@ -50,6 +64,28 @@ def read_command_line_arguments() -> argparse.Namespace:
         type=int,
         help="""The lower timestamp to use when searching for posts.""",
     )
+    parser.add_argument(
+        "--onboard-wikis",
+        type=str,
+        help="""A set of newly-configured wiki IDs to load the context of
+        recently active forum threads for, instead of notifying. Must be a
+        subset of the wiki IDs listed in the remote configuration.""",
+        nargs="+",
+    )
+    parser.add_argument(
+        "--onboard-max-age-days",
+        type=int,
+        default=ONBOARDING_MAX_AGE_S // (60 * 60 * 24),
+        help="""When onboarding, the number of days back to look for
+        threads that have been posted in.""",
+    )
+    parser.add_argument(
+        "--onboard-request-budget",
+        type=int,
+        default=ONBOARDING_REQUEST_BUDGET,
+        help="""When onboarding, the most requests to make to each
+        wiki.""",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -62,6 +62,28 @@ def read_local_config(config_path: str) -> LocalConfig:
         except (ImportError, AttributeError) as error:
             raise ValueError("database_driver in config is invalid") from error
 
+        # Wikidot section, which is optional and may be partial
+        config.setdefault("wikidot", {})
+        assert_key(config, "wikidot", dict)
+        for key, instance in (
+            ("concurrency_limit", int),
+            ("per_wiki_concurrency_limit", int),
+            ("requests_per_second", (int, float)),
+            ("request_burst", int),
+            ("pagination_concurrency", int),
+            ("ingestion_concurrency", int),
+            ("ingestion_chunk_size", int),
+            ("backfill_page_limit", int),
+            ("site_url", str),
+            ("html_parser", str),
+            ("breaker_failure_threshold", int),
+            ("breaker_reset_s", (int, float)),
+            ("thread_page_cache_size", int),
+            ("thread_prefetch_depth", int),
+        ):
+            if key in config["wikidot"]:
+                assert_key(config["wikidot"], key, instance)
+
         # Paths section
         assert_key(config, "path", dict)
         assert_key(config["path"], "lang", str)
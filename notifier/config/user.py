@@ -1,13 +1,14 @@
 import logging
 from operator import itemgetter
 import re
-from typing import Any, List, Optional, Tuple, TypedDict, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
+from bs4.element import Tag
 import tomlkit
 from tomlkit.exceptions import TOMLKitError
 
 from notifier.database.drivers.base import BaseDatabaseDriver
-from notifier.parsethread import get_timestamp
+from notifier.parsethread import get_timestamp, parse_thread_url
 from notifier.types import (
     LocalConfig,
     RawUserConfig,
@@ -20,7 +21,10 @@ logger = logging.getLogger(__name__)
 
 
 # For ease of parsing, configurations are coerced to TOML format
+# The page ID is put in the class of an element so that it is not part of
+# the config text
 user_config_listpages_body = '''
+[[span class="page-id-%%page_id%%"]][[/span]]
 slug = """%%fullname%%"""
 username = """%%created_by%%"""
 user_id = "%%created_by_id%%"
@@ -84,6 +88,7 @@ def fetch_user_configs(
     cached in the database.
     """
     configs: List[Tuple[str, RawUserConfig]] = []
+    listed_page_ids: Dict[str, int] = {}
     for config_soup in wikidot.listpages(
         local_config["config_wiki_id"],
         category=local_config["user_config_category"],
@@ -111,10 +116,68 @@ def fetch_user_configs(
                 exc_info=error,
             )
             continue
+        # Keep the page ID while it's free, so that the page can be edited
+        # later without having to look it up
+        page_id = get_page_id_from_soup(config_soup)
+        if page_id is not None:
+            listed_page_ids[slug] = page_id
         configs.append((slug, config))
+    remember_listed_page_ids(
+        wikidot, local_config["config_wiki_id"], listed_page_ids
+    )
     return configs
 
 
+def remember_listed_page_ids(
+    wikidot: Wikidot, wiki_id: str, listed_page_ids: Dict[str, int]
+) -> None:
+    """Record the page IDs given by a listing of pages, if they can be
+    trusted.
+
+    A tag write made with the wrong page ID would change some other page,
+    so before any listed IDs are recorded, the first is checked against
+    the page's ID from its source (or from the cache, which only holds
+    checked IDs).
+    """
+    if len(listed_page_ids) == 0:
+        return
+    slug, listed_page_id = next(iter(listed_page_ids.items()))
+    try:
+        page_id = wikidot.get_page_id(wiki_id, slug)
+    except Exception as error:
+        logger.warning(
+            "Could not check listed page IDs %s",
+            {"wiki_id": wiki_id, "slug": slug},
+            exc_info=error,
+        )
+        return
+    if page_id != listed_page_id:
+        logger.error(
+            "Listed page ID does not match page source %s",
+            {
+                "wiki_id": wiki_id,
+                "slug": slug,
+                "listed_page_id": listed_page_id,
+                "page_id": page_id,
+            },
+        )
+        return
+    for slug, page_id in listed_page_ids.items():
+        wikidot.remember_page_id(wiki_id, slug, page_id)
+
+
+def get_page_id_from_soup(config_soup: Tag) -> Optional[int]:
+    """Extracts the page ID from a ListPages result, if present."""
+    element = config_soup.find(class_=re.compile(r"^page-id-"))
+    if not isinstance(element, Tag):
+        return None
+    for class_name in cast(List[str], element.get_attribute_list("class")):
+        match = re.match(r"^page-id-([0-9]+)$", class_name)
+        if match:
+            return int(match.group(1))
+    return None
+
+
 def parse_raw_user_config(
     raw_config: str,
     user_timestamp: Optional[int],
@@ -164,20 +227,3 @@ def parse_subscriptions(
             {"thread_id": thread_id, "post_id": post_id, "sub": cardinality}
         )
     return subscriptions
-
-
-ThreadPostIds = TypedDict(
-    "ThreadPostIds", {"thread_id": str, "post_id": Union[str, None]}
-)
-
-
-def parse_thread_url(
-    url: str,
-) -> ThreadPostIds:
-    """Parses a URL to a thread ID and optionally a post ID."""
-    pattern = re.compile(r"(t-[0-9]+)(?:.*#(post-[0-9]+))?")
-    match = pattern.search(url)
-    if not match:
-        raise ValueError("Thread URL does not match expected pattern")
-    thread_id, post_id = match.groups()
-    return {"thread_id": thread_id, "post_id": post_id}
@@ -1,15 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Any, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
 from notifier.types import (
     ActivationLogDump,
     CachedUserConfig,
     ChannelLogDump,
+    DownloadedPosts,
     LogDump,
     NotifiablePost,
     PostInfo,
     PostMeta,
     RawUserConfig,
+    RssValidators,
+    StoredThreadPost,
+    SubscribedUser,
     SupportedWikiConfig,
     Context,
 )
@@ -57,6 +61,11 @@ class BaseDatabaseDriver(ABC):
         subscriptions both manual and automatic.
         """
 
+    @abstractmethod
+    def get_subscribed_users(self) -> List[SubscribedUser]:
+        """Get every user who may be notified about posts, i.e. those on
+        any notifying frequency, with their manual subscriptions."""
+
     @abstractmethod
     def count_user_configs(self) -> int:
         """Count the number of subscribed users."""
@@ -117,6 +126,18 @@ class BaseDatabaseDriver(ABC):
     ) -> None:
         """Stores the latest seen post timestamp for the given wiki."""
 
+    @abstractmethod
+    def get_rss_validators(self, wiki_id: str) -> RssValidators:
+        """Get the validators from the last response of the given wiki's
+        RSS feed."""
+
+    @abstractmethod
+    def store_rss_validators(
+        self, wiki_id: str, validators: RssValidators
+    ) -> None:
+        """Stores the validators from a response of the given wiki's RSS
+        feed."""
+
     @abstractmethod
     def store_post(self, post: NotifiablePost) -> None:
         """Store a post."""
@@ -131,12 +152,62 @@ class BaseDatabaseDriver(ABC):
     def store_context_thread(self, context_thread: Context.Thread) -> None:
         """Store a thread for context."""
 
+    @abstractmethod
+    def store_context_threads(
+        self, context_threads: List[Context.Thread], keep_until_timestamp: int
+    ) -> None:
+        """Store context for several threads at once, read just now from
+        their first pages.
+
+        The context is kept until the given time even if no post needs it,
+        and is considered fresh until then.
+        """
+
+    @abstractmethod
+    def get_context_thread_fresh_until_timestamps(
+        self, thread_ids: Iterable[str], max_age_s: int
+    ) -> Dict[str, int]:
+        """Get until when each of the given threads' stored context can be
+        used without reading its first page again, for those threads that
+        have context stored.
+
+        That is the given age after the context was last read, or the time
+        it is kept until if that is later.
+        """
+
+    @abstractmethod
+    def get_context_thread_starters(
+        self, thread_ids: Iterable[str]
+    ) -> Dict[str, str]:
+        """Get the ID of the user who started each of the given threads,
+        for those threads that have context stored."""
+
     @abstractmethod
     def store_context_parent_post(
         self, context_parent_post: Context.ParentPost
     ) -> None:
         """Store a parent post for context."""
 
+    @abstractmethod
+    def store_downloaded_posts(self, downloaded: DownloadedPosts) -> None:
+        """Store a chunk of a wiki's new posts and their context, then its
+        latest post timestamp and, if given, RSS validators, all at once.
+
+        Either everything is stored or nothing is.
+        """
+
+    @abstractmethod
+    def get_stored_thread_posts(
+        self, thread_ids: Iterable[str]
+    ) -> List[StoredThreadPost]:
+        """Get the stored posts in the given threads."""
+
+    @abstractmethod
+    def store_posts_verified(
+        self, post_ids: Iterable[str], timestamp: int
+    ) -> None:
+        """Record that posts were seen to still exist at the given time."""
+
     @abstractmethod
     def delete_post(self, post_id: str) -> None:
         """Delete a post."""
@@ -149,6 +220,18 @@ class BaseDatabaseDriver(ABC):
     def delete_context_thread(self, thread_id: str) -> None:
         """Delete posts with the given thread context."""
 
+    @abstractmethod
+    def get_page_ids(self, wiki_id: str) -> Dict[str, int]:
+        """Get the known page IDs for the given wiki, keyed by slug."""
+
+    @abstractmethod
+    def store_page_id(self, wiki_id: str, slug: str, page_id: int) -> None:
+        """Store the ID of the page with the given slug."""
+
+    @abstractmethod
+    def delete_page_id(self, wiki_id: str, slug: str) -> None:
+        """Forget the ID of the page with the given slug."""
+
     @abstractmethod
     def store_channel_log_dump(self, log: ChannelLogDump) -> None:
         """Store a channel log dump."""
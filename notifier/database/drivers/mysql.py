@@ -1,6 +1,17 @@
+import json
 import logging
+import time
 from contextlib import contextmanager
-from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
 
 import pymysql
 from pymysql import Connection
@@ -14,12 +25,17 @@ from notifier.types import (
     CachedUserConfig,
     ChannelLogDump,
     Context,
+    DownloadedPosts,
     LogDump,
     NotifiablePost,
     PostInfo,
     PostMeta,
     RawUserConfig,
+    RssValidators,
+    StoredThreadPost,
+    SubscribedUser,
     Subscription,
+    SubscriptionCardinality,
     SupportedWikiConfig,
 )
 
@@ -102,6 +118,36 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
         cursor.execute(query, {} if params is None else params)
         return cursor
 
+    def execute_many_named(
+        self,
+        query_name: str,
+        params: List[Dict[str, Any]],
+        cursor: Optional[DictCursor] = None,
+    ) -> DictCursor:
+        """Execute a named query once for each set of params, in as few
+        round trips as possible.
+
+        An INSERT with a single VALUES row is sent as one multi-row INSERT,
+        so any ON DUPLICATE KEY UPDATE clause must refer to the new values
+        with VALUES() rather than with params.
+
+        :param query_name: The name of the query to execute, which must
+        have a corresponding SQL file.
+        :param params: List of SQL parameters, one set per execution.
+        :param cursor: A cursor to use for the query. If not specified, a
+        new one will be created. The cursor will be returned.
+        :returns: The resultant cursor of the query.
+        """
+        self.cache_named_query(query_name)
+        query = self.query_cache[query_name]["query"]
+        if cursor is None:
+            cursor = self.conn.cursor()
+        if self.query_cache[query_name]["script"]:
+            raise ValueError("Script does not accept params")
+        if len(params) > 0:
+            cursor.executemany(query, params)
+        return cursor
+
     def scrub_database(self) -> None:
         logger.info("Scrubbing database")
         if not self.database_name.endswith("_test"):
@@ -227,6 +273,31 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
             ]
         return user_configs
 
+    def get_subscribed_users(self) -> List[SubscribedUser]:
+        users: Dict[str, SubscribedUser] = {
+            cast(str, row["user_id"]): {
+                "user_id": cast(str, row["user_id"]),
+                "last_notified_timestamp": cast(
+                    int, row["last_notified_timestamp"]
+                ),
+                "manual_subs": [],
+            }
+            for row in self.execute_named("get_subscribed_users").fetchall()
+        }
+        for row in self.execute_named(
+            "get_subscribed_users_manual_subs"
+        ).fetchall():
+            user = users.get(cast(str, row["user_id"]))
+            if user is not None:
+                user["manual_subs"].append(
+                    {
+                        "thread_id": cast(str, row["thread_id"]),
+                        "post_id": cast(Optional[str], row["post_id"]),
+                        "sub": cast(SubscriptionCardinality, row["sub"]),
+                    }
+                )
+        return list(users.values())
+
     def count_user_configs(self) -> int:
         return cast(
             int,
@@ -372,6 +443,27 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
             {"wiki_id": wiki_id, "timestamp": timestamp},
         )
 
+    def get_rss_validators(self, wiki_id: str) -> RssValidators:
+        return cast(
+            RssValidators,
+            self.execute_named(
+                "get_rss_validators", {"wiki_id": wiki_id}
+            ).fetchone()
+            or {"etag": None, "last_modified": None},
+        )
+
+    def store_rss_validators(
+        self, wiki_id: str, validators: RssValidators
+    ) -> None:
+        self.execute_named(
+            "store_rss_validators",
+            {
+                "wiki_id": wiki_id,
+                "etag": validators["etag"],
+                "last_modified": validators["last_modified"],
+            },
+        )
+
     def store_post(self, post: NotifiablePost) -> None:
         self.execute_named(
             "store_post",
@@ -426,6 +518,56 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
             },
         )
 
+    def store_context_threads(
+        self, context_threads: List[Context.Thread], keep_until_timestamp: int
+    ) -> None:
+        checked_timestamp = int(time.time())
+        self.execute_many_named(
+            "store_context_threads",
+            [
+                {
+                    **thread,
+                    "context_checked_timestamp": checked_timestamp,
+                    "keep_until_timestamp": keep_until_timestamp,
+                }
+                for thread in context_threads
+            ],
+        )
+
+    def get_context_thread_fresh_until_timestamps(
+        self, thread_ids: Iterable[str], max_age_s: int
+    ) -> Dict[str, int]:
+        # An empty IN list is a syntax error
+        unique_thread_ids = tuple(set(thread_ids))
+        if len(unique_thread_ids) == 0:
+            return {}
+        return {
+            cast(str, row["thread_id"]): cast(
+                int, row["fresh_until_timestamp"]
+            )
+            for row in self.execute_named(
+                "get_context_thread_fresh_until_timestamps",
+                {"thread_ids": unique_thread_ids, "max_age_s": max_age_s},
+            ).fetchall()
+        }
+
+    def get_context_thread_starters(
+        self, thread_ids: Iterable[str]
+    ) -> Dict[str, str]:
+        # An empty IN list is a syntax error
+        unique_thread_ids = tuple(set(thread_ids))
+        if len(unique_thread_ids) == 0:
+            return {}
+        return {
+            cast(str, row["thread_id"]): cast(
+                str, row["first_post_author_user_id"]
+            )
+            for row in self.execute_named(
+                "get_context_thread_starters",
+                {"thread_ids": unique_thread_ids},
+            ).fetchall()
+        }
+
     def store_context_parent_post(
         self, context_parent_post: Context.ParentPost
     ) -> None:
@@ -441,6 +583,91 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
             },
         )
 
+    def store_downloaded_posts(self, downloaded: DownloadedPosts) -> None:
+        checked_timestamp = int(time.time())
+        # Categories are repeated for each post in them
+        categories = {
+            category["category_id"]: category
+            for category in downloaded["categories"]
+        }
+        with self.transaction() as cursor:
+            self.execute_many_named(
+                "store_context_forum_categories",
+                [dict(category) for category in categories.values()],
+                cursor,
+            )
+            self.execute_many_named(
+                "store_context_threads",
+                [
+                    {
+                        **thread,
+                        "context_checked_timestamp": checked_timestamp,
+                        "keep_until_timestamp": 0,
+                    }
+                    for thread in downloaded["threads"]
+                ],
+                cursor,
+            )
+            self.execute_many_named(
+                "store_context_parent_posts",
+                [
+                    dict(parent_post)
+                    for parent_post in downloaded["parent_posts"]
+                ],
+                cursor,
+            )
+            self.execute_many_named(
+                "store_posts",
+                [dict(post) for post in downloaded["posts"]],
+                cursor,
+            )
+            if downloaded["latest_post_timestamp"] is not None:
+                self.execute_named(
+                    "store_latest_post_timestamp",
+                    {
+                        "wiki_id": downloaded["wiki_id"],
+                        "timestamp": downloaded["latest_post_timestamp"],
+                    },
+                    cursor,
+                )
+            if downloaded["rss_validators"] is not None:
+                self.execute_named(
+                    "store_rss_validators",
+                    {
+                        "wiki_id": downloaded["wiki_id"],
+                        "etag": downloaded["rss_validators"]["etag"],
+                        "last_modified": downloaded["rss_validators"][
+                            "last_modified"
+                        ],
+                    },
+                    cursor,
+                )
+
+    def get_stored_thread_posts(
+        self, thread_ids: Iterable[str]
+    ) -> List[StoredThreadPost]:
+        # An empty IN list is a syntax error
+        unique_thread_ids = tuple(set(thread_ids))
+        if len(unique_thread_ids) == 0:
+            return []
+        return cast(
+            List[StoredThreadPost],
+            self.execute_named(
+                "get_stored_thread_posts", {"thread_ids": unique_thread_ids}
+            ).fetchall(),
+        )
+
+    def store_posts_verified(
+        self, post_ids: Iterable[str], timestamp: int
+    ) -> None:
+        self.execute_many_named(
+            "store_post_verified",
+            [
+                {"post_id": post_id, "verified_timestamp": timestamp}
+                for post_id in set(post_ids)
+            ],
+        )
+
     def delete_post(self, post_id: str) -> None:
         self.execute_named("delete_post", {"post_id": post_id})
         self.execute_named("delete_unused_post_context")
@@ -453,6 +680,25 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
         self.execute_named("delete_context_thread", {"thread_id": thread_id})
         self.execute_named("delete_unused_post_context")
 
+    def get_page_ids(self, wiki_id: str) -> Dict[str, int]:
+        return {
+            cast(str, row["slug"]): cast(int, row["page_id"])
+            for row in self.execute_named(
+                "get_page_ids", {"wiki_id": wiki_id}
+            ).fetchall()
+        }
+
+    def store_page_id(self, wiki_id: str, slug: str, page_id: int) -> None:
+        self.execute_named(
+            "store_page_id",
+            {"wiki_id": wiki_id, "slug": slug, "page_id": page_id},
+        )
+
+    def delete_page_id(self, wiki_id: str, slug: str) -> None:
+        self.execute_named(
+            "delete_page_id", {"wiki_id": wiki_id, "slug": slug}
+        )
+
     def store_channel_log_dump(self, log: ChannelLogDump) -> None:
         """Store a channel log dump."""
         self.execute_named(
@@ -486,23 +732,37 @@ class MySqlDriver(BaseDatabaseDriver, BaseDatabaseWithSqlFileCache):
                 ),
                 "notify_end_timestamp": log.get("notify_end_timestamp", None),
                 "end_timestamp": log.get("end_timestamp", None),
+                "wikidot_requests": (
+                    json.dumps(log["wikidot_requests"])
+                    if "wikidot_requests" in log
+                    else None
+                ),
             },
         )
 
     def get_log_dumps_since(self, timestamp_range: Tuple[int, int]) -> LogDump:
         """Retrieve log dumps stored in the time range."""
         lower_timestamp, upper_timestamp = timestamp_range
+        activations = [
+            cast(ActivationLogDump, dict(row))
+            for row in self.execute_named(
+                "get_activation_log_dumps",
+                {
+                    "lower_timestamp": lower_timestamp,
+                    "upper_timestamp": upper_timestamp,
+                },
+            ).fetchall()
+        ]
+        for activation in activations:
+            # JSON columns are returned as text
+            if activation.get("wikidot_requests") is None:
+                activation.pop("wikidot_requests", None)
+            else:
+                activation["wikidot_requests"] = json.loads(
+                    cast(str, activation["wikidot_requests"])
+                )
         return {
-            "activations": cast(
-                List[ActivationLogDump],
-                self.execute_named(
-                    "get_activation_log_dumps",
-                    {
-                        "lower_timestamp": lower_timestamp,
-                        "upper_timestamp": upper_timestamp,
-                    },
-                ).fetchall(),
-            ),
+            "activations": activations,
             "channels": cast(
                 List[ChannelLogDump],
                 self.execute_named(
@@ -0,0 +1 @@
+DROP TABLE page_id_cache;
@@ -0,0 +1,10 @@
+-- Page IDs are needed to edit pages but can only be found by downloading
+-- the page, so they are kept once known
+
+CREATE TABLE page_id_cache (
+  wiki_id VARCHAR(20)  NOT NULL,
+  slug    VARCHAR(200) NOT NULL,
+  page_id INT UNSIGNED NOT NULL,
+
+  UNIQUE (wiki_id, slug)
+);
@@ -0,0 +1 @@
+ALTER TABLE activation_log_dump DROP COLUMN wikidot_requests;
@@ -0,0 +1,4 @@
+-- Summary of requests made to Wikidot during the activation, per kind of
+-- request
+
+ALTER TABLE activation_log_dump ADD COLUMN wikidot_requests JSON NULL;
@@ -0,0 +1,2 @@
+ALTER TABLE context_wiki DROP COLUMN rss_etag;
+ALTER TABLE context_wiki DROP COLUMN rss_last_modified;
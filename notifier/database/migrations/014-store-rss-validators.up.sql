@@ -0,0 +1,5 @@
+-- Validators from the last response of each wiki's forum RSS feed, sent
+-- back on the next poll so that an unchanged feed need not be downloaded
+
+ALTER TABLE context_wiki ADD COLUMN rss_etag VARCHAR(200) NULL;
+ALTER TABLE context_wiki ADD COLUMN rss_last_modified VARCHAR(50) NULL;
@@ -0,0 +1 @@
+ALTER TABLE context_thread DROP COLUMN context_checked_timestamp;
@@ -0,0 +1,4 @@
+-- When each thread's first page was last read, so that the context from it
+-- can be reused for a while without downloading the page again
+
+ALTER TABLE context_thread ADD COLUMN context_checked_timestamp INT UNSIGNED NOT NULL DEFAULT 0;
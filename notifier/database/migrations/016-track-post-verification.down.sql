@@ -0,0 +1 @@
+ALTER TABLE notifiable_post DROP COLUMN verified_timestamp;
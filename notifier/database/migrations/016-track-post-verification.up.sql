@@ -0,0 +1,4 @@
+-- When each post was last seen on a thread page downloaded during
+-- ingestion, so that deletion checks can skip posts known to still exist
+
+ALTER TABLE notifiable_post ADD COLUMN verified_timestamp INT UNSIGNED NOT NULL DEFAULT 0;
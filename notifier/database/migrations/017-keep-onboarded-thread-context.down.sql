@@ -0,0 +1 @@
+ALTER TABLE context_thread DROP COLUMN keep_until_timestamp;
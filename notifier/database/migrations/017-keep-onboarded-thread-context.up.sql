@@ -0,0 +1,4 @@
+-- Thread context loaded when a wiki is onboarded has no posts yet, so it
+-- needs keeping, and treating as fresh, until someone posts in the thread
+
+ALTER TABLE context_thread ADD COLUMN keep_until_timestamp INT UNSIGNED NOT NULL DEFAULT 0;
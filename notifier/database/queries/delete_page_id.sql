@@ -0,0 +1,5 @@
+DELETE FROM
+  page_id_cache
+WHERE
+  wiki_id = %(wiki_id)s
+  AND slug = %(slug)s
\ No newline at end of file
@@ -7,7 +7,7 @@ WHERE NOT EXISTS (
 );
 
 DELETE FROM context_thread
-WHERE NOT EXISTS (
+WHERE keep_until_timestamp < UNIX_TIMESTAMP() AND NOT EXISTS (
   SELECT NULL FROM notifiable_post WHERE
     notifiable_post.context_thread_id = context_thread.thread_id
 );
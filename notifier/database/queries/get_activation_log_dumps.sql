@@ -6,7 +6,8 @@ SELECT
   getpost_end_timestamp,
   notify_start_timestamp,
   notify_end_timestamp,
-  end_timestamp
+  end_timestamp,
+  wikidot_requests
 FROM
   activation_log_dump
 WHERE
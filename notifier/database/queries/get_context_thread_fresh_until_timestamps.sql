@@ -0,0 +1,9 @@
+SELECT
+  thread_id,
+  GREATEST(
+    context_checked_timestamp + %(max_age_s)s, keep_until_timestamp
+  ) AS fresh_until_timestamp
+FROM
+  context_thread
+WHERE
+  thread_id IN %(thread_ids)s
\ No newline at end of file
@@ -0,0 +1,6 @@
+SELECT
+  thread_id, first_post_author_user_id
+FROM
+  context_thread
+WHERE
+  thread_id IN %(thread_ids)s
\ No newline at end of file
@@ -0,0 +1,6 @@
+SELECT
+  slug, page_id
+FROM
+  page_id_cache
+WHERE
+  wiki_id = %(wiki_id)s
\ No newline at end of file
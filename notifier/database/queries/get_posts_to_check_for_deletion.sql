@@ -5,17 +5,21 @@ SELECT
 FROM
   notifiable_post
 WHERE
-  posted_timestamp BETWEEN (%(now)s - 3 * 3600) AND %(now)s
-  OR posted_timestamp BETWEEN (%(now)s - 6 * 3600) AND (%(now)s - 5 * 3600)
-  OR posted_timestamp BETWEEN (%(now)s - 12 * 3600) AND (%(now)s - 11 * 3600)
-  OR posted_timestamp BETWEEN (%(now)s - 24 * 3600) AND (%(now)s - 23 * 3600)
+  -- Posts seen during ingestion since the rake began are known to exist
+  verified_timestamp < %(now)s
+  AND (
+    posted_timestamp BETWEEN (%(now)s - 3 * 3600) AND %(now)s
+    OR posted_timestamp BETWEEN (%(now)s - 6 * 3600) AND (%(now)s - 5 * 3600)
+    OR posted_timestamp BETWEEN (%(now)s - 12 * 3600) AND (%(now)s - 11 * 3600)
+    OR posted_timestamp BETWEEN (%(now)s - 24 * 3600) AND (%(now)s - 23 * 3600)
 
-  OR posted_timestamp BETWEEN (%(now)s - 1 * 86400 - 3600) AND (%(now)s - 1 * 86400)
-  OR posted_timestamp BETWEEN (%(now)s - 3 * 86400 - 3600) AND (%(now)s - 3 * 86400)
+    OR posted_timestamp BETWEEN (%(now)s - 1 * 86400 - 3600) AND (%(now)s - 1 * 86400)
+    OR posted_timestamp BETWEEN (%(now)s - 3 * 86400 - 3600) AND (%(now)s - 3 * 86400)
 
-  OR posted_timestamp BETWEEN (%(now)s - 7 * 86400 - 3600) AND (%(now)s - 7 * 86400)
-  OR posted_timestamp BETWEEN (%(now)s - 14 * 86400 - 3600) AND (%(now)s - 14 * 86400)
-  OR posted_timestamp BETWEEN (%(now)s - 28 * 86400 - 3600) AND (%(now)s - 28 * 86400)
-  OR posted_timestamp BETWEEN (%(now)s - 56 * 86400 - 3600) AND (%(now)s - 56 * 86400)
-  OR posted_timestamp BETWEEN (%(now)s - 112 * 86400 - 3600) AND (%(now)s - 112 * 86400)
-  OR posted_timestamp BETWEEN (%(now)s - 224 * 86400 - 3600) AND (%(now)s - 224 * 86400)
\ No newline at end of file
+    OR posted_timestamp BETWEEN (%(now)s - 7 * 86400 - 3600) AND (%(now)s - 7 * 86400)
+    OR posted_timestamp BETWEEN (%(now)s - 14 * 86400 - 3600) AND (%(now)s - 14 * 86400)
+    OR posted_timestamp BETWEEN (%(now)s - 28 * 86400 - 3600) AND (%(now)s - 28 * 86400)
+    OR posted_timestamp BETWEEN (%(now)s - 56 * 86400 - 3600) AND (%(now)s - 56 * 86400)
+    OR posted_timestamp BETWEEN (%(now)s - 112 * 86400 - 3600) AND (%(now)s - 112 * 86400)
+    OR posted_timestamp BETWEEN (%(now)s - 224 * 86400 - 3600) AND (%(now)s - 224 * 86400)
+  )
\ No newline at end of file
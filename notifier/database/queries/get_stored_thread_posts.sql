@@ -0,0 +1,9 @@
+SELECT
+  context_thread_id AS thread_id,
+  post_id,
+  posted_timestamp,
+  context_parent_post_id AS parent_post_id
+FROM
+  notifiable_post
+WHERE
+  context_thread_id IN %(thread_ids)s
\ No newline at end of file
@@ -0,0 +1,10 @@
+SELECT
+  user_config.user_id AS user_id,
+  COALESCE(user_config.notified_timestamp, 0) AS last_notified_timestamp
+FROM
+  user_config
+WHERE
+  -- Users on other frequencies e.g. 'never' are effectively unsubscribed
+  user_config.frequency IN (
+    "hourly", "8hourly", "daily", "weekly", "monthly", "test"
+  )
\ No newline at end of file
@@ -8,7 +8,8 @@ INSERT INTO
     getpost_end_timestamp,
     notify_start_timestamp,
     notify_end_timestamp,
-    end_timestamp
+    end_timestamp,
+    wikidot_requests
   )
 VALUES
   (
@@ -19,7 +20,8 @@ VALUES
     %(getpost_end_timestamp)s,
     %(notify_start_timestamp)s,
     %(notify_end_timestamp)s,
-    %(end_timestamp)s
+    %(end_timestamp)s,
+    %(wikidot_requests)s
   )
 ON DUPLICATE KEY UPDATE
   config_start_timestamp = %(config_start_timestamp)s,
@@ -28,4 +30,5 @@ ON DUPLICATE KEY UPDATE
   getpost_end_timestamp = %(getpost_end_timestamp)s,
   notify_start_timestamp = %(notify_start_timestamp)s,
   notify_end_timestamp = %(notify_end_timestamp)s,
-  end_timestamp = %(end_timestamp)s
\ No newline at end of file
+  end_timestamp = %(end_timestamp)s,
+  wikidot_requests = %(wikidot_requests)s
\ No newline at end of file
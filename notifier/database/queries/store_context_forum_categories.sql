@@ -0,0 +1,7 @@
+INSERT INTO
+  context_forum_category
+  (category_id, category_name)
+VALUES
+  (%(category_id)s, %(category_name)s)
+ON DUPLICATE KEY UPDATE
+  category_name = VALUES(category_name)
\ No newline at end of file
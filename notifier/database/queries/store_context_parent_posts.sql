@@ -0,0 +1,25 @@
+INSERT INTO
+  context_parent_post
+  (
+    post_id,
+    posted_timestamp,
+    post_title,
+    post_snippet,
+    author_user_id,
+    author_username
+  )
+VALUES
+  (
+    %(post_id)s,
+    %(posted_timestamp)s,
+    %(post_title)s,
+    %(post_snippet)s,
+    %(author_user_id)s,
+    %(author_username)s
+  )
+ON DUPLICATE KEY UPDATE
+  posted_timestamp = VALUES(posted_timestamp),
+  post_title = VALUES(post_title),
+  post_snippet = VALUES(post_snippet),
+  author_user_id = VALUES(author_user_id),
+  author_username = VALUES(author_username)
\ No newline at end of file
@@ -9,7 +9,8 @@ INSERT INTO
     first_post_id,
     first_post_author_user_id,
     first_post_author_username,
-    first_post_created_timestamp
+    first_post_created_timestamp,
+    context_checked_timestamp
   )
 VALUES
   (
@@ -21,7 +22,8 @@ VALUES
     %(first_post_id)s,
     %(first_post_author_user_id)s,
     %(first_post_author_username)s,
-    %(first_post_created_timestamp)s
+    %(first_post_created_timestamp)s,
+    UNIX_TIMESTAMP()
   )
 ON DUPLICATE KEY UPDATE
   thread_created_timestamp = %(thread_created_timestamp)s,
@@ -31,4 +33,5 @@ ON DUPLICATE KEY UPDATE
   first_post_id = %(first_post_id)s,
   first_post_author_user_id = %(first_post_author_user_id)s,
   first_post_author_username = %(first_post_author_username)s,
-  first_post_created_timestamp = %(first_post_created_timestamp)s
\ No newline at end of file
+  first_post_created_timestamp = %(first_post_created_timestamp)s,
+  context_checked_timestamp = UNIX_TIMESTAMP()
\ No newline at end of file
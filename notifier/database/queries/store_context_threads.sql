@@ -0,0 +1,42 @@
+INSERT INTO
+  context_thread
+  (
+    thread_id,
+    thread_created_timestamp,
+    thread_title,
+    thread_snippet,
+    thread_creator_username,
+    first_post_id,
+    first_post_author_user_id,
+    first_post_author_username,
+    first_post_created_timestamp,
+    context_checked_timestamp,
+    keep_until_timestamp
+  )
+VALUES
+  (
+    %(thread_id)s,
+    %(thread_created_timestamp)s,
+    %(thread_title)s,
+    %(thread_snippet)s,
+    %(thread_creator_username)s,
+    %(first_post_id)s,
+    %(first_post_author_user_id)s,
+    %(first_post_author_username)s,
+    %(first_post_created_timestamp)s,
+    %(context_checked_timestamp)s,
+    %(keep_until_timestamp)s
+  )
+ON DUPLICATE KEY UPDATE
+  thread_created_timestamp = VALUES(thread_created_timestamp),
+  thread_title = VALUES(thread_title),
+  thread_snippet = VALUES(thread_snippet),
+  thread_creator_username = VALUES(thread_creator_username),
+  first_post_id = VALUES(first_post_id),
+  first_post_author_user_id = VALUES(first_post_author_user_id),
+  first_post_author_username = VALUES(first_post_author_username),
+  first_post_created_timestamp = VALUES(first_post_created_timestamp),
+  context_checked_timestamp = VALUES(context_checked_timestamp),
+  keep_until_timestamp = GREATEST(
+    keep_until_timestamp, VALUES(keep_until_timestamp)
+  )
\ No newline at end of file
@@ -0,0 +1,7 @@
+INSERT INTO
+  page_id_cache
+  (wiki_id, slug, page_id)
+VALUES
+  (%(wiki_id)s, %(slug)s, %(page_id)s)
+ON DUPLICATE KEY UPDATE
+  page_id = %(page_id)s
\ No newline at end of file
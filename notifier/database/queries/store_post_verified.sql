@@ -0,0 +1,6 @@
+UPDATE
+  notifiable_post
+SET
+  verified_timestamp = %(verified_timestamp)s
+WHERE
+  notifiable_post.post_id = %(post_id)s
\ No newline at end of file
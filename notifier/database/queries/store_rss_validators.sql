@@ -0,0 +1,7 @@
+UPDATE
+  context_wiki
+SET
+  rss_etag = %(etag)s,
+  rss_last_modified = %(last_modified)s
+WHERE
+  context_wiki.wiki_id = %(wiki_id)s
\ No newline at end of file
@@ -13,15 +13,26 @@ In lieu of manual moderation these pages should be cleared.
 
 import logging
 from datetime import datetime
-from typing import List, Set, Tuple
+from typing import Dict, List, Set, Tuple, cast
 
 from uuid import uuid4
 
 from notifier.config.user import fetch_user_configs, user_config_is_valid
 from notifier.database.drivers.base import BaseDatabaseDriver
 from notifier import timing
-from notifier.types import LocalConfig, PostMeta
-from notifier.wikidot import Wikidot, ThreadNotExists
+from notifier.types import (
+    DownloadedThreadPage,
+    LocalConfig,
+    PostMeta,
+    RawPost,
+    StoredThreadPost,
+)
+from notifier.wikidot import (
+    OngoingConnectionError,
+    ThreadNotExists,
+    Wikibork,
+    Wikidot,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -79,13 +90,13 @@ def delete_posts(
 
         try:
             # Throws ThreadNotExists if the thread doesn't exist
-            thread_meta, thread_posts = wikidot.thread(
+            thread_page = wikidot.thread(
                 post["wiki_id"], post["thread_id"], post["post_id"]
             )
 
             # If there are no posts it means the thread is empty - consider it deleted
             # (This is only true when targeting a specific post - if we were targeting a page number, no posts would mean that there are not that many pages)
-            if len(thread_posts) == 0:
+            if len(thread_page) == 0:
                 raise ThreadNotExists
         except ThreadNotExists:
             logger.debug(
@@ -95,15 +106,28 @@ def delete_posts(
             database.delete_context_thread(post["thread_id"])
             deleted_threads_ids.add(post["thread_id"])
             continue
+        except (Wikibork, OngoingConnectionError) as error:
+            # Can't tell whether the post exists, so leave it for next time
+            logger.warning(
+                "Could not check post for deletion %s",
+                {
+                    "wiki_id": post["wiki_id"],
+                    "thread_id": post["thread_id"],
+                    "post_id": post["post_id"],
+                    "reason": repr(error),
+                },
+            )
+            continue
 
         # The thread exists - might as well keep the context up to date while we're here
+        thread_meta = thread_page.meta
         if thread_meta["current_page"] == 1:
             # This won't happen more than once because other posts in page 1 will be marked as existing
             logger.debug(
                 "Updating thread context %s",
                 {"wiki_id": post["wiki_id"], "thread_id": post["thread_id"]},
             )
-            thread_first_post = thread_posts[0]
+            thread_first_post = cast(RawPost, thread_page.first_post())
             database.store_context_thread(
                 {
                     "thread_id": post["thread_id"],
@@ -124,13 +148,11 @@ def delete_posts(
                 }
             )
 
-        thread_posts_ids = {tp["id"] for tp in thread_posts}
-
         # Record all post IDs seen in the page, which are known to exist so don't need to be checked later
-        existing_posts_ids.update(thread_posts_ids & posts_ids)
+        existing_posts_ids.update(thread_page.post_ids & posts_ids)
 
         # Delete the post if it's not in the thread page
-        if post["post_id"] not in thread_posts_ids:
+        if post["post_id"] not in thread_page:
             logger.debug("Deleting post %s", post)
             database.delete_post(post["post_id"])
             deleted_posts_count += 1
@@ -144,6 +166,115 @@ def delete_posts(
     )
 
 
+def reconcile_thread_pages(
+    database: BaseDatabaseDriver, thread_pages: List[DownloadedThreadPage]
+) -> None:
+    """Check stored posts against thread pages that were downloaded for
+    some other reason, e.g. during ingestion.
+
+    Stored posts that should have been on one of the pages but weren't are
+    deleted, and those that were on one are recorded as verified, so that
+    deletion checks can skip them without downloading their pages again.
+    """
+    if len(thread_pages) == 0:
+        return
+    verified_timestamp = timing.timestamp()
+
+    stored_posts: Dict[str, List[StoredThreadPost]] = {}
+    for stored_post in database.get_stored_thread_posts(
+        {page["thread_id"] for page in thread_pages}
+    ):
+        stored_posts.setdefault(stored_post["thread_id"], []).append(
+            stored_post
+        )
+
+    present_posts_ids: Set[str] = set()
+    missing_posts_ids: Set[str] = set()
+    for page in thread_pages:
+        present, missing = reconcile_thread_page(
+            page, stored_posts.get(page["thread_id"], [])
+        )
+        present_posts_ids.update(present)
+        missing_posts_ids.update(missing)
+    # Seeing a post on any page is proof enough that it exists
+    missing_posts_ids -= present_posts_ids
+
+    database.store_posts_verified(present_posts_ids, verified_timestamp)
+    for post_id in missing_posts_ids:
+        logger.debug(
+            "Deleting post missing from thread page %s", {"post_id": post_id}
+        )
+        database.delete_post(post_id)
+
+    logger.debug(
+        "Reconciled stored posts with thread pages %s",
+        {
+            "page_count": len(thread_pages),
+            "verified_posts_count": len(present_posts_ids),
+            "deleted_posts_count": len(missing_posts_ids),
+        },
+    )
+
+
+def reconcile_thread_page(
+    page: DownloadedThreadPage, stored_posts: List[StoredThreadPost]
+) -> Tuple[Set[str], Set[str]]:
+    """Compare a thread's stored posts against a page of the thread.
+
+    Returns a tuple with 2 items:
+
+    1. IDs of stored posts that are on the page.
+    2. IDs of stored posts that aren't on the page, but must have been if
+    they still existed.
+
+    Stored posts that could just be on another page are in neither.
+
+    Wikidot splits a thread into pages by its top-level posts, oldest
+    first, with each followed by all of its replies. So a post must be on
+    the page if the thread only has one page, if it replies to a post on
+    the page, or if it is a top-level post made between the first and last
+    top-level posts on the page (or any time before the last, on the first
+    page, or after the first, on the last page).
+    """
+    # A page with no posts can't be told apart from a deleted thread
+    if len(page["posts"]) == 0:
+        return set(), set()
+
+    page_posts_ids = {post["id"] for post in page["posts"]}
+    top_level_timestamps = [
+        post["posted_timestamp"]
+        for post in page["posts"]
+        if post["parent_post_id"] is None
+    ]
+    single_page = page["page_count"] == 1
+    first_page = single_page or page["current_page"] == 1
+    last_page = single_page or page["current_page"] == page["page_count"]
+
+    present: Set[str] = set()
+    missing: Set[str] = set()
+    for stored_post in stored_posts:
+        if stored_post["post_id"] in page_posts_ids:
+            present.add(stored_post["post_id"])
+            continue
+        if single_page or stored_post["parent_post_id"] in page_posts_ids:
+            missing.add(stored_post["post_id"])
+            continue
+        if (
+            stored_post["parent_post_id"] is None
+            and len(top_level_timestamps) > 0
+            and (
+                first_page
+                or stored_post["posted_timestamp"] > min(top_level_timestamps)
+            )
+            and (
+                last_page
+                or stored_post["posted_timestamp"] < max(top_level_timestamps)
+            )
+        ):
+            missing.add(stored_post["post_id"])
+    return present, missing
+
+
 def rename_invalid_user_config_pages(
     local_config: LocalConfig, wikidot: Wikidot
 ) -> None:
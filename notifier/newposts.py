@@ -1,69 +1,423 @@
 import logging
-from operator import itemgetter
-from typing import Iterator, List, Optional, Set, TypedDict
 import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Dict, Generator, List, Optional, Set, Tuple, cast
 
-import feedparser
-
-from notifier.config.user import parse_thread_url
 from notifier.database.drivers.base import BaseDatabaseDriver
-from notifier.types import RawPost, RawThreadMeta
+from notifier.deletions import reconcile_thread_pages
+from notifier.notifiability import NotifiabilityIndex
+from notifier.threadpages import ThreadPage
+from notifier.types import (
+    Context,
+    DownloadedPosts,
+    DownloadedThreadPage,
+    NotifiablePost,
+    RawPost,
+    RssPost,
+    RssValidators,
+    SupportedWikiConfig,
+)
 from notifier.wikidot import Wikidot
 
 logger = logging.getLogger(__name__)
 
-# HTTPS for the RSS feed doesn't work for insecure wikis, but HTTP does
-# work for secure wikis
-new_posts_rss = "http://{}.wikidot.com/feed/forum/posts.xml"
+# How long context read from a thread's first page is reused for before
+# the page is downloaded again
+THREAD_CONTEXT_MAX_AGE_S = 60 * 60 * 24
+
+
+@dataclass
+class PolledPosts:
+    """New posts found in a wiki's RSS feed."""
+
+    new_posts: List[RssPost]
+    rss_validators: RssValidators
+    # Whether every post made since the latest stored one was found. If
+    # not, the wiki's latest post timestamp and feed validators are left
+    # as they were, so that the missed posts are looked for again
+    complete: bool = True
+
+
+@dataclass
+class FreshThreads:
+    """Threads whose stored context is recent enough to keep using."""
+
+    thread_ids: Set[str]
+    # The user who started each of the threads
+    starter_user_ids: Dict[str, str]
+
+
+@dataclass
+class ThreadContexts:
+    """Thread context handled so far while downloading a wiki's posts."""
+
+    # Threads whose context has been downloaded, or is fresh enough to
+    # reuse, so that their first page won't be downloaded again this run
+    handled_thread_ids: Set[str] = field(default_factory=set)
+    # The user who started each thread, where known
+    starter_user_ids: Dict[str, str] = field(default_factory=dict)
+    # Downloaded context that has not been stored because every post in
+    # its thread so far has been skipped
+    unstored: Dict[str, Context.Thread] = field(default_factory=dict)
+
+
+class ThreadPagePrefetcher:
+    """Downloads the thread pages that a wiki's new posts will need a
+    bounded distance ahead of the posts being processed, so that those
+    downloads overlap with processing and storing the posts before them.
+
+    Posts are taken in runs of consecutive posts in the same thread, in the
+    order they will be processed. For each run, the pages containing its
+    posts are downloaded, and also the thread's first page if the run is
+    the first of a thread whose stored context isn't fresh. Downloaded
+    pages go into the connection's thread page cache, where processing
+    finds them.
+
+    Runs of the same thread are downloaded one after another. A download
+    that fails is left for processing to try again.
+    """
+
+    def __init__(
+        self,
+        wiki_id: str,
+        wikidot: Wikidot,
+        new_posts: List[RssPost],
+        fresh_thread_ids: Set[str],
+        depth: int,
+    ):
+        """
+        :param new_posts: The posts, in the order they will be processed.
+        :param depth: The most runs to download ahead at once; 0 disables
+        prefetching.
+        """
+        self.wiki_id = wiki_id
+        self.wikidot = wikidot
+        self.depth = depth
+        self._fresh_thread_ids = fresh_thread_ids
+        self._runs: List[List[RssPost]] = []
+        # Index of the run that each post is in
+        self._post_runs: Dict[str, int] = {}
+        for post in new_posts:
+            if (
+                len(self._runs) == 0
+                or self._runs[-1][0]["thread_id"] != post["thread_id"]
+            ):
+                self._runs.append([])
+            self._runs[-1].append(post)
+            self._post_runs[post["post_id"]] = len(self._runs) - 1
+        self._seen_thread_ids: Set[str] = set()
+        self._next_run = 0
+        self._downloads: Dict[int, Future[None]] = {}
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=depth, thread_name_prefix=f"prefetch-{wiki_id}"
+            )
+            if depth > 0
+            else None
+        )
+
+    def wait(self, post_id: str) -> None:
+        """Wait until the pages for the run containing a post have been
+        downloaded, and start downloading for the runs after it."""
+        run_index = self._post_runs.get(post_id)
+        if self._executor is None or run_index is None:
+            return
+        while self._next_run < min(
+            run_index + 1 + self.depth, len(self._runs)
+        ):
+            run = self._runs[self._next_run]
+            thread_id = run[0]["thread_id"]
+            if any(
+                self._runs[index][0]["thread_id"] == thread_id
+                and not download.done()
+                for index, download in self._downloads.items()
+            ):
+                # Wait for the thread's earlier pages rather than risk
+                # downloading the same page twice
+                break
+            needs_first_page = (
+                thread_id not in self._seen_thread_ids
+                and thread_id not in self._fresh_thread_ids
+            )
+            self._seen_thread_ids.add(thread_id)
+            self._downloads[self._next_run] = self._executor.submit(
+                self._download, run, needs_first_page
+            )
+            self._next_run += 1
+        download = self._downloads.pop(run_index, None)
+        if download is not None:
+            download.result()
+
+    def _download(self, run: List[RssPost], needs_first_page: bool) -> None:
+        thread_id = run[0]["thread_id"]
+        try:
+            for post in run:
+                # Posts on a page that has already been downloaded are
+                # found in the cache
+                page = self.wikidot.thread(
+                    self.wiki_id, thread_id, post["post_id"]
+                )
+                if needs_first_page and page.meta["current_page"] != 1:
+                    self.wikidot.thread(self.wiki_id, thread_id)
+                    needs_first_page = False
+        except Exception as error:
+            logger.debug(
+                "Failed to prefetch thread page %s",
+                {
+                    "wiki_id": self.wiki_id,
+                    "thread_id": thread_id,
+                    "reason": repr(error),
+                },
+            )
+
+    def close(self) -> None:
+        """Stop downloading, abandoning pages that haven't been started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
 
 
 def get_new_posts(
     database: BaseDatabaseDriver,
     wikidot: Wikidot,
     limit_wikis: Optional[List[str]] = None,
+    notifiability: Optional[NotifiabilityIndex] = None,
 ) -> None:
     """For each configured wiki, retrieve and store new posts.
 
-    Returns tuple of counts of threads and posts downloaded.
+    :param notifiability: If given, posts that nobody would be notified
+    about are not stored.
+
+    Every wiki is polled every run, however quiet. Users' notified
+    timestamps are a single watermark across all wikis, so a post stored
+    after its users have been notified past it would never be delivered.
+    Feeds that haven't changed cost a conditional request each.
+
+    All wikis' RSS feeds are polled first, several at once, so that the
+    whole activation's work is known before any threads are downloaded.
+
+    Several wikis' posts are then downloaded at once, as configured by the
+    connection's ingestion concurrency, but only this thread talks to the
+    database. Each wiki's posts are downloaded and stored a chunk at a
+    time, oldest first, so that if one fails the wiki's next run resumes
+    after the last stored chunk.
     """
     wikis = database.get_supported_wikis()
     if limit_wikis is not None:
         wikis = [wiki for wiki in wikis if wiki["id"] in limit_wikis]
 
     logger.info("Downloading posts from wikis %s", wikis)
+    with ThreadPoolExecutor(
+        max_workers=max(1, wikidot.ingestion_concurrency)
+    ) as executor:
+        polled_wikis = prefetch_new_posts(database, wikidot, wikis, executor)
+
+        # Each wiki's next chunk is downloaded once its previous one has
+        # been stored
+        chunks: Dict[str, Generator[DownloadedPosts, None, None]] = {}
+        downloads: Dict[Future[Optional[DownloadedPosts]], str] = {}
+        try:
+            for wiki_id, polled in polled_wikis.items():
+                try:
+                    chunks[wiki_id] = download_posts_with_context(
+                        wiki_id,
+                        wikidot,
+                        polled,
+                        get_fresh_threads(database, polled.new_posts),
+                        wikidot.ingestion_chunk_size,
+                        notifiability,
+                    )
+                    downloads[executor.submit(next, chunks[wiki_id], None)] = (
+                        wiki_id
+                    )
+                except Exception as error:
+                    log_failed_wiki(wiki_id, error)
+                    continue
+
+            while len(downloads) > 0:
+                done, _ = wait(downloads, return_when=FIRST_COMPLETED)
+                for download in done:
+                    wiki_id = downloads.pop(download)
+                    try:
+                        downloaded = download.result()
+                        if downloaded is None:
+                            continue
+                        store_posts_with_context(database, downloaded)
+                        downloads[
+                            executor.submit(next, chunks[wiki_id], None)
+                        ] = wiki_id
+                    except Exception as error:
+                        log_failed_wiki(wiki_id, error)
+                        # Stop downloading thread pages ahead for it
+                        chunks[wiki_id].close()
+                        continue
+        finally:
+            # Wait for chunks still downloading, so that their wikis'
+            # prefetches can be stopped too
+            for download in downloads:
+                download.cancel()
+            wait(downloads)
+            for wiki_chunks in chunks.values():
+                wiki_chunks.close()
+
+
+def prefetch_new_posts(
+    database: BaseDatabaseDriver,
+    wikidot: Wikidot,
+    wikis: List[SupportedWikiConfig],
+    executor: ThreadPoolExecutor,
+) -> Dict[str, PolledPosts]:
+    """Poll the RSS feeds of all the given wikis at once, and log how much
+    work there is to do for them.
+
+    Returns the new posts of each wiki whose feed has changed, in the
+    order the wikis were given. Wikis whose feeds could not be polled are
+    logged and left out.
+    """
+    polls: Dict[str, Future[Optional[PolledPosts]]] = {}
+    failed_wiki_ids: List[str] = []
     for wiki in wikis:
-        if limit_wikis is not None and wiki["id"] in limit_wikis:
-            continue
         logger.info("Getting new posts %s", {"for wiki_id": wiki["id"]})
         try:
-            fetch_posts_with_context(wiki["id"], database, wikidot)
-        except Exception as error:
-            logger.error(
-                "Failed getting new posts %s",
-                {"for wiki_id": wiki["id"], "reason": "unknown"},
-                exc_info=error,
+            polls[wiki["id"]] = executor.submit(
+                poll_new_posts,
+                wiki["id"],
+                wikidot,
+                database.get_latest_post_timestamp(wiki["id"]),
+                database.get_rss_validators(wiki["id"]),
             )
+        except Exception as error:
+            log_failed_wiki(wiki["id"], error)
+            failed_wiki_ids.append(wiki["id"])
+
+    polled_wikis: Dict[str, PolledPosts] = {}
+    unchanged_wiki_ids: List[str] = []
+    for wiki_id, poll in polls.items():
+        try:
+            polled = poll.result()
+        except Exception as error:
+            log_failed_wiki(wiki_id, error)
+            failed_wiki_ids.append(wiki_id)
             continue
+        if polled is None:
+            unchanged_wiki_ids.append(wiki_id)
+        else:
+            polled_wikis[wiki_id] = polled
 
+    logger.info(
+        "Polled RSS feeds %s",
+        {
+            "wiki_count": len(wikis),
+            "changed_wiki_count": len(polled_wikis),
+            "unchanged_wiki_count": len(unchanged_wiki_ids),
+            "failed_wiki_ids": failed_wiki_ids,
+            "new_post_count": sum(
+                len(polled.new_posts) for polled in polled_wikis.values()
+            ),
+            "new_post_thread_count": len(
+                {
+                    (wiki_id, post["thread_id"])
+                    for wiki_id, polled in polled_wikis.items()
+                    for post in polled.new_posts
+                }
+            ),
+            "new_post_counts": {
+                wiki_id: len(polled.new_posts)
+                for wiki_id, polled in polled_wikis.items()
+                if len(polled.new_posts) > 0
+            },
+        },
+    )
+    return polled_wikis
 
-def fetch_posts_with_context(
-    wiki_id: str, database: BaseDatabaseDriver, wikidot: Wikidot
-) -> None:
-    """Look up new posts for a wiki and then attach their context. Stores
-    the posts in the cache.
+
+def log_failed_wiki(wiki_id: str, error: Exception) -> None:
+    """Log that new posts could not be retrieved from a wiki."""
+    logger.error(
+        "Failed getting new posts %s",
+        {"for wiki_id": wiki_id, "reason": "unknown"},
+        exc_info=error,
+    )
+
+
+def get_fresh_threads(
+    database: BaseDatabaseDriver, new_posts: List[RssPost]
+) -> FreshThreads:
+    """Of the threads that new posts are in, get those whose context was
+    read from their first page recently enough to keep using."""
+    now = int(time.time())
+    fresh_thread_ids = {
+        thread_id
+        for thread_id, fresh_until_timestamp in (
+            database.get_context_thread_fresh_until_timestamps(
+                (post["thread_id"] for post in new_posts),
+                THREAD_CONTEXT_MAX_AGE_S,
+            ).items()
+        )
+        if now < fresh_until_timestamp
+    }
+    return FreshThreads(
+        fresh_thread_ids,
+        database.get_context_thread_starters(fresh_thread_ids),
+    )
+
+
+def poll_new_posts(
+    wiki_id: str,
+    wikidot: Wikidot,
+    latest_post_timestamp: int,
+    rss_validators: RssValidators,
+) -> Optional[PolledPosts]:
+    """Look up new posts for a wiki from its RSS feed.
+
+    :param latest_post_timestamp: The timestamp of the latest post already
+    stored for the wiki. Only posts made after this are returned.
+    :param rss_validators: Validators from the last response of the wiki's
+    RSS feed.
+
+    Returns None if the wiki's RSS feed has not changed.
     """
-    # Get the list of new posts from the forum's RSS
-    all_new_posts = list(fetch_new_posts_rss(wiki_id))
+    # Get the list of new posts from the forum's RSS, unless it hasn't
+    # changed since the last time it was downloaded
+    rss_posts, rss_validators = wikidot.forum_feed(wiki_id, rss_validators)
+    if rss_posts is None:
+        logger.debug("RSS feed not modified %s", {"wiki_id": wiki_id})
+        return None
+
+    # The feed only lists so many posts, so if even the oldest of them is
+    # new, there may be more that it doesn't list
+    complete = True
+    if (
+        wikidot.backfill_page_limit > 0
+        and latest_post_timestamp > 0
+        and len(rss_posts) > 0
+        and min(post["posted_timestamp"] for post in rss_posts)
+        > latest_post_timestamp
+    ):
+        rss_post_ids = {post["post_id"] for post in rss_posts}
+        backfilled_posts, complete = backfill_new_posts(
+            wiki_id, wikidot, latest_post_timestamp
+        )
+        rss_posts = rss_posts + [
+            post
+            for post in backfilled_posts
+            if post["post_id"] not in rss_post_ids
+        ]
 
     # Filter out posts older than this run
-    latest_post_timestamp = database.get_latest_post_timestamp(wiki_id)
     new_posts = sorted(
         [
             post
-            for post in all_new_posts
+            for post in rss_posts
             if post["posted_timestamp"] > latest_post_timestamp
         ],
-        key=lambda p: (p["thread_id"], p["posted_timestamp"]),
+        key=itemgetter("posted_timestamp"),
     )
 
     logger.debug(
@@ -71,31 +425,212 @@ def fetch_posts_with_context(
         {
             "wiki_id": wiki_id,
             "new_post_count": len(new_posts),
-            "posts_in_rss": len(all_new_posts),
+            "posts_in_rss": len(rss_posts),
         },
     )
+    return PolledPosts(new_posts, rss_validators, complete)
 
-    # Cache the latest downloaded thread to prevent multiple identical downloads when multiple posts share a thread
-    thread_meta: RawThreadMeta = None  # type:ignore
-    thread_page_posts: List[RawPost] = []
 
-    # Track which context threads have been downloaded so that they won't be redownloaded this run
-    context_threads_this_run: Set[str] = set()
+def backfill_new_posts(
+    wiki_id: str, wikidot: Wikidot, latest_post_timestamp: int
+) -> Tuple[List[RssPost], bool]:
+    """Page back through a wiki's recent posts until reaching posts that
+    have already been stored, or until the backfill page limit is reached.
+
+    Returns the posts made after the latest stored post, and whether they
+    reach back to it; if the page limit was reached first, some posts in
+    between were missed.
+    """
+    logger.info(
+        "RSS feed overflowed; backfilling from recent posts %s",
+        {"wiki_id": wiki_id, "latest_post_timestamp": latest_post_timestamp},
+    )
+    backfilled_posts: List[RssPost] = []
+    page_number = 1
+    page_count = 1
+    while page_number <= page_count:
+        if page_number > wikidot.backfill_page_limit:
+            logger.warning(
+                "Backfill page limit reached; older posts will be looked "
+                "for again next time %s",
+                {
+                    "wiki_id": wiki_id,
+                    "page_limit": wikidot.backfill_page_limit,
+                    "oldest_backfilled_timestamp": min(
+                        (
+                            post["posted_timestamp"]
+                            for post in backfilled_posts
+                        ),
+                        default=None,
+                    ),
+                },
+            )
+            return backfilled_posts, False
+        page_posts, page_count = wikidot.recent_posts(wiki_id, page_number)
+        if len(page_posts) == 0:
+            # The feed overflowed, so there should be posts to list; if
+            # none could be read, the listing isn't what was expected
+            logger.warning(
+                "No recent posts found while backfilling %s",
+                {"wiki_id": wiki_id, "page_number": page_number},
+            )
+            return backfilled_posts, False
+        backfilled_posts.extend(
+            post
+            for post in page_posts
+            if post["posted_timestamp"] > latest_post_timestamp
+        )
+        if any(
+            post["posted_timestamp"] <= latest_post_timestamp
+            for post in page_posts
+        ):
+            break
+        page_number += 1
+    logger.debug(
+        "Backfilled posts %s",
+        {
+            "wiki_id": wiki_id,
+            "page_count": page_number,
+            "post_count": len(backfilled_posts),
+        },
+    )
+    return backfilled_posts, True
+
+
+def chunk_new_posts(
+    new_posts: List[RssPost], chunk_size: int
+) -> List[List[RssPost]]:
+    """Split new posts, oldest first, into chunks of about the given size
+    that can each be stored on their own.
+
+    Posts made at the same time are kept in the same chunk, as the latest
+    timestamp stored with a chunk marks every post up to and including
+    that time as done. Within each chunk, posts are grouped by thread so
+    that thread pages are downloaded as few times as possible.
+    """
+    chunks: List[List[RssPost]] = []
+    chunk: List[RssPost] = []
+    for post in sorted(new_posts, key=itemgetter("posted_timestamp")):
+        if (
+            len(chunk) >= max(1, chunk_size)
+            and post["posted_timestamp"] != chunk[-1]["posted_timestamp"]
+        ):
+            chunks.append(chunk)
+            chunk = []
+        chunk.append(post)
+    if len(chunk) > 0:
+        chunks.append(chunk)
+    return [
+        sorted(chunk, key=itemgetter("thread_id", "posted_timestamp"))
+        for chunk in chunks
+    ]
+
+
+def download_posts_with_context(
+    wiki_id: str,
+    wikidot: Wikidot,
+    polled: PolledPosts,
+    fresh_threads: FreshThreads,
+    chunk_size: int,
+    notifiability: Optional[NotifiabilityIndex] = None,
+) -> Generator[DownloadedPosts, None, None]:
+    """Attach context to a wiki's new posts, without touching the
+    database, yielding them a chunk at a time, oldest first.
+
+    :param polled: The wiki's new posts.
+    :param fresh_threads: Threads whose stored context is recent enough
+    that their first page need not be downloaded again.
+    :param chunk_size: The number of posts to download before yielding.
+    :param notifiability: If given, posts that nobody would be notified
+    about are left out, as is context that only they needed.
+
+    Each chunk should be stored before the next is requested. Only the
+    last chunk carries the feed's validators; if there were no new posts,
+    that is the only chunk. If some posts were missed, no chunk carries
+    the validators or a latest post timestamp.
+
+    Thread pages are downloaded up to the connection's thread prefetch
+    depth ahead, including while a yielded chunk is being stored.
+    """
+    thread_contexts = ThreadContexts(
+        starter_user_ids=dict(fresh_threads.starter_user_ids)
+    )
+
+    post_chunks = chunk_new_posts(polled.new_posts, chunk_size) or [[]]
+    prefetcher = ThreadPagePrefetcher(
+        wiki_id,
+        wikidot,
+        [post for new_posts in post_chunks for post in new_posts],
+        fresh_threads.thread_ids,
+        wikidot.thread_prefetch_depth,
+    )
+    try:
+        for chunk_index, new_posts in enumerate(post_chunks):
+            last_chunk = chunk_index == len(post_chunks) - 1
+            downloaded = download_chunk_with_context(
+                wiki_id,
+                wikidot,
+                new_posts,
+                fresh_threads.thread_ids,
+                thread_contexts,
+                (
+                    polled.rss_validators
+                    if last_chunk and polled.complete
+                    else None
+                ),
+                notifiability,
+                prefetcher,
+            )
+            if not polled.complete:
+                # Storing it would skip the posts that were missed
+                downloaded["latest_post_timestamp"] = None
+            yield downloaded
+    finally:
+        prefetcher.close()
+
+    if notifiability is not None:
+        notifiability.record_skipped_context(len(thread_contexts.unstored))
+
+
+def download_chunk_with_context(
+    wiki_id: str,
+    wikidot: Wikidot,
+    new_posts: List[RssPost],
+    fresh_thread_ids: Set[str],
+    thread_contexts: ThreadContexts,
+    rss_validators: Optional[RssValidators],
+    notifiability: Optional[NotifiabilityIndex] = None,
+    prefetcher: Optional[ThreadPagePrefetcher] = None,
+) -> DownloadedPosts:
+    """Attach context to a chunk of a wiki's new posts.
+
+    :param thread_contexts: Thread context handled in earlier chunks.
+    Threads handled in this chunk are added to it.
+    :param prefetcher: If given, is told which post is being processed so
+    that it can download ahead of it.
+    """
+    downloaded: DownloadedPosts = {
+        "wiki_id": wiki_id,
+        "categories": [],
+        "threads": [],
+        "parent_posts": [],
+        "posts": [],
+        "latest_post_timestamp": None,
+        "rss_validators": rss_validators,
+        "thread_pages": [],
+    }
+
+    # Cache the latest downloaded thread to prevent multiple identical downloads when multiple posts share a thread
+    thread_page: Optional[ThreadPage] = None
 
     for new_post in new_posts:
         thread_id = new_post["thread_id"]
         post_id = new_post["post_id"]
+        if prefetcher is not None:
+            prefetcher.wait(post_id)
 
         # Download the thread page only if it's not already cached
-        post = next(
-            (
-                page_post
-                for page_post in thread_page_posts
-                if page_post["id"] == post_id
-            ),
-            None,
-        )
-        if post is None:
+        if thread_page is None or post_id not in thread_page:
             logger.debug(
                 "Downloading thread page containing post %s",
                 {
@@ -104,17 +639,12 @@ def fetch_posts_with_context(
                     "post_id": post_id,
                 },
             )
-            thread_meta, thread_page_posts = wikidot.thread(
-                wiki_id, thread_id, post_id
-            )
-            post = next(
-                (
-                    page_post
-                    for page_post in thread_page_posts
-                    if page_post["id"] == post_id
-                ),
-                None,
+            thread_page = wikidot.thread(wiki_id, thread_id, post_id)
+            downloaded["thread_pages"].append(
+                downloaded_thread_page(thread_id, thread_page)
             )
+        thread_meta = thread_page.meta
+        post = thread_page.get(post_id)
         if post is None:
             logger.error(
                 "Requested post missing from downloaded thread %s",
@@ -131,22 +661,22 @@ def fetch_posts_with_context(
         # Context: wiki
         # The context wiki table is running double duty as the list of configured wikis, so we already have that context
 
-        # Context: category
+        # Context: thread
         if (
-            thread_meta["category_id"] is not None
-            and thread_meta["category_name"] is not None
+            thread_id not in thread_contexts.handled_thread_ids
+            and thread_meta["current_page"] != 1
+            and thread_id in fresh_thread_ids
         ):
-            database.store_context_forum_category(
-                {
-                    "category_id": thread_meta["category_id"],
-                    "category_name": thread_meta["category_name"],
-                }
+            # The stored context is recent, and updating it would mean
+            # downloading the first page again
+            logger.debug(
+                "Reusing stored thread context %s",
+                {"wiki_id": wiki_id, "thread_id": thread_id},
             )
-
-        # Context: thread
-        if thread_id not in context_threads_this_run:
+            thread_contexts.handled_thread_ids.add(thread_id)
+        if thread_id not in thread_contexts.handled_thread_ids:
             if thread_meta["current_page"] == 1:
-                thread_first_post: RawPost = thread_page_posts[0]
+                thread_first_post = cast(RawPost, thread_page.first_post())
                 if thread_first_post["id"] == post_id:
                     # Special case where the searched post is the first post in the thread. E.g.:
                     #   - The user is subscribed to a thread that exists but has no posts yet
@@ -159,39 +689,78 @@ def fetch_posts_with_context(
                     "Downloading first thread page %s",
                     {"wiki_id": wiki_id, "thread_id": thread_id},
                 )
-                thread_first_post = wikidot.thread(wiki_id, thread_id)[1][0]
-            database.store_context_thread(
-                {
-                    "thread_id": thread_id,
-                    "thread_created_timestamp": thread_meta[
-                        "created_timestamp"
-                    ],
-                    "thread_title": thread_meta["title"],
-                    "thread_snippet": thread_first_post["snippet"],
-                    "thread_creator_username": thread_meta["creator_username"],
-                    "first_post_id": thread_first_post["id"],
-                    "first_post_author_user_id": thread_first_post["user_id"],
-                    "first_post_author_username": thread_first_post[
-                        "username"
-                    ],
-                    "first_post_created_timestamp": thread_first_post[
-                        "posted_timestamp"
-                    ],
-                }
-            )
-            context_threads_this_run.add(thread_id)
+                first_page = wikidot.thread(wiki_id, thread_id)
+                downloaded["thread_pages"].append(
+                    downloaded_thread_page(thread_id, first_page)
+                )
+                first_page_post = first_page.first_post()
+                if first_page_post is None:
+                    raise RuntimeError("First page of thread has no posts")
+                thread_first_post = first_page_post
+            thread_contexts.unstored[thread_id] = {
+                "thread_id": thread_id,
+                "thread_created_timestamp": thread_meta["created_timestamp"],
+                "thread_title": thread_meta["title"],
+                "thread_snippet": thread_first_post["snippet"],
+                "thread_creator_username": thread_meta["creator_username"],
+                "first_post_id": thread_first_post["id"],
+                "first_post_author_user_id": thread_first_post["user_id"],
+                "first_post_author_username": thread_first_post["username"],
+                "first_post_created_timestamp": thread_first_post[
+                    "posted_timestamp"
+                ],
+            }
+            thread_contexts.starter_user_ids[thread_id] = thread_first_post[
+                "user_id"
+            ]
+            thread_contexts.handled_thread_ids.add(thread_id)
 
         # Context: parent post
-        parent_post = next(
-            (
-                page_post
-                for page_post in thread_page_posts
-                if page_post["id"] == post["parent_post_id"]
-            ),
-            None,
+        parent_post = thread_page.parent(post_id)
+
+        # Context complete
+        notifiable_post: NotifiablePost = {
+            "post_id": post["id"],
+            "posted_timestamp": post["posted_timestamp"],
+            "post_title": post["title"],
+            "post_snippet": post["snippet"],
+            "author_user_id": post["user_id"],
+            "author_username": post["username"],
+            "context_wiki_id": wiki_id,
+            "context_forum_category_id": thread_meta["category_id"],
+            "context_thread_id": thread_id,
+            "context_parent_post_id": post["parent_post_id"],
+        }
+        has_category = (
+            thread_meta["category_id"] is not None
+            and thread_meta["category_name"] is not None
         )
+
+        # Skip the post if nobody would be notified about it
+        if notifiability is not None and not notifiability.is_notifiable(
+            notifiable_post,
+            thread_contexts.starter_user_ids.get(thread_id),
+            None if parent_post is None else parent_post["user_id"],
+        ):
+            notifiability.record_skipped_context(
+                int(has_category) + int(parent_post is not None)
+            )
+            continue
+
+        # Now keep the post itself, and its context
+        if has_category:
+            downloaded["categories"].append(
+                {
+                    "category_id": cast(str, thread_meta["category_id"]),
+                    "category_name": cast(str, thread_meta["category_name"]),
+                }
+            )
+        if thread_id in thread_contexts.unstored:
+            downloaded["threads"].append(
+                thread_contexts.unstored.pop(thread_id)
+            )
         if parent_post is not None:
-            database.store_context_parent_post(
+            downloaded["parent_posts"].append(
                 {
                     "post_id": parent_post["id"],
                     "posted_timestamp": parent_post["posted_timestamp"],
@@ -201,53 +770,47 @@ def fetch_posts_with_context(
                     "author_username": parent_post["username"],
                 }
             )
+        downloaded["posts"].append(notifiable_post)
 
-        # Context complete
-        # Now store the post itself
-        logger.debug("Storing post %s", {"wiki_id": wiki_id, "post": post})
-        database.store_post(
-            {
-                "post_id": post["id"],
-                "posted_timestamp": post["posted_timestamp"],
-                "post_title": post["title"],
-                "post_snippet": post["snippet"],
-                "author_user_id": post["user_id"],
-                "author_username": post["username"],
-                "context_wiki_id": wiki_id,
-                "context_forum_category_id": thread_meta["category_id"],
-                "context_thread_id": thread_id,
-                "context_parent_post_id": post["parent_post_id"],
-            },
-        )
-
-    # If there was at least one post, store the new highest timestamp for this wiki
+    # If there was at least one post, the new highest timestamp for this
+    # wiki will be stored along with it
     if len(new_posts) > 0:
-        database.store_latest_post_timestamp(
-            wiki_id, max(post["posted_timestamp"] for post in new_posts)
+        downloaded["latest_post_timestamp"] = max(
+            post["posted_timestamp"] for post in new_posts
         )
+    return downloaded
 
 
-RssPost = TypedDict(
-    "RssPost", {"thread_id": str, "post_id": str, "posted_timestamp": int}
-)
+def downloaded_thread_page(
+    thread_id: str, page: ThreadPage
+) -> DownloadedThreadPage:
+    """Keep where the posts on a downloaded thread page sit, to check
+    stored posts against."""
+    return {
+        "thread_id": thread_id,
+        "page_count": page.meta["page_count"],
+        "current_page": page.meta["current_page"],
+        "posts": page.index,
+    }
 
 
-def fetch_new_posts_rss(wiki_id: str) -> Iterator[RssPost]:
-    """Get basic info about new posts from the wiki's RSS feed."""
-    rss_url = new_posts_rss.format(wiki_id)
-    try:
-        feed = feedparser.parse(rss_url)
-    except Exception as error:  # pylint: disable=broad-except
-        logger.error(
-            "Could not parse RSS feed %s", {"wiki_id": wiki_id}, exc_info=error
-        )
-
-    for entry in feed["entries"]:
-        thread_id, post_id = itemgetter("thread_id", "post_id")(
-            parse_thread_url(entry["id"])
-        )
-        yield {
-            "thread_id": thread_id,
-            "post_id": post_id,
-            "posted_timestamp": int(time.mktime(entry["published_parsed"])),
-        }
+def store_posts_with_context(
+    database: BaseDatabaseDriver, downloaded: DownloadedPosts
+) -> None:
+    """Store downloaded posts and their context, then record how far
+    through the wiki's posts has been stored."""
+    logger.debug(
+        "Storing posts %s",
+        {
+            "wiki_id": downloaded["wiki_id"],
+            "post_count": len(downloaded["posts"]),
+            "thread_count": len(downloaded["threads"]),
+            "checkpoint_timestamp": downloaded["latest_post_timestamp"],
+        },
+    )
+    # Storing the validators along with the last of the posts makes it
+    # safe to skip this version of the feed in future
+    database.store_downloaded_posts(downloaded)
+    # The pages were downloaded anyway, so check the thread's other stored
+    # posts against them while they're here
+    reconcile_thread_pages(database, downloaded["thread_pages"])
@@ -0,0 +1,132 @@
+import threading
+from typing import Dict, List, Optional, Set, Tuple, TypedDict
+
+from notifier.types import NotifiablePost, SubscribedUser
+
+
+class NotifiabilityReport(TypedDict):
+    """Summary of how much work the notifiability filter has saved."""
+
+    checked_post_count: int
+    skipped_post_count: int
+    # Categories, threads and parent posts that would only have been
+    # stored as context for skipped posts
+    skipped_context_count: int
+
+
+class NotifiabilityIndex:
+    """Who can be notified about which posts, for skipping new posts
+    during ingestion that nobody would be notified about, rather than
+    storing them only for them to be purged at the end of the activation.
+
+    Follows the same rules as the delete_non_notifiable_posts query, so
+    any post skipped is one that would have been deleted. Where a post's
+    context is not known well enough to tell, it is kept.
+
+    Safe to use from several threads at once.
+    """
+
+    def __init__(self, users: List[SubscribedUser]):
+        self._last_notified_timestamps: Dict[str, int] = {}
+        # Manual (un)subscriptions by thread ID and post ID (None for the
+        # whole thread), then by user ID
+        self._manual_subs: Dict[Tuple[str, Optional[str]], Dict[str, int]] = (
+            {}
+        )
+        for user in users:
+            self._last_notified_timestamps[user["user_id"]] = user[
+                "last_notified_timestamp"
+            ]
+            for sub in user["manual_subs"]:
+                self._manual_subs.setdefault(
+                    (sub["thread_id"], sub["post_id"]), {}
+                )[user["user_id"]] = sub["sub"]
+        self.checked_post_count = 0
+        self.skipped_post_count = 0
+        self.skipped_context_count = 0
+        self._lock = threading.Lock()
+
+    def is_notifiable(
+        self,
+        post: NotifiablePost,
+        thread_starter_user_id: Optional[str],
+        parent_author_user_id: Optional[str],
+    ) -> bool:
+        """Whether any user would be notified about a post.
+
+        :param thread_starter_user_id: The author of the first post in the
+        post's thread, or None if not known.
+        :param parent_author_user_id: The author of the post this post
+        replies to, or None if it isn't a reply or the author isn't known.
+        """
+        notifiable = self._is_notifiable(
+            post, thread_starter_user_id, parent_author_user_id
+        )
+        with self._lock:
+            self.checked_post_count += 1
+            if not notifiable:
+                self.skipped_post_count += 1
+        return notifiable
+
+    def _is_notifiable(
+        self,
+        post: NotifiablePost,
+        thread_starter_user_id: Optional[str],
+        parent_author_user_id: Optional[str],
+    ) -> bool:
+        thread_id = post["context_thread_id"]
+        parent_post_id = post["context_parent_post_id"]
+        if (
+            thread_id is None
+            or thread_starter_user_id is None
+            or (parent_post_id is not None and parent_author_user_id is None)
+        ):
+            return True
+        thread_subs = self._manual_subs.get((thread_id, None), {})
+        post_subs = (
+            {}
+            if parent_post_id is None
+            else self._manual_subs.get((thread_id, parent_post_id), {})
+        )
+        candidate_user_ids: Set[Optional[str]] = {
+            thread_starter_user_id,
+            parent_author_user_id,
+        }
+        candidate_user_ids.update(
+            user_id for user_id, sub in thread_subs.items() if sub == 1
+        )
+        candidate_user_ids.update(
+            user_id for user_id, sub in post_subs.items() if sub == 1
+        )
+        for user_id in candidate_user_ids:
+            if user_id is None or user_id == post["author_user_id"]:
+                continue
+            last_notified_timestamp = self._last_notified_timestamps.get(
+                user_id
+            )
+            if (
+                last_notified_timestamp is None
+                or last_notified_timestamp >= post["posted_timestamp"]
+            ):
+                continue
+            if thread_subs.get(user_id, 1) != 1:
+                continue
+            if post_subs.get(user_id, 1) != 1:
+                continue
+            return True
+        return False
+
+    def record_skipped_context(self, row_count: int) -> None:
+        """Record that some context was not stored because every post it
+        was for was skipped."""
+        with self._lock:
+            self.skipped_context_count += row_count
+
+    def report(self) -> NotifiabilityReport:
+        """Summarise the filter's usage."""
+        with self._lock:
+            return {
+                "checked_post_count": self.checked_post_count,
+                "skipped_post_count": self.skipped_post_count,
+                "skipped_context_count": self.skipped_context_count,
+            }
@@ -16,6 +16,10 @@ from notifier.digest import Digester
 from notifier.dumps import LogDumpCacher, record_activation_log
 from notifier.emailer import Emailer
 from notifier.newposts import get_new_posts
+from notifier.notifiability import NotifiabilityIndex
+from notifier.pageids import PageIdCache
+from notifier.requeststats import RequestStats
+from notifier.tags import TagUpdateQueue, parse_tags
 from notifier.timing import channel_is_now, timestamp
 from notifier.types import (
     ActivationLogDump,
@@ -100,6 +104,27 @@ def activation_log_dump_context(
             record_activation_log(config, database)
 
 
+@contextmanager
+def deferred_tag_updates(
+    channel: str, config: LocalConfig, wikidot: Wikidot
+) -> Iterator[TagUpdateQueue]:
+    """Creates a queue of user config tag updates that is flushed when the
+    wrapped process ends, even if it fails."""
+    tag_updates = TagUpdateQueue(config["config_wiki_id"])
+    try:
+        yield tag_updates
+    finally:
+        if len(tag_updates) > 0:
+            logger.info(
+                "Updating user config tags %s",
+                {"channel": channel, "page_count": len(tag_updates)},
+            )
+            logger.info(
+                "Updated user config tags %s",
+                {"channel": channel, **tag_updates.flush(wikidot)},
+            )
+
+
 def notify(
     *,
     config: LocalConfig,
@@ -139,7 +164,15 @@ def notify(
             "secure": config["config_wiki_secure"],
         }
         supported_wikis.append(config_wiki)
-        wikidot = Wikidot(supported_wikis, dry_run=dry_run)
+        page_ids = PageIdCache(database)
+        request_stats = RequestStats()
+        wikidot = Wikidot(
+            supported_wikis,
+            options=config["wikidot"],
+            page_ids=page_ids,
+            request_stats=request_stats,
+            dry_run=dry_run,
+        )
 
         activation_log_dump.update({"config_start_timestamp": timestamp()})
         if dry_run:
@@ -151,7 +184,14 @@ def notify(
             get_user_config(config, database, wikidot)
 
             # Refresh the connection to add any newly-configured wikis
-            wikidot = Wikidot(database.get_supported_wikis())
+            wikidot = Wikidot(
+                database.get_supported_wikis(),
+                options=config["wikidot"],
+                page_ids=page_ids,
+                request_stats=request_stats,
+                breaker=wikidot.breaker,
+                thread_pages=wikidot.thread_pages,
+            )
         activation_log_dump.update({"config_end_timestamp": timestamp()})
 
         activation_log_dump.update({"getpost_start_timestamp": timestamp()})
@@ -159,10 +199,29 @@ def notify(
             logger.info("Dry run: skipping new post acquisition")
         else:
             logger.info("Getting new posts...")
-            get_new_posts(database, wikidot, limit_wikis)
+            # Posts that nobody would be notified about are not stored,
+            # rather than purged once notifications have been sent
+            notifiability = NotifiabilityIndex(database.get_subscribed_users())
+            get_new_posts(database, wikidot, limit_wikis, notifiability)
+            logger.info(
+                "Notifiability filter usage %s", notifiability.report()
+            )
+            logger.info(
+                "Wikidot request timing after getting new posts %s",
+                wikidot.pacer.report(),
+            )
+            logger.debug(
+                "Wikidot requests after getting new posts %s",
+                request_stats.summarise(),
+            )
         # The timestamp immediately after downloading posts will be used as the
         # upper bound of posts to notify users about
-        activation_log_dump.update({"getpost_end_timestamp": timestamp()})
+        activation_log_dump.update(
+            {
+                "getpost_end_timestamp": timestamp(),
+                "wikidot_requests": request_stats.summarise(by_wiki=False),
+            }
+        )
 
         if dry_run:
             logger.info("Dry run: skipping Wikidot login")
@@ -183,7 +242,15 @@ def notify(
             force_initial_search_timestamp=force_initial_search_timestamp,
             dry_run=dry_run,
         )
-        activation_log_dump.update({"notify_end_timestamp": timestamp()})
+        activation_log_dump.update(
+            {
+                "notify_end_timestamp": timestamp(),
+                "wikidot_requests": request_stats.summarise(by_wiki=False),
+            }
+        )
+        logger.info(
+            "Wikidot request timing after notifying %s", wikidot.pacer.report()
+        )
 
         # Notifications have been sent, so perform time-insensitive maintenance
 
@@ -203,6 +270,18 @@ def notify(
         delete_prepared_invalid_user_pages(config, wikidot)
         rename_invalid_user_config_pages(config, wikidot)
 
+        activation_log_dump.update(
+            {"wikidot_requests": request_stats.summarise(by_wiki=False)}
+        )
+        logger.info(
+            "Thread page cache usage %s", wikidot.thread_pages.report()
+        )
+        if len(wikidot.breaker.unavailable_wikis()) > 0:
+            logger.warning(
+                "Wikis unavailable at end of activation %s",
+                {"wiki_ids": wikidot.breaker.unavailable_wikis()},
+            )
+
 
 def notify_active_channels(
     active_channels: Iterable[str],
@@ -289,61 +368,65 @@ def notify_channel(
     notified_users = 0
     notified_posts = 0
     addresses: EmailAddresses = {}
-    for user in user_configs:
-        try:
-            sent, post_count = notify_user(
-                user,
-                channel=channel,
-                current_timestamp=current_timestamp,
-                force_initial_search_timestamp=force_initial_search_timestamp,
-                config=config,
-                database=database,
-                wikidot=wikidot,
-                digester=digester,
-                emailer=emailer,
-                addresses=addresses,
-                dry_run=dry_run,
-            )
-            if sent:
-                notified_users += 1
-                notified_posts += post_count
-        except SMTPAuthenticationError as error:
-            logger.error(
-                "Failed to notify user via email %s",
-                {
-                    "reason": "Gmail authentication failed",
-                    "for user": user["username"],
-                    "in channel": channel,
-                },
-                exc_info=error,
-            )
-            continue
-        except NotLoggedIn as error:
-            logger.error("Failed to notify anyone; not logged in")
-            raise RuntimeError from error
-        except Wikibork:
-            # Wikidot down - no point raising an error because I can't do anything about it
-            logger.warning(
-                "Wikibork detected, skipping user %s",
-                {
-                    "user": user["username"],
-                    "channel": channel,
-                    "user_config": user,
-                },
-            )
-            continue
-        except Exception as error:
-            logger.error(
-                "Failed to notify user %s",
-                {
-                    "reason": repr(error),
-                    "for user": user["username"],
-                    "in channel": channel,
-                    "user_config": user,
-                },
-                exc_info=error,
-            )
-            continue
+    # Tag changes are deferred until everyone has been notified, or until
+    # notifying stops early
+    with deferred_tag_updates(channel, config, wikidot) as tag_updates:
+        for user in user_configs:
+            try:
+                sent, post_count = notify_user(
+                    user,
+                    channel=channel,
+                    current_timestamp=current_timestamp,
+                    force_initial_search_timestamp=force_initial_search_timestamp,
+                    config=config,
+                    database=database,
+                    wikidot=wikidot,
+                    digester=digester,
+                    emailer=emailer,
+                    addresses=addresses,
+                    tag_updates=tag_updates,
+                    dry_run=dry_run,
+                )
+                if sent:
+                    notified_users += 1
+                    notified_posts += post_count
+            except SMTPAuthenticationError as error:
+                logger.error(
+                    "Failed to notify user via email %s",
+                    {
+                        "reason": "Gmail authentication failed",
+                        "for user": user["username"],
+                        "in channel": channel,
+                    },
+                    exc_info=error,
+                )
+                continue
+            except NotLoggedIn as error:
+                logger.error("Failed to notify anyone; not logged in")
+                raise RuntimeError from error
+            except Wikibork:
+                # Wikidot down - no point raising an error because I can't do anything about it
+                logger.warning(
+                    "Wikibork detected, skipping user %s",
+                    {
+                        "user": user["username"],
+                        "channel": channel,
+                        "user_config": user,
+                    },
+                )
+                continue
+            except Exception as error:
+                logger.error(
+                    "Failed to notify user %s",
+                    {
+                        "reason": repr(error),
+                        "for user": user["username"],
+                        "in channel": channel,
+                        "user_config": user,
+                    },
+                    exc_info=error,
+                )
+                continue
 
     channel_log_dump.update(
         {"end_timestamp": timestamp(), "notified_user_count": notified_users}
@@ -367,6 +450,7 @@ def notify_user(
     digester: Digester,
     emailer: Emailer,
     addresses: EmailAddresses,
+    tag_updates: TagUpdateQueue,
     dry_run: bool = False,
 ) -> Tuple[bool, int]:
     """Compiles and sends a notification for a single user.
@@ -379,6 +463,8 @@ def notify_user(
     to. Should be set to an empty dict initially; if this is the case, this
     function will populate it from the notifier's Wikidot account. This
     object must not be reassigned, only mutated.
+    :param tag_updates: Queue to add changes to the user's config page tags
+    to. They are not written by this function.
     """
     logger.debug(
         "Making digest for user %s",
@@ -435,21 +521,15 @@ def notify_user(
         return True, post_count
 
     error_tags = {"restricted-inbox", "not-a-back-contact"}
+    user_page_slug = f"{config['user_config_category']}:{user['user_id']}"
 
     def update_tags_for_user(
         old_tags: FrozenSet[str], new_tags: Set[str]
     ) -> None:
-        if old_tags == new_tags:
-            return
-        new_tags_string = " ".join(map(str, new_tags))
-        wikidot.set_tags(
-            config["config_wiki_id"],
-            f"{config['user_config_category']}:{str(user['user_id'])}",
-            new_tags_string,
-        )
+        tag_updates.set_tags(user_page_slug, old_tags, new_tags)
 
     def add_error_tag_to_user(error_tag: str, waiting_count: int = 0) -> None:
-        old_tags = frozenset(user["tags"].split(" "))
+        old_tags = parse_tags(user["tags"])
         new_tags = set(old_tags)
 
         new_tags.add(error_tag)
@@ -463,7 +543,7 @@ def notify_user(
         update_tags_for_user(old_tags, new_tags)
 
     def remove_error_tags_from_user() -> None:
-        old_tags = frozenset(user["tags"].split(" "))
+        old_tags = parse_tags(user["tags"])
         new_tags = set(old_tags)
 
         # Remove all error tags
@@ -566,10 +646,6 @@ def notify_user(
 
     # If the delivery was successful, remove any error tags
     if user["tags"] != "":
-        wikidot.set_tags(
-            config["config_wiki_id"],
-            ":".join([config["user_config_category"], user["user_id"]]),
-            "",
-        )
+        tag_updates.set_tags(user_page_slug, user["tags"], "")
 
     return True, post_count
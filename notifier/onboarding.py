@@ -0,0 +1,304 @@
+"""Onboarding of newly-configured wikis.
+
+A wiki that has just been added has no stored thread context, so the first
+page of each of its threads has to be downloaded during an activation as
+soon as someone posts in it. Onboarding loads context for the wiki's
+recently active threads ahead of time, outside of any activation.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+from notifier import timing
+from notifier.database.drivers.base import BaseDatabaseDriver
+from notifier.database.utils import resolve_driver_from_config
+from notifier.newposts import THREAD_CONTEXT_MAX_AGE_S
+from notifier.types import AuthConfig, Context, LocalConfig
+from notifier.wikidot import (
+    OngoingConnectionError,
+    ThreadNotExists,
+    Wikibork,
+    Wikidot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Threads last posted in longer ago than this aren't worth loading
+ONBOARDING_MAX_AGE_S = 60 * 60 * 24 * 30
+# Most requests to make to each wiki while onboarding it
+ONBOARDING_REQUEST_BUDGET = 1000
+
+
+class OnboardingReport(TypedDict):
+    """Summary of the onboarding of a wiki."""
+
+    wiki_id: str
+    category_count: int
+    # Categories whose threads couldn't all be listed
+    failed_category_count: int
+    # Threads posted in within the maximum age
+    recent_thread_count: int
+    # Recent threads whose stored context was already fresh
+    fresh_thread_count: int
+    loaded_thread_count: int
+    failed_thread_count: int
+    # Recent threads that were left out to stay within the budget
+    over_budget_thread_count: int
+    request_count: int
+
+
+class RequestBudget:
+    """A number of requests that can be shared between several threads."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """Use up a request, if there are any left."""
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+    @property
+    def remaining(self) -> int:
+        """The number of requests left."""
+        with self._lock:
+            return self.limit - self.used
+
+
+def onboard_wikis(
+    *,
+    config: LocalConfig,
+    auth: AuthConfig,
+    wiki_ids: List[str],
+    max_age_s: int = ONBOARDING_MAX_AGE_S,
+    request_budget: int = ONBOARDING_REQUEST_BUDGET,
+) -> None:
+    """Onboard each of the given wikis, which must already be in the
+    remote config."""
+    DatabaseDriver = resolve_driver_from_config(config["database"]["driver"])
+    database = DatabaseDriver(
+        config["database"]["database_name"],
+        host=auth["mysql_host"],
+        username=auth["mysql_username"],
+        password=auth["mysql_password"],
+    )
+    supported_wikis = database.get_supported_wikis()
+    wikidot = Wikidot(supported_wikis, options=config["wikidot"])
+    supported_wiki_ids = {wiki["id"] for wiki in supported_wikis}
+    for wiki_id in wiki_ids:
+        if wiki_id not in supported_wiki_ids:
+            logger.error(
+                "Cannot onboard unconfigured wiki %s", {"wiki_id": wiki_id}
+            )
+            continue
+        logger.info(
+            "Onboarded wiki %s",
+            onboard_wiki(
+                database,
+                wikidot,
+                wiki_id,
+                max_age_s=max_age_s,
+                request_budget=request_budget,
+            ),
+        )
+
+
+def onboard_wiki(
+    database: BaseDatabaseDriver,
+    wikidot: Wikidot,
+    wiki_id: str,
+    *,
+    max_age_s: int,
+    request_budget: int,
+) -> OnboardingReport:
+    """Load context for the threads of a wiki's forum that have been posted
+    in recently.
+
+    :param max_age_s: Threads last posted in longer ago than this are
+    skipped.
+    :param request_budget: The most requests to make to the wiki. Threads
+    posted in most recently are loaded first.
+
+    Context is stored in chunks as it is downloaded. It is kept, and used
+    instead of downloading the thread again, for the maximum age, even if
+    no posts need it, so that it is still there once someone posts in an
+    onboarded thread.
+
+    A category or thread that can't be downloaded is logged and left out,
+    rather than stopping the rest of the wiki from being onboarded.
+    """
+    now = timing.timestamp()
+    budget = RequestBudget(request_budget)
+    logger.info(
+        "Onboarding wiki %s",
+        {"wiki_id": wiki_id, "max_age_s": max_age_s, "budget": request_budget},
+    )
+
+    category_ids: List[str] = []
+    if budget.take():
+        try:
+            category_ids = wikidot.forum_categories(wiki_id)
+        except (Wikibork, OngoingConnectionError) as error:
+            logger.warning(
+                "Could not list forum categories for onboarding %s",
+                {"wiki_id": wiki_id, "reason": repr(error)},
+            )
+    # When each recent thread was last posted in
+    recent_threads: Dict[str, int] = {}
+    failed_category_count = 0
+    with ThreadPoolExecutor(
+        max_workers=wikidot.ingestion_concurrency,
+        thread_name_prefix="onboarding",
+    ) as executor:
+        for category_threads, complete in executor.map(
+            lambda category_id: list_recent_threads(
+                wikidot, wiki_id, category_id, now - max_age_s, budget
+            ),
+            category_ids,
+        ):
+            recent_threads.update(category_threads)
+            if not complete:
+                failed_category_count += 1
+
+        fresh_thread_ids = {
+            thread_id
+            for thread_id, fresh_until_timestamp in (
+                database.get_context_thread_fresh_until_timestamps(
+                    recent_threads, THREAD_CONTEXT_MAX_AGE_S
+                ).items()
+            )
+            if now < fresh_until_timestamp
+        }
+        thread_ids = sorted(
+            set(recent_threads) - fresh_thread_ids,
+            key=lambda thread_id: recent_threads[thread_id],
+            reverse=True,
+        )
+        over_budget_thread_count = max(0, len(thread_ids) - budget.remaining)
+        thread_ids = thread_ids[: budget.remaining]
+
+        loaded_thread_count = 0
+        failed_thread_count = 0
+        chunk: List[Context.Thread] = []
+        for context_thread in executor.map(
+            lambda thread_id: download_thread_context(
+                wikidot, wiki_id, thread_id, budget
+            ),
+            thread_ids,
+        ):
+            if context_thread is None:
+                failed_thread_count += 1
+                continue
+            chunk.append(context_thread)
+            if len(chunk) >= wikidot.ingestion_chunk_size:
+                database.store_context_threads(chunk, now + max_age_s)
+                loaded_thread_count += len(chunk)
+                chunk = []
+        if len(chunk) > 0:
+            database.store_context_threads(chunk, now + max_age_s)
+            loaded_thread_count += len(chunk)
+
+    return {
+        "wiki_id": wiki_id,
+        "category_count": len(category_ids),
+        "failed_category_count": failed_category_count,
+        "recent_thread_count": len(recent_threads),
+        "fresh_thread_count": len(fresh_thread_ids),
+        "loaded_thread_count": loaded_thread_count,
+        "failed_thread_count": failed_thread_count,
+        "over_budget_thread_count": over_budget_thread_count,
+        "request_count": budget.used,
+    }
+
+
+def list_recent_threads(
+    wikidot: Wikidot,
+    wiki_id: str,
+    category_id: str,
+    cutoff_timestamp: int,
+    budget: RequestBudget,
+) -> Tuple[Dict[str, int], bool]:
+    """Page through a forum category's threads, most recently posted in
+    first, until reaching threads last posted in before the cutoff.
+
+    Returns when each recent thread was last posted in, and whether the
+    listing was read without failing. If a page fails, the threads from
+    the pages before it are still returned.
+    """
+    recent_threads: Dict[str, int] = {}
+    page_number = 1
+    page_count = 1
+    while page_number <= page_count and budget.take():
+        try:
+            threads, page_count = wikidot.category_threads(
+                wiki_id, category_id, page_number
+            )
+        except (Wikibork, OngoingConnectionError) as error:
+            logger.warning(
+                "Could not list category threads for onboarding %s",
+                {
+                    "wiki_id": wiki_id,
+                    "category_id": category_id,
+                    "page_number": page_number,
+                    "reason": repr(error),
+                },
+            )
+            return recent_threads, False
+        for thread in threads:
+            if thread["last_post_timestamp"] >= cutoff_timestamp:
+                recent_threads[thread["thread_id"]] = thread[
+                    "last_post_timestamp"
+                ]
+        if any(
+            thread["last_post_timestamp"] < cutoff_timestamp
+            for thread in threads
+        ):
+            break
+        page_number += 1
+    return recent_threads, True
+
+
+def download_thread_context(
+    wikidot: Wikidot, wiki_id: str, thread_id: str, budget: RequestBudget
+) -> Optional[Context.Thread]:
+    """Read a thread's context from its first page.
+
+    Returns None if the thread can't be downloaded, or if the request
+    budget has run out.
+    """
+    if not budget.take():
+        return None
+    try:
+        thread_page = wikidot.thread(wiki_id, thread_id)
+    except (ThreadNotExists, Wikibork, OngoingConnectionError) as error:
+        logger.warning(
+            "Could not onboard thread %s",
+            {
+                "wiki_id": wiki_id,
+                "thread_id": thread_id,
+                "reason": repr(error),
+            },
+        )
+        return None
+    thread_meta = thread_page.meta
+    thread_first_post = thread_page.first_post()
+    if thread_first_post is None:
+        return None
+    return {
+        "thread_id": thread_id,
+        "thread_created_timestamp": thread_meta["created_timestamp"],
+        "thread_title": thread_meta["title"],
+        "thread_snippet": thread_first_post["snippet"],
+        "thread_creator_username": thread_meta["creator_username"],
+        "first_post_id": thread_first_post["id"],
+        "first_post_author_user_id": thread_first_post["user_id"],
+        "first_post_author_username": thread_first_post["username"],
+        "first_post_created_timestamp": thread_first_post["posted_timestamp"],
+    }
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, TypedDict
+
+logger = logging.getLogger(__name__)
+
+
+class PacingReport(TypedDict):
+    """Summary of where time went when making requests."""
+
+    request_count: int
+    paced_request_count: int
+    pacing_wait_s: float
+    backoff_wait_s: float
+    network_s: float
+
+
+class TokenBucket:
+    """Token bucket that permits bursts of requests up to its capacity and
+    otherwise refills at a steady rate.
+
+    Taking a token when none are left reserves the next one, so concurrent
+    callers queue up in order rather than all waking at once.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RequestPacer:
+    """Paces requests to each host so that no host is sent more than the
+    given rate of requests, only waiting when a host's budget is exhausted.
+
+    Also keeps account of time spent waiting for the budget, waiting to
+    retry failed requests, and waiting on the network.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        :param rate: Sustained requests per second permitted to each host.
+        :param burst: Number of requests that can be made to a host in
+        quick succession before pacing kicks in.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._report: PacingReport = {
+            "request_count": 0,
+            "paced_request_count": 0,
+            "pacing_wait_s": 0.0,
+            "backoff_wait_s": 0.0,
+            "network_s": 0.0,
+        }
+
+    def wait(self, host: str) -> None:
+        """Wait until a request can be made to the given host."""
+        with self._lock:
+            bucket = self._buckets.setdefault(
+                host, TokenBucket(self.rate, self.burst)
+            )
+        delay = bucket.take()
+        with self._lock:
+            self._report["request_count"] += 1
+            if delay > 0:
+                self._report["paced_request_count"] += 1
+                self._report["pacing_wait_s"] += delay
+        if delay > 0:
+            logger.debug("Pacing request %s", {"host": host, "delay_s": delay})
+            time.sleep(delay)
+
+    def backoff(self, delay: float) -> None:
+        """Wait before retrying a failed request."""
+        with self._lock:
+            self._report["backoff_wait_s"] += delay
+        time.sleep(delay)
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        """Context manager that counts its duration as network time."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._report["network_s"] += time.monotonic() - start
+
+    def report(self) -> PacingReport:
+        """Get a snapshot of the time accounts."""
+        with self._lock:
+            return {**self._report}
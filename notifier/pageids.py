@@ -0,0 +1,94 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from notifier.database.drivers.base import BaseDatabaseDriver
+
+logger = logging.getLogger(__name__)
+
+
+class PageIdCache:
+    """Cache of page IDs keyed by wiki and slug, backed by the database.
+
+    A page's ID is needed to modify it, but Wikidot only exposes it in the
+    page's source, which is expensive to download. A page's ID never
+    changes, but the page at a slug can, so entries must be dropped when a
+    page is renamed or deleted.
+
+    Each wiki's IDs are loaded from the database in one go the first time
+    that wiki is looked at.
+
+    Only the thread that owns the database connection may use the cache
+    directly. Other threads may use it inside deferred_writes.
+    """
+
+    def __init__(self, database: BaseDatabaseDriver):
+        self.database = database
+        self._page_ids: Dict[str, Dict[str, int]] = {}
+        # While writes are deferred, maps wiki ID and slug to each changed
+        # page ID, or None if it was forgotten
+        self._unwritten: Optional[Dict[Tuple[str, str], Optional[int]]] = None
+        self._lock = threading.Lock()
+
+    def _wiki_page_ids(self, wiki_id: str) -> Dict[str, int]:
+        """Get the known page IDs for a wiki. Must hold the lock."""
+        if wiki_id not in self._page_ids:
+            self._page_ids[wiki_id] = self.database.get_page_ids(wiki_id)
+            logger.debug(
+                "Loaded cached page IDs %s",
+                {"wiki_id": wiki_id, "count": len(self._page_ids[wiki_id])},
+            )
+        return self._page_ids[wiki_id]
+
+    def get(self, wiki_id: str, slug: str) -> Optional[int]:
+        """Get the cached ID of a page, if known."""
+        with self._lock:
+            return self._wiki_page_ids(wiki_id).get(slug)
+
+    def store(self, wiki_id: str, slug: str, page_id: int) -> None:
+        """Remember the ID of a page."""
+        with self._lock:
+            page_ids = self._wiki_page_ids(wiki_id)
+            if page_ids.get(slug) == page_id:
+                return
+            page_ids[slug] = page_id
+            if self._unwritten is not None:
+                self._unwritten[(wiki_id, slug)] = page_id
+            else:
+                self.database.store_page_id(wiki_id, slug, page_id)
+
+    def invalidate(self, wiki_id: str, slug: str) -> None:
+        """Forget the ID of a page, e.g. because it has moved."""
+        with self._lock:
+            page_ids = self._wiki_page_ids(wiki_id)
+            if slug not in page_ids:
+                return
+            del page_ids[slug]
+            if self._unwritten is not None:
+                self._unwritten[(wiki_id, slug)] = None
+            else:
+                self.database.delete_page_id(wiki_id, slug)
+
+    @contextmanager
+    def deferred_writes(self, wiki_id: str) -> Iterator[None]:
+        """Context manager in which the cache can be used from other
+        threads, for pages on the given wiki.
+
+        The wiki's IDs are loaded before the context is entered. Changes
+        made in the context are only written to the database once it
+        exits, from the thread that entered it.
+        """
+        with self._lock:
+            self._wiki_page_ids(wiki_id)
+            self._unwritten = {}
+        try:
+            yield
+        finally:
+            with self._lock:
+                unwritten, self._unwritten = self._unwritten or {}, None
+            for (changed_wiki_id, slug), page_id in unwritten.items():
+                if page_id is None:
+                    self.database.delete_page_id(changed_wiki_id, slug)
+                else:
+                    self.database.store_page_id(changed_wiki_id, slug, page_id)
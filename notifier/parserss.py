@@ -0,0 +1,113 @@
+import logging
+from email.utils import mktime_tz, parsedate_tz
+from typing import Iterable, Iterator, List, Optional, Set
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+import feedparser
+
+from notifier.parsethread import parse_thread_url
+from notifier.types import RssPost
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rss_posts(source: Iterable[bytes]) -> Iterator[RssPost]:
+    """Parse the posts in a forum's new posts RSS feed as it is read.
+
+    :param source: The feed document, in chunks, e.g. as streamed from the
+    response.
+
+    Only each item's GUID and publication date are read. Items are dropped
+    from the tree as soon as they have been parsed, so the tree doesn't
+    grow with the length of the feed. Items that can't be parsed are
+    discarded.
+
+    If the document turns out not to be well-formed XML, e.g. because a
+    post contains a control character, the whole document is parsed again
+    with feedparser, which tolerates that. Posts that were already
+    yielded are not yielded again.
+    """
+    chunks = iter(source)
+    # Kept in case the document has to be parsed again
+    document: List[bytes] = []
+    yielded_post_ids: Set[str] = set()
+    parser = XMLPullParser(events=("start", "end"))
+    # Elements that have been opened but not yet closed
+    open_elements: List[Element] = []
+    try:
+        for data in chunks:
+            document.append(data)
+            parser.feed(data)
+            for post in read_rss_events(parser, open_elements):
+                yielded_post_ids.add(post["post_id"])
+                yield post
+        parser.close()
+        yield from read_rss_events(parser, open_elements)
+    except ParseError as error:
+        logger.warning(
+            "RSS feed is not well-formed, parsing it leniently %s",
+            {"reason": repr(error)},
+        )
+        document.extend(chunks)
+        for post in parse_rss_posts_leniently(b"".join(document)):
+            if post["post_id"] not in yielded_post_ids:
+                yield post
+
+
+def parse_rss_posts_leniently(document: bytes) -> Iterator[RssPost]:
+    """Parse the posts in a forum's new posts RSS feed with feedparser,
+    which reads what it can from documents that aren't well-formed."""
+    for entry in feedparser.parse(document)["entries"]:
+        post = parse_rss_fields(
+            entry.get("id", ""), entry.get("published", "")
+        )
+        if post is not None:
+            yield post
+
+
+def read_rss_events(
+    parser: XMLPullParser, open_elements: List[Element]
+) -> Iterator[RssPost]:
+    """Parse the items that have been completed in a partly-read feed."""
+    for event, element in parser.read_events():
+        if event == "start":
+            open_elements.append(element)
+            continue
+        open_elements.pop()
+        if element.tag != "item":
+            continue
+        post = parse_rss_item(element)
+        if len(open_elements) > 0:
+            open_elements[-1].remove(element)
+        if post is not None:
+            yield post
+
+
+def parse_rss_item(item: Element) -> Optional[RssPost]:
+    """Extract basic info about a post from an RSS item."""
+    return parse_rss_fields(
+        item.findtext("guid") or "", item.findtext("pubDate") or ""
+    )
+
+
+def parse_rss_fields(guid: str, pub_date: str) -> Optional[RssPost]:
+    """Extract basic info about a post from an RSS item's GUID and
+    publication date."""
+    guid = guid.strip()
+    posted_date = parsedate_tz(pub_date.strip())
+    try:
+        thread_post_ids = parse_thread_url(guid)
+    except ValueError:
+        thread_post_ids = None
+    if (
+        thread_post_ids is None
+        or thread_post_ids["post_id"] is None
+        or posted_date is None
+    ):
+        logger.warning("Could not parse RSS item %s", {"guid": guid})
+        return None
+    return {
+        "thread_id": thread_post_ids["thread_id"],
+        "post_id": thread_post_ids["post_id"],
+        "posted_timestamp": mktime_tz(posted_date),
+    }
@@ -1,14 +1,42 @@
+import importlib.util
 import logging
 import re
-from typing import Iterable, List, Optional, Tuple, Union, cast
+from typing import Iterable, List, Optional, Tuple, TypedDict, Union, cast
 
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 
-from notifier.types import RawPost, RawThreadMeta
+from notifier.types import (
+    ListedThread,
+    RawPost,
+    RawThreadMeta,
+    RssPost,
+    ThreadPagePost,
+)
 
 logger = logging.getLogger(__name__)
 
+# Parsers that can build soup, fastest first. lxml's parser is a C
+# extension, so builds trees faster than Python's built-in one; both read
+# the same posts from the thread pages in tests/thread_pages
+HTML_PARSERS = ["lxml", "html.parser"]
+
+
+def default_html_parser() -> str:
+    """The fastest HTML parser that is installed."""
+    if importlib.util.find_spec("lxml") is not None:
+        return "lxml"
+    return "html.parser"
+
+
+def make_soup(markup: str, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parse HTML returned by Wikidot.
+
+    :param parser: The name of the parser for BeautifulSoup to use. If not
+    given, lxml is used if it's installed, else Python's built-in parser.
+    """
+    return BeautifulSoup(markup, parser or default_html_parser())
+
 
 def parse_thread_meta(thread: Tag) -> RawThreadMeta:
     """Parse the meta info of a thread to return forum category ID, category name, and thread title.
@@ -55,11 +83,30 @@ def parse_thread_page(thread_id: str, thread_page: Tag) -> List[RawPost]:
     parental relationships. Posts that are invalid for any reason are
     discarded.
     """
+    return [
+        parse_post(thread_id, page_post, post)
+        for page_post, post in index_thread_page(thread_id, thread_page)
+    ]
+
+
+def index_thread_page(
+    thread_id: str, thread_page: Tag
+) -> List[Tuple[ThreadPagePost, Tag]]:
+    """Find the posts on a page of a soupy thread, reading only where each
+    one sits in the thread.
+
+    :param thread_id: The ID of the thread.
+    :param thread_page: A page of that thread, as soup. Expected to start
+    at .thread-container-posts or higher.
+
+    Returns a list of tuples, in page order, of each post's position and
+    the .post element to parse the rest of it from with parse_post.
+    """
     # Wikidot posts are stored in #fpc-000.post-container, and inside that
     # is #post-000.post, where '000' is the numeric ID of the post.
     # The .post-container also contains the containers for any posts that
     # are replies to that post.
-    raw_posts: List[RawPost] = []
+    page_posts: List[Tuple[ThreadPagePost, Tag]] = []
     # Find all posts containers in the thread
     post_containers = cast(
         Iterable[Tag], thread_page.find_all(class_="post-container")
@@ -68,10 +115,6 @@ def parse_thread_page(thread_id: str, thread_page: Tag) -> List[RawPost]:
         parent_post_id = None
         post = None
         post_id = None
-        author_id = None
-        author_name = None
-        post_title = None
-        post_snippet = None
 
         try:
             parent_post_id = get_post_parent_id(post_container)
@@ -83,17 +126,6 @@ def parse_thread_page(thread_id: str, thread_page: Tag) -> List[RawPost]:
             # avoid accidentally picking up users and timestamps from the post
             # body
             post_info = cast(Tag, post.find(class_="info"))
-            post_author_nametag = cast(Tag, post_info.find(class_="printuser"))
-            author_id, author_name = get_user_from_nametag(post_author_nametag)
-
-            # Handle deleted/anonymous users by setting their info to an empty
-            # string, and deal with it down the line
-            if author_id is None:
-                author_id = ""
-            if author_name is None:
-                # Wikidot accepts 'Anonymous' as a null value to [[user]] syntax
-                author_name = "Anonymous"
-
             posted_timestamp = get_timestamp(post_info)
             if posted_timestamp is None:
                 logger.warning(
@@ -108,22 +140,15 @@ def parse_thread_page(thread_id: str, thread_page: Tag) -> List[RawPost]:
                 # notification, however, it must still be recorded to preserve
                 # parent post relationships
                 posted_timestamp = 0
-
-            post_title = (
-                cast(Tag, post.find(class_="title")).get_text().strip()
-            )
-            post_snippet = make_post_snippet(post)
-            raw_posts.append(
-                {
-                    "id": post_id,
-                    "thread_id": thread_id,
-                    "parent_post_id": parent_post_id,
-                    "posted_timestamp": posted_timestamp,
-                    "title": post_title,
-                    "snippet": post_snippet,
-                    "user_id": author_id,
-                    "username": author_name,
-                }
+            page_posts.append(
+                (
+                    {
+                        "id": post_id,
+                        "parent_post_id": parent_post_id,
+                        "posted_timestamp": posted_timestamp,
+                    },
+                    post,
+                )
             )
         except Exception as error:
             logger.error(
@@ -132,16 +157,155 @@ def parse_thread_page(thread_id: str, thread_page: Tag) -> List[RawPost]:
                     "thread_id": thread_id,
                     "post_id": post_id,
                     "parent_post_id": parent_post_id,
-                    "author_id": author_id,
-                    "author_name": author_name,
-                    "title": post_title,
-                    "snippet": post_snippet,
                     "post": post,
                 },
                 exc_info=error,
             )
             raise
-    return raw_posts
+    return page_posts
+
+
+def parse_post(
+    thread_id: str, page_post: ThreadPagePost, post: Tag
+) -> RawPost:
+    """Parse the rest of a post found on a thread page.
+
+    :param thread_id: The ID of the thread.
+    :param page_post: Where the post sits in the thread.
+    :param post: The post's .post element.
+    """
+    author_id = None
+    author_name = None
+    post_title = None
+    post_snippet = None
+    try:
+        post_info = cast(Tag, post.find(class_="info"))
+        post_author_nametag = cast(Tag, post_info.find(class_="printuser"))
+        author_id, author_name = get_user_from_nametag(post_author_nametag)
+
+        # Handle deleted/anonymous users by setting their info to an empty
+        # string, and deal with it down the line
+        if author_id is None:
+            author_id = ""
+        if author_name is None:
+            # Wikidot accepts 'Anonymous' as a null value to [[user]] syntax
+            author_name = "Anonymous"
+
+        post_title = cast(Tag, post.find(class_="title")).get_text().strip()
+        post_snippet = make_post_snippet(post)
+        return {
+            "id": page_post["id"],
+            "thread_id": thread_id,
+            "parent_post_id": page_post["parent_post_id"],
+            "posted_timestamp": page_post["posted_timestamp"],
+            "title": post_title,
+            "snippet": post_snippet,
+            "user_id": author_id,
+            "username": author_name,
+        }
+    except Exception as error:
+        logger.error(
+            "Could not parse post %s",
+            {
+                "thread_id": thread_id,
+                "post_id": page_post["id"],
+                "parent_post_id": page_post["parent_post_id"],
+                "author_id": author_id,
+                "author_name": author_name,
+                "title": post_title,
+                "snippet": post_snippet,
+                "post": post,
+            },
+            exc_info=error,
+        )
+        raise
+
+
+def parse_recent_posts(module_result: Tag) -> List[RssPost]:
+    """Parse the posts listed by the ForumRecentPostsModule.
+
+    :param module_result: The output of the module, as soup.
+
+    Each post's title links to the post within its thread, which gives
+    the IDs of both. Posts that can't be parsed are discarded.
+    """
+    recent_posts: List[RssPost] = []
+    for post in cast(Iterable[Tag], module_result.find_all(class_="post")):
+        match = None
+        for link in cast(Iterable[Tag], post.find_all("a")):
+            match = re.search(
+                r"/(t-[0-9]+)(?:/[^#]*)?#(post-[0-9]+)",
+                link.get_attribute_list("href")[0] or "",
+            )
+            if match:
+                break
+        posted_timestamp = get_timestamp(post)
+        if match is None or posted_timestamp is None:
+            logger.warning(
+                "Could not parse recent post %s",
+                {"post_id": post.get_attribute_list("id")[0]},
+            )
+            continue
+        recent_posts.append(
+            {
+                "thread_id": match[1],
+                "post_id": match[2],
+                "posted_timestamp": posted_timestamp,
+            }
+        )
+    return recent_posts
+
+
+def parse_forum_categories(module_result: Tag) -> List[str]:
+    """Parse the IDs of the categories listed by the ForumStartModule, in
+    the order they're listed.
+
+    :param module_result: The output of the module, as soup.
+    """
+    category_ids: List[str] = []
+    for link in cast(Iterable[Tag], module_result.find_all("a")):
+        match = re.search(
+            r"/forum/(c-[0-9]+)", link.get_attribute_list("href")[0] or ""
+        )
+        if match and match[1] not in category_ids:
+            category_ids.append(match[1])
+    return category_ids
+
+
+def parse_category_threads(module_result: Tag) -> List[ListedThread]:
+    """Parse the threads listed by the ForumViewCategoryModule.
+
+    :param module_result: The output of the module, as soup.
+
+    Each thread is listed as a table row containing a link to the thread
+    and the dates it was started and last posted in. Rows that can't be
+    parsed are discarded.
+    """
+    threads: List[ListedThread] = []
+    for row in cast(Iterable[Tag], module_result.find_all("tr")):
+        match = None
+        for link in cast(Iterable[Tag], row.find_all("a")):
+            match = re.search(
+                r"/forum/(t-[0-9]+)", link.get_attribute_list("href")[0] or ""
+            )
+            if match:
+                break
+        # The last date in the row is that of the latest post
+        timestamps = [
+            timestamp
+            for timestamp in (
+                get_timestamp(cell)
+                for cell in cast(Iterable[Tag], row.find_all("td"))
+                if cell.find(class_="odate") is not None
+            )
+            if timestamp is not None
+        ]
+        if match is None or len(timestamps) == 0:
+            continue
+        threads.append(
+            {"thread_id": match[1], "last_post_timestamp": max(timestamps)}
+        )
+    return threads
 
 
 def make_post_snippet(post: Tag) -> str:
@@ -233,7 +397,9 @@ def get_timestamp(element: Tag) -> Optional[int]:
     return posted_timestamp
 
 
-def count_pages(module_result: Union[str, Tag]) -> Tuple[int, Optional[int]]:
+def count_pages(
+    module_result: Union[str, Tag], parser: Optional[str] = None
+) -> Tuple[int, Optional[int]]:
     """Counts the pages in a Wikidot module and gets the current page.
 
     Takes the HTML (as text or soup) of the output of any module that can return with a pager, and reads the text of the last page button to get the page number. The current page is 1-indexed.
@@ -243,10 +409,13 @@ def count_pages(module_result: Union[str, Tag]) -> Tuple[int, Optional[int]]:
 
     This process only works for modules that return pagers of a fixed length (the only one that I know of that does not do this is page history).
 
+    :param parser: The HTML parser to use if the output is text. See
+    `make_soup`.
+
     Returns a tuple of the number of pages and the current page.
     """
     if isinstance(module_result, str):
-        module_result = BeautifulSoup(module_result, "html.parser")
+        module_result = make_soup(module_result, parser)
 
     page_count = 1
     current_page = None
@@ -271,3 +440,20 @@ def count_pages(module_result: Union[str, Tag]) -> Tuple[int, Optional[int]]:
                 continue
 
     return page_count, current_page
+
+
+ThreadPostIds = TypedDict(
+    "ThreadPostIds", {"thread_id": str, "post_id": Union[str, None]}
+)
+
+
+def parse_thread_url(
+    url: str,
+) -> ThreadPostIds:
+    """Parses a URL to a thread ID and optionally a post ID."""
+    pattern = re.compile(r"(t-[0-9]+)(?:.*#(post-[0-9]+))?")
+    match = pattern.search(url)
+    if not match:
+        raise ValueError("Thread URL does not match expected pattern")
+    thread_id, post_id = match.groups()
+    return {"thread_id": thread_id, "post_id": post_id}
@@ -0,0 +1,121 @@
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from notifier.types import WikidotRequestStats
+
+
+@dataclass
+class _Counters:
+    """Running totals for one kind of request to one wiki."""
+
+    latencies_s: List[float] = field(default_factory=list)
+    error_count: int = 0
+    retry_count: int = 0
+    skipped_count: int = 0
+    response_bytes: int = 0
+    sleep_s: float = 0.0
+
+    def merge(self, other: "_Counters") -> None:
+        """Add another set of counters to this one."""
+        self.latencies_s.extend(other.latencies_s)
+        self.error_count += other.error_count
+        self.retry_count += other.retry_count
+        self.skipped_count += other.skipped_count
+        self.response_bytes += other.response_bytes
+        self.sleep_s += other.sleep_s
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of some already sorted values."""
+    if len(sorted_values) == 0:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class RequestStats:
+    """Statistics about requests made to Wikidot, kept per kind of request
+    (the module name, or e.g. 'login') and per wiki.
+
+    Safe to record to from several threads at once.
+    """
+
+    def __init__(self) -> None:
+        self._counters: Dict[Tuple[str, str], _Counters] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, wiki_id: str) -> _Counters:
+        """Must hold the lock."""
+        return self._counters.setdefault((kind, wiki_id), _Counters())
+
+    def record_request(
+        self,
+        kind: str,
+        wiki_id: str,
+        latency_s: float,
+        response_bytes: int = 0,
+        *,
+        error: bool = False,
+    ) -> None:
+        """Record a request having been made.
+
+        :param error: Whether the request failed, e.g. with a connection
+        error or a 5xx.
+        """
+        with self._lock:
+            counters = self._get(kind, wiki_id)
+            counters.latencies_s.append(latency_s)
+            counters.response_bytes += response_bytes
+            if error:
+                counters.error_count += 1
+
+    def record_retry(self, kind: str, wiki_id: str) -> None:
+        """Record that a request is being retried."""
+        with self._lock:
+            self._get(kind, wiki_id).retry_count += 1
+
+    def record_skip(self, kind: str, wiki_id: str) -> None:
+        """Record that a request was not made because the wiki has been
+        failing."""
+        with self._lock:
+            self._get(kind, wiki_id).skipped_count += 1
+
+    def record_sleep(self, kind: str, wiki_id: str, sleep_s: float) -> None:
+        """Record time spent waiting before retrying a request."""
+        with self._lock:
+            self._get(kind, wiki_id).sleep_s += sleep_s
+
+    def summarise(self, *, by_wiki: bool = True) -> List[WikidotRequestStats]:
+        """Summarise the statistics.
+
+        :param by_wiki: Whether to keep each wiki separate. If false, the
+        statistics for each kind of request are totalled across all wikis.
+        """
+        with self._lock:
+            grouped: Dict[Tuple[str, Optional[str]], _Counters] = {}
+            for (kind, wiki), counters in self._counters.items():
+                grouped.setdefault(
+                    (kind, wiki if by_wiki else None), _Counters()
+                ).merge(counters)
+        summaries: List[WikidotRequestStats] = []
+        for (kind, wiki_id), counters in sorted(
+            grouped.items(), key=lambda item: (item[0][0], item[0][1] or "")
+        ):
+            latencies = sorted(counters.latencies_s)
+            summaries.append(
+                {
+                    "kind": kind,
+                    "wiki_id": wiki_id,
+                    "request_count": len(latencies),
+                    "error_count": counters.error_count,
+                    "retry_count": counters.retry_count,
+                    "skipped_count": counters.skipped_count,
+                    "response_bytes": counters.response_bytes,
+                    "sleep_s": round(counters.sleep_s, 3),
+                    "latency_p50_s": round(percentile(latencies, 0.5), 3),
+                    "latency_p90_s": round(percentile(latencies, 0.9), 3),
+                    "latency_max_s": round(percentile(latencies, 1), 3),
+                }
+            )
+        return summaries
@@ -0,0 +1,132 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+    Union,
+)
+
+from notifier.wikidot import Wikidot
+
+logger = logging.getLogger(__name__)
+
+
+class TagFlushReport(TypedDict):
+    """Summary of the writes made when flushing a tag update queue."""
+
+    requested_count: int
+    coalesced_count: int
+    skipped_count: int
+    written_count: int
+    failed_count: int
+
+
+def parse_tags(tags: Union[str, Iterable[str]]) -> FrozenSet[str]:
+    """Normalises a tag string or collection of tags to a set."""
+    if isinstance(tags, str):
+        tags = tags.split(" ")
+    return frozenset(tag for tag in tags if tag != "")
+
+
+class TagUpdateQueue:
+    """Collects tag updates for pages on a wiki so that they can be written
+    together after the work that prompted them is done.
+
+    Only the last requested tags for each page are kept. When flushed,
+    pages whose final tags are the same as their tags when first observed
+    are not written at all.
+    """
+
+    def __init__(self, wiki_id: str):
+        self.wiki_id = wiki_id
+        # Maps slug to the page's originally observed tags and its desired
+        # tags
+        self._updates: Dict[str, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        self._requested_count = 0
+
+    def __len__(self) -> int:
+        return len(self._updates)
+
+    def set_tags(
+        self,
+        slug: str,
+        observed_tags: Union[str, Iterable[str]],
+        desired_tags: Union[str, Iterable[str]],
+    ) -> None:
+        """Request that a page's tags be set.
+
+        :param slug: The slug of the page.
+        :param observed_tags: The page's current tags, as last seen. If the
+        page already has a pending update, this is ignored in favour of
+        what was observed first.
+        :param desired_tags: The tags that the page should have.
+        """
+        self._requested_count += 1
+        observed, _ = self._updates.get(
+            slug, (parse_tags(observed_tags), frozenset())
+        )
+        self._updates[slug] = (observed, parse_tags(desired_tags))
+
+    def pending(self) -> List[Tuple[str, str]]:
+        """Get the writes that flushing the queue would make, as pairs of
+        slug and tag string."""
+        return [
+            (slug, " ".join(sorted(desired)))
+            for slug, (observed, desired) in self._updates.items()
+            if observed != desired
+        ]
+
+    def flush(self, wikidot: Wikidot) -> TagFlushReport:
+        """Write all pending tag updates concurrently and empty the queue.
+
+        A failure to write one page's tags is logged and does not prevent
+        the others from being written.
+        """
+        writes = self.pending()
+        report: TagFlushReport = {
+            "requested_count": self._requested_count,
+            "coalesced_count": self._requested_count - len(self._updates),
+            "skipped_count": len(self._updates) - len(writes),
+            "written_count": 0,
+            "failed_count": 0,
+        }
+        self._updates = {}
+        self._requested_count = 0
+        if len(writes) == 0:
+            return report
+
+        def write(slug: str, tags: str) -> Optional[Exception]:
+            try:
+                wikidot.set_tags(self.wiki_id, slug, tags)
+            except Exception as error:
+                return error
+            return None
+
+        # The connection's request slots limit how many are made at once.
+        # Page IDs found along the way are stored from this thread, which
+        # owns the database connection, once all the writes are done
+        with wikidot.deferring_page_id_writes(self.wiki_id):
+            with ThreadPoolExecutor(
+                max_workers=wikidot.concurrency_limit,
+                thread_name_prefix="tags",
+            ) as executor:
+                results = list(
+                    executor.map(lambda update: write(*update), writes)
+                )
+
+        for (slug, tags), result in zip(writes, results):
+            if result is not None:
+                report["failed_count"] += 1
+                logger.error(
+                    "Failed to set page tags %s",
+                    {"wiki_id": self.wiki_id, "slug": slug, "tags": tags},
+                    exc_info=result,
+                )
+            else:
+                report["written_count"] += 1
+        return report
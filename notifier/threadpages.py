@@ -0,0 +1,264 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, KeysView, List, Optional, Tuple, TypedDict, Union
+
+from bs4.element import Tag
+
+from notifier.parsethread import (
+    index_thread_page,
+    parse_post,
+    parse_thread_meta,
+)
+from notifier.types import RawPost, RawThreadMeta, ThreadPagePost
+
+# Wiki ID, thread ID, page number
+ThreadPageKey = Tuple[str, str, int]
+
+
+class ThreadPage:
+    """A downloaded page of a forum thread, with its posts indexed by ID.
+
+    Where each post sits in the thread is read when the page is parsed,
+    but the rest of a post is only parsed the first time it's asked for, so
+    that finding a few posts on a long page doesn't mean parsing all of
+    them. Until then, an unparsed post holds on to its part of the soup.
+
+    Safe to use from several threads at once.
+    """
+
+    def __init__(
+        self,
+        thread_id: str,
+        meta: RawThreadMeta,
+        posts: List[Tuple[ThreadPagePost, Union[Tag, RawPost]]],
+    ):
+        """
+        :param posts: Each post on the page, in order, with either its
+        .post element or the post already parsed.
+        """
+        self.thread_id = thread_id
+        self.meta = meta
+        self.index: List[ThreadPagePost] = [
+            page_post for page_post, _ in posts
+        ]
+        # The ID of the post that each post replies to
+        self.parent_post_ids: Dict[str, Optional[str]] = {
+            page_post["id"]: page_post["parent_post_id"]
+            for page_post in self.index
+        }
+        self._page_posts = {
+            page_post["id"]: page_post for page_post in self.index
+        }
+        self._unparsed: Dict[str, Tag] = {}
+        self._parsed: Dict[str, RawPost] = {}
+        for page_post, post in posts:
+            if isinstance(post, Tag):
+                self._unparsed[page_post["id"]] = post
+            else:
+                self._parsed[page_post["id"]] = post
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_soup(cls, thread_id: str, thread_page: Tag) -> "ThreadPage":
+        """Parse a page of a thread.
+
+        :param thread_page: The page, as soup. Expected to start at
+        .forum-thread-box, which is what the ForumViewThreadModule returns.
+        """
+        return cls(
+            thread_id,
+            parse_thread_meta(thread_page),
+            list(index_thread_page(thread_id, thread_page)),
+        )
+
+    @classmethod
+    def from_posts(
+        cls, thread_id: str, meta: RawThreadMeta, posts: List[RawPost]
+    ) -> "ThreadPage":
+        """Make a page from posts that have already been parsed."""
+        return cls(
+            thread_id,
+            meta,
+            [
+                (
+                    {
+                        "id": post["id"],
+                        "parent_post_id": post["parent_post_id"],
+                        "posted_timestamp": post["posted_timestamp"],
+                    },
+                    post,
+                )
+                for post in posts
+            ],
+        )
+
+    @property
+    def page_number(self) -> Optional[int]:
+        """The number of this page in the thread, if it can be told."""
+        if self.meta["current_page"] is None and self.meta["page_count"] == 1:
+            return 1
+        return self.meta["current_page"]
+
+    @property
+    def post_ids(self) -> KeysView[str]:
+        """The IDs of the posts on the page."""
+        return self.parent_post_ids.keys()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, post_id: object) -> bool:
+        return post_id in self.parent_post_ids
+
+    def get(self, post_id: Optional[str]) -> Optional[RawPost]:
+        """Get a post on the page, parsing it if it hasn't been already.
+        Returns None if the post isn't on the page."""
+        if post_id is None or post_id not in self._page_posts:
+            return None
+        with self._lock:
+            post = self._parsed.get(post_id)
+            if post is None:
+                post = parse_post(
+                    self.thread_id,
+                    self._page_posts[post_id],
+                    self._unparsed[post_id],
+                )
+                self._parsed[post_id] = post
+                # The post's part of the soup is no longer needed
+                del self._unparsed[post_id]
+            return post
+
+    def parent(self, post_id: str) -> Optional[RawPost]:
+        """Get the post that a post on the page replies to, if that post is
+        on the page too."""
+        return self.get(self.parent_post_ids.get(post_id))
+
+    def first_post(self) -> Optional[RawPost]:
+        """Get the first post on the page, if there are any."""
+        if len(self.index) == 0:
+            return None
+        return self.get(self.index[0]["id"])
+
+    @property
+    def posts(self) -> List[RawPost]:
+        """Every post on the page, in order, all parsed."""
+        return [
+            post
+            for post in (self.get(page_post["id"]) for page_post in self.index)
+            if post is not None
+        ]
+
+
+class ThreadPageCacheReport(TypedDict):
+    """Summary of how useful the thread page cache has been."""
+
+    hit_count: int
+    miss_count: int
+    cached_page_count: int
+
+
+class ThreadPageCache:
+    """Bounded cache of parsed thread pages, so that a page needed more
+    than once in an activation (e.g. for a new post, then for its thread's
+    context, then to check the post for deletion) is only downloaded once.
+
+    Pages are keyed by wiki, thread and page number, and can also be found
+    by the ID of any post on them. The least recently used page is dropped
+    when the cache is full.
+
+    Cached pages are shared between callers and must not be modified.
+
+    Safe to use from several threads at once.
+    """
+
+    def __init__(self, max_pages: int):
+        self.max_pages = max_pages
+        self.hit_count = 0
+        self.miss_count = 0
+        self._pages: "OrderedDict[ThreadPageKey, ThreadPage]" = OrderedDict()
+        # Maps wiki ID and post ID to the page containing that post
+        self._post_pages: Dict[Tuple[str, str], ThreadPageKey] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        wiki_id: str,
+        thread_id: str,
+        containing_post_id: Optional[str] = None,
+    ) -> Optional[ThreadPage]:
+        """Get a cached thread page, if there is one.
+
+        :param containing_post_id: If provided, gets the page that contains
+        this post; if not, gets the first page.
+        """
+        with self._lock:
+            if containing_post_id is None:
+                key: Optional[ThreadPageKey] = (wiki_id, thread_id, 1)
+            else:
+                key = self._post_pages.get((wiki_id, containing_post_id))
+            page = None if key is None else self._pages.get(key)
+            # The post may have moved to another page since this one was
+            # cached, e.g. if an earlier post was deleted
+            if (
+                key is None
+                or page is None
+                or key[1] != thread_id
+                or (
+                    containing_post_id is not None
+                    and containing_post_id not in page.post_ids
+                )
+            ):
+                self.miss_count += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hit_count += 1
+            return page
+
+    def store(
+        self,
+        wiki_id: str,
+        thread_id: str,
+        page: ThreadPage,
+        *,
+        first_page: bool = False,
+    ) -> None:
+        """Cache a thread page.
+
+        :param first_page: Whether the page was requested as the first page
+        of the thread, rather than as the one containing a post.
+
+        Pages whose number can't be determined and pages with no posts
+        are not cached.
+        """
+        page_number = page.page_number
+        if page_number is None and first_page:
+            page_number = 1
+        if page_number is None or len(page) == 0:
+            return
+        key = (wiki_id, thread_id, page_number)
+        with self._lock:
+            replaced_page = self._pages.pop(key, None)
+            if replaced_page is not None:
+                self._unindex(key, replaced_page)
+            self._pages[key] = page
+            for post_id in page.post_ids:
+                self._post_pages[(wiki_id, post_id)] = key
+            while len(self._pages) > self.max_pages:
+                self._unindex(*self._pages.popitem(last=False))
+
+    def _unindex(self, key: ThreadPageKey, page: ThreadPage) -> None:
+        """Forget which posts a page that is no longer cached contains.
+        Must be called with the lock held."""
+        for post_id in page.post_ids:
+            post_key = (key[0], post_id)
+            if self._post_pages.get(post_key) == key:
+                del self._post_pages[post_key]
+
+    def report(self) -> ThreadPageCacheReport:
+        """Summarise the cache's usage."""
+        with self._lock:
+            return {
+                "hit_count": self.hit_count,
+                "miss_count": self.miss_count,
+                "cached_page_count": len(self._pages),
+            }
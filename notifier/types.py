@@ -31,6 +31,25 @@ class LogDumpS3Config(TypedDict):
     object_key: str
 
 
+class WikidotConfig(TypedDict, total=False):
+    """Optional tuning for the connection to Wikidot."""
+
+    concurrency_limit: int
+    per_wiki_concurrency_limit: int
+    requests_per_second: float
+    request_burst: int
+    pagination_concurrency: int
+    ingestion_concurrency: int
+    ingestion_chunk_size: int
+    backfill_page_limit: int
+    site_url: str
+    html_parser: str
+    breaker_failure_threshold: int
+    breaker_reset_s: float
+    thread_page_cache_size: int
+    thread_prefetch_depth: int
+
+
 class LocalConfig(TypedDict):
     """Contents of the local config file."""
 
@@ -45,6 +64,7 @@ class LocalConfig(TypedDict):
     database: DatabaseConfig
     path: LocalConfigPaths
     log_dump_s3: LogDumpS3Config
+    wikidot: WikidotConfig
 
 
 class SupportedWikiConfig(TypedDict):
@@ -108,6 +128,15 @@ class CachedUserConfig(TypedDict):
     manual_subs: List[Subscription]
 
 
+class SubscribedUser(TypedDict):
+    """A user who may be notified about posts, with just enough of their
+    config to tell which posts."""
+
+    user_id: str
+    last_notified_timestamp: int
+    manual_subs: List[Subscription]
+
+
 class RawThreadMeta(TypedDict):
     """Information about a thread from its header."""
 
@@ -120,6 +149,13 @@ class RawThreadMeta(TypedDict):
     current_page: Optional[int]
 
 
+class ListedThread(TypedDict):
+    """A thread as listed in its forum category."""
+
+    thread_id: str
+    last_post_timestamp: int
+
+
 class RawPost(TypedDict):
     """Information for a single post from remote."""
 
@@ -133,6 +169,15 @@ class RawPost(TypedDict):
     username: str
 
 
+class ThreadPagePost(TypedDict):
+    """Where a post sits on a page of its thread, which can be read without
+    parsing the rest of the post."""
+
+    id: str
+    parent_post_id: Optional[str]
+    posted_timestamp: int
+
+
 class NotifiablePost(TypedDict):
     """Info about a notifiable post to be stored in the database."""
 
@@ -221,6 +266,27 @@ class PostMeta(TypedDict):
     post_id: str
 
 
+class StoredThreadPost(TypedDict):
+    """Where a stored post sits in its thread, for checking it against a
+    downloaded page of the thread."""
+
+    thread_id: str
+    post_id: str
+    posted_timestamp: int
+    parent_post_id: Optional[str]
+
+
+class DownloadedThreadPage(TypedDict):
+    """The posts on a page of a thread that was downloaded during
+    ingestion, which every stored post expected to be on that page is
+    checked against."""
+
+    thread_id: str
+    page_count: int
+    current_page: Optional[int]
+    posts: List[ThreadPagePost]
+
+
 # Email addresses keyed by Wikidot usernames.
 EmailAddresses = Dict[str, str]
 
@@ -234,6 +300,59 @@ class ChannelLogDump(TypedDict, total=False):
     notified_user_count: int
 
 
+class RssValidators(TypedDict):
+    """Validators from a response of a wiki's RSS feed, which can be sent
+    with the next request for it to be skipped if nothing has changed."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class RssPost(TypedDict):
+    """Basic info about a post, as listed in a wiki's RSS feed or its
+    recent posts."""
+
+    thread_id: str
+    post_id: str
+    posted_timestamp: int
+
+
+class DownloadedPosts(TypedDict):
+    """New posts from a wiki and their context, downloaded but not yet
+    stored, and how far through the wiki's posts they go."""
+
+    wiki_id: str
+    categories: List[Context.ForumCategory]
+    threads: List[Context.Thread]
+    parent_posts: List[Context.ParentPost]
+    posts: List[NotifiablePost]
+    latest_post_timestamp: Optional[int]
+    # Only given with the last of a wiki's posts, as the feed can't be
+    # skipped until all of them are stored
+    rss_validators: Optional[RssValidators]
+    # Thread pages downloaded for these posts, to reconcile stored posts
+    # against
+    thread_pages: List[DownloadedThreadPage]
+
+
+class WikidotRequestStats(TypedDict):
+    """Summary of one kind of request made to Wikidot, e.g. calls to one
+    module, on one wiki or totalled across all wikis (null wiki ID)."""
+
+    kind: str
+    wiki_id: Optional[str]
+    request_count: int
+    error_count: int
+    retry_count: int
+    # Requests not made because the wiki had been failing
+    skipped_count: int
+    response_bytes: int
+    sleep_s: float
+    latency_p50_s: float
+    latency_p90_s: float
+    latency_max_s: float
+
+
 class ActivationLogDump(TypedDict, total=False):
     """Structure of public stats per activation."""
 
@@ -245,6 +364,7 @@ class ActivationLogDump(TypedDict, total=False):
     notify_start_timestamp: int
     notify_end_timestamp: int
     end_timestamp: int
+    wikidot_requests: List[WikidotRequestStats]
 
 
 class LogDump(TypedDict):
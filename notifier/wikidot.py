@@ -1,9 +1,13 @@
 import logging
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from json import JSONDecodeError
 from typing import (
     Any,
+    Dict,
     Iterable,
     Iterator,
     List,
@@ -13,23 +17,34 @@ from typing import (
     Union,
     cast,
 )
+from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
 from bs4.element import Tag
 from requests import Response
+from requests.adapters import HTTPAdapter
 
+from notifier.breaker import CircuitBreaker
+from notifier.pacing import RequestPacer
+from notifier.pageids import PageIdCache
+from notifier.parserss import parse_rss_posts
 from notifier.parsethread import (
     count_pages,
     get_user_from_nametag,
-    parse_thread_meta,
-    parse_thread_page,
+    make_soup,
+    parse_category_threads,
+    parse_forum_categories,
+    parse_recent_posts,
 )
+from notifier.requeststats import RequestStats
+from notifier.threadpages import ThreadPage, ThreadPageCache
 from notifier.types import (
     EmailAddresses,
-    RawPost,
-    RawThreadMeta,
+    ListedThread,
+    RssPost,
+    RssValidators,
     SupportedWikiConfig,
+    WikidotConfig,
     WikidotResponse,
 )
 
@@ -71,19 +86,123 @@ class Wikibork(Exception):
     """Indicates that Wikidot is responding but it's having a senior moment."""
 
 
+class WikiUnavailable(Wikibork):
+    """Indicates that a request was not made because the wiki has been
+    failing repeatedly."""
+
+
 class Wikidot:
     """Connection to Wikidot facilitating communications with it."""
 
-    PAGINATION_DELAY_S = 2.0
+    RETRY_DELAY_S = 2.0
     MODULE_ATTEMPT_LIMIT = 3
+    CONCURRENCY_LIMIT = 8
+    PER_WIKI_CONCURRENCY_LIMIT = 2
+    REQUESTS_PER_SECOND = 1.0
+    REQUEST_BURST = 3
+    PAGINATION_CONCURRENCY = 2
+    INGESTION_CONCURRENCY = 4
+    BACKFILL_PAGE_LIMIT = 10
+    INGESTION_CHUNK_SIZE = 50
+    SITE_URL = "http{s}://{wiki_id}.wikidot.com"
+    # None uses lxml if it's installed, else Python's built-in parser
+    HTML_PARSER: Optional[str] = None
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_S = 300.0
+    # Wikidot's own site serves logins, messages and user lookups for
+    # every wiki, so it is never cut off because of a few failing requests
+    BREAKER_EXEMPT_WIKI_IDS = ["www"]
+    THREAD_PAGE_CACHE_SIZE = 500
+    THREAD_PREFETCH_DEPTH = 2
+    RSS_TIMEOUT_S = 30
+    # Bytes of an RSS feed to read and parse at a time
+    RSS_CHUNK_SIZE = 16 * 1024
 
     def __init__(
         self,
         supported_wikis: Optional[List[SupportedWikiConfig]] = None,
         *,
+        options: Optional[WikidotConfig] = None,
+        page_ids: Optional[PageIdCache] = None,
+        request_stats: Optional[RequestStats] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        thread_pages: Optional[ThreadPageCache] = None,
         dry_run: bool = False,
     ):
-        """Connect to Wikidot."""
+        """Connect to Wikidot.
+
+        :param options: Tuning for the connection. Any option that is not
+        specified takes its default from the class.
+        :param page_ids: Cache of page IDs. If not provided, a page's ID is
+        downloaded every time it is needed.
+        :param request_stats: Statistics to record requests to. If not
+        provided, a new set is started.
+        :param breaker: Circuit breaker tracking which wikis are failing.
+        If not provided, a new one is made from the options.
+        :param thread_pages: Cache of downloaded thread pages. If not
+        provided, a new one is made from the options.
+        """
+        if options is None:
+            options = {}
+        self.concurrency_limit = options.get(
+            "concurrency_limit", self.CONCURRENCY_LIMIT
+        )
+        self.per_wiki_concurrency_limit = options.get(
+            "per_wiki_concurrency_limit", self.PER_WIKI_CONCURRENCY_LIMIT
+        )
+        self.pagination_concurrency = options.get(
+            "pagination_concurrency", self.PAGINATION_CONCURRENCY
+        )
+        self.ingestion_concurrency = options.get(
+            "ingestion_concurrency", self.INGESTION_CONCURRENCY
+        )
+        self.ingestion_chunk_size = options.get(
+            "ingestion_chunk_size", self.INGESTION_CHUNK_SIZE
+        )
+        self.backfill_page_limit = options.get(
+            "backfill_page_limit", self.BACKFILL_PAGE_LIMIT
+        )
+        self.thread_prefetch_depth = options.get(
+            "thread_prefetch_depth", self.THREAD_PREFETCH_DEPTH
+        )
+        self._site_url = options.get("site_url", self.SITE_URL)
+        self.html_parser = options.get("html_parser", self.HTML_PARSER)
+        # Requests may be made from several threads at once; these cap how
+        # many are in flight overall and against each wiki
+        self._global_slots = threading.BoundedSemaphore(self.concurrency_limit)
+        self._wiki_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._wiki_slots_lock = threading.Lock()
+        self.pacer = RequestPacer(
+            options.get("requests_per_second", self.REQUESTS_PER_SECOND),
+            options.get("request_burst", self.REQUEST_BURST),
+        )
+
+        self.page_ids = page_ids
+        self.request_stats = (
+            request_stats if request_stats is not None else RequestStats()
+        )
+        self.breaker = (
+            breaker
+            if breaker is not None
+            else CircuitBreaker(
+                options.get(
+                    "breaker_failure_threshold",
+                    self.BREAKER_FAILURE_THRESHOLD,
+                ),
+                options.get("breaker_reset_s", self.BREAKER_RESET_S),
+                exempt_wiki_ids=self.BREAKER_EXEMPT_WIKI_IDS,
+            )
+        )
+        self.thread_pages = (
+            thread_pages
+            if thread_pages is not None
+            else ThreadPageCache(
+                options.get(
+                    "thread_page_cache_size", self.THREAD_PAGE_CACHE_SIZE
+                )
+            )
+        )
+
         self.dry_run = dry_run
         if self.dry_run:
             # Theoretically the session will never be used in a dry run
@@ -91,6 +210,11 @@ class Wikidot:
             self._session = cast(requests.sessions.Session, object())
         else:
             self._session = requests.sessions.Session()
+            # Keep a pooled connection available for each concurrent
+            # request
+            adapter = HTTPAdapter(pool_maxsize=self.concurrency_limit)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
         self.supported_wikis = (
             supported_wikis if supported_wikis is not None else []
         )
@@ -102,6 +226,137 @@ class Wikidot:
                 {"id": "www", "name": "Wikidot", "secure": 1}
             )
 
+    @contextmanager
+    def request_slot(self, wiki_id: str) -> Iterator[None]:
+        """Context manager that holds a request slot for the given wiki.
+
+        Waits for the wiki's host to have request budget, and then until
+        both a per-wiki slot and a global slot are free. The per-wiki slot
+        is taken first so that a request waiting on a busy wiki does not
+        hold up requests to other wikis.
+
+        Time spent inside the context is counted as network time.
+        """
+        self.pacer.wait(f"{wiki_id}.wikidot.com")
+        with self._wiki_slots_lock:
+            wiki_slots = self._wiki_slots.setdefault(
+                wiki_id,
+                threading.BoundedSemaphore(self.per_wiki_concurrency_limit),
+            )
+        with wiki_slots, self._global_slots, self.pacer.measure():
+            yield
+
+    def site_url(self, wiki_id: str, secure: Optional[bool] = None) -> str:
+        """Get the base URL of a wiki, without a trailing slash.
+
+        :param secure: Whether to use HTTPS. If not given, HTTPS is used if
+        the wiki is configured as secure.
+        """
+        if secure is None:
+            secure = any(
+                bool(wiki["secure"])
+                for wiki in self.supported_wikis
+                if wiki["id"] == wiki_id
+            )
+        return self._site_url.format(s="s" if secure else "", wiki_id=wiki_id)
+
+    def forum_feed_url(self, wiki_id: str) -> str:
+        """Get the URL of the RSS feed of a wiki's new forum posts."""
+        # HTTPS for the RSS feed doesn't work for insecure wikis, but HTTP
+        # does work for secure wikis
+        return f"{self.site_url(wiki_id, secure=False)}/feed/forum/posts.xml"
+
+    def forum_feed(
+        self, wiki_id: str, validators: Optional[RssValidators] = None
+    ) -> Tuple[Optional[List[RssPost]], RssValidators]:
+        """Get basic info about the posts in a wiki's new forum posts RSS
+        feed, unless the feed has not changed since the response the given
+        validators came from.
+
+        The feed is parsed as it is read. It is requested once, without
+        retrying; a wiki whose feed fails is polled again next time.
+
+        Returns the posts, or None if the feed has not changed, and the
+        validators to send with the next request for the feed.
+        """
+        if validators is None:
+            validators = {"etag": None, "last_modified": None}
+        headers = {}
+        if validators["etag"] is not None:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"] is not None:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        self.check_available("rss", wiki_id)
+        posts: Optional[List[RssPost]] = None
+        next_validators = validators
+        started = time.monotonic()
+        try:
+            with self.request_slot(wiki_id):
+                started = time.monotonic()
+                with self._session.get(
+                    self.forum_feed_url(wiki_id),
+                    headers=headers,
+                    stream=True,
+                    timeout=self.RSS_TIMEOUT_S,
+                ) as response:
+                    status_code = response.status_code
+                    if status_code != 304 and status_code < 500:
+                        response.raise_for_status()
+                        posts = list(
+                            parse_rss_posts(
+                                response.iter_content(self.RSS_CHUNK_SIZE)
+                            )
+                        )
+                        next_validators = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get(
+                                "Last-Modified"
+                            ),
+                        }
+        except requests.HTTPError:
+            self.request_stats.record_request(
+                "rss", wiki_id, time.monotonic() - started, error=True
+            )
+            raise
+        except requests.RequestException as error:
+            self.request_stats.record_request(
+                "rss", wiki_id, time.monotonic() - started, error=True
+            )
+            self.breaker.record_failure(wiki_id)
+            raise OngoingConnectionError from error
+        self.request_stats.record_request(
+            "rss",
+            wiki_id,
+            time.monotonic() - started,
+            error=status_code >= 500,
+        )
+        if status_code >= 500:
+            logger.warning(
+                "Wikidot internal failure reading RSS feed %s",
+                {"wiki_id": wiki_id, "status_code": status_code},
+            )
+            self.breaker.record_failure(wiki_id)
+            raise Wikibork
+        self.breaker.record_success(wiki_id)
+        return posts, next_validators
+
+    def backoff(self, kind: str, wiki_id: str, delay: float) -> None:
+        """Wait before retrying a request of the given kind."""
+        self.request_stats.record_sleep(kind, wiki_id, delay)
+        self.pacer.backoff(delay)
+
+    def check_available(self, kind: str, wiki_id: str) -> None:
+        """Refuse to make a request of the given kind to a wiki that has
+        been failing, recording it as skipped.
+
+        :raises WikiUnavailable: If the request should not be made.
+        """
+        if self.breaker.allow(wiki_id):
+            return
+        self.request_stats.record_skip(kind, wiki_id)
+        raise WikiUnavailable(wiki_id)
+
     def post(self, url: str, **request_kwargs: Any) -> Response:
         """Make a POST request."""
         if self.dry_run:
@@ -123,16 +378,21 @@ class Wikidot:
             for wiki in self.supported_wikis
             if wiki["id"] == wiki_id
         )
+        site_url = self.site_url(wiki_id, secure)
         # If we're logged in, grab the token7, otherwise make one up
         token7 = self._session.cookies.get(
-            "wikidot_token7", "7777777", domain=f"{wiki_id}.wikidot.com"
+            "wikidot_token7", "7777777", domain=urlparse(site_url).hostname
         )
 
         # Try the module a few times with increasing delay in case it fails
         response = None
         last_error: Optional[requests.ConnectionError] = None
         for attempt_count in range(self.MODULE_ATTEMPT_LIMIT):
-            attempt_delay = 2**attempt_count * self.PAGINATION_DELAY_S
+            attempt_delay = (
+                2**attempt_count * self.RETRY_DELAY_S
+                if attempt_count > 0
+                else 0.0
+            )
             logger.debug(
                 "Trying module connection %s",
                 {
@@ -141,20 +401,31 @@ class Wikidot:
                     "max_attempts": self.MODULE_ATTEMPT_LIMIT,
                 },
             )
-            time.sleep(attempt_delay)
+            self.check_available(module_name, wiki_id)
+            if attempt_count > 0:
+                self.request_stats.record_retry(module_name, wiki_id)
+            if attempt_delay > 0:
+                self.backoff(module_name, wiki_id, attempt_delay)
+            started = time.monotonic()
             try:
-                response_raw = self.post(
-                    "http{}://{}.wikidot.com/ajax-module-connector.php".format(
-                        "s" if secure else "", wiki_id
-                    ),
-                    data=dict(
-                        moduleName=module_name,
-                        wikidot_token7=token7,
-                        **module_kwargs,
-                    ),
-                    cookies={"wikidot_token7": token7},
-                )
+                with self.request_slot(wiki_id):
+                    started = time.monotonic()
+                    response_raw = self.post(
+                        f"{site_url}/ajax-module-connector.php",
+                        data=dict(
+                            moduleName=module_name,
+                            wikidot_token7=token7,
+                            **module_kwargs,
+                        ),
+                        cookies={"wikidot_token7": token7},
+                    )
             except requests.ConnectionError as error:
+                self.request_stats.record_request(
+                    module_name,
+                    wiki_id,
+                    time.monotonic() - started,
+                    error=True,
+                )
                 last_error = error
                 logger.debug(
                     "Module connection failed %s",
@@ -177,6 +448,13 @@ class Wikidot:
                     exc_info=True,
                 )
                 raise
+            self.request_stats.record_request(
+                module_name,
+                wiki_id,
+                time.monotonic() - started,
+                len(response_raw.content or b""),
+                error=response_raw.status_code >= 500,
+            )
 
             if 500 <= response_raw.status_code <= 599:
                 logger.warning(
@@ -188,7 +466,7 @@ class Wikidot:
                         "response_text": response_raw.text,
                     },
                 )
-                time.sleep(10)
+                self.backoff(module_name, wiki_id, 10)
                 continue
 
             try:
@@ -218,13 +496,16 @@ class Wikidot:
                         "max_attempts": self.MODULE_ATTEMPT_LIMIT,
                     },
                 )
-                time.sleep(10)
+                self.backoff(module_name, wiki_id, 10)
                 continue
 
             # Successful response, break to parsing
+            self.breaker.record_success(wiki_id)
             break
         else:
-            # All retries exhausted
+            # All retries exhausted; the request as a whole counts as one
+            # failure, however many attempts it took
+            self.breaker.record_failure(wiki_id)
             if last_error is not None:
                 raise OngoingConnectionError from last_error
             logger.warning(
@@ -306,23 +587,46 @@ class Wikidot:
         )
         first_page = self.module(wiki, module_name, **module_kwargs)
         yield first_page
-        page_count, _ = count_pages(first_page["body"])
+        page_count, _ = count_pages(first_page["body"], self.html_parser)
         # Iterate through the remaining pages
         # Start from the starting index plus one, because the first page
         # was already done
         # End at the final page plus one because range() is head exclusive
         # (this assumes that the index is 1-based)
-        for page_index in range(starting_index + 1, page_count + 1):
-            module_kwargs.update({index_key: page_index * index_increment})
+        remaining_kwargs = [
+            {**module_kwargs, index_key: page_index * index_increment}
+            for page_index in range(starting_index + 1, page_count + 1)
+        ]
+
+        def get_page(page_kwargs: Dict[str, Any]) -> WikidotResponse:
             logger.debug(
                 "Paginated module %s",
                 {
-                    "index": module_kwargs[index_key],
+                    "index": page_kwargs[index_key],
                     "module_name": module_name,
                     "wiki_id": wiki,
                 },
             )
-            yield self.module(wiki, module_name, **module_kwargs)
+            return self.module(wiki, module_name, **page_kwargs)
+
+        if self.pagination_concurrency <= 1 or len(remaining_kwargs) <= 1:
+            for page_kwargs in remaining_kwargs:
+                yield get_page(page_kwargs)
+            return
+
+        # Fetch the remaining pages concurrently, but still yield them in
+        # order; the request slots keep this within the per-wiki limit
+        executor = ThreadPoolExecutor(
+            max_workers=min(
+                self.pagination_concurrency, len(remaining_kwargs)
+            ),
+            thread_name_prefix="wikidot-pages",
+        )
+        try:
+            yield from executor.map(get_page, remaining_kwargs)
+        finally:
+            # If the consumer stops early, don't fetch pages it won't use
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def listpages(
         self, wiki_id: str, *, module_body: str, **module_kwargs: Any
@@ -344,7 +648,7 @@ class Wikidot:
             )
             for soup in cast(
                 Iterable[Tag],
-                BeautifulSoup(page["body"], "html.parser").find_all(
+                make_soup(page["body"], self.html_parser).find_all(
                     class_=listpages_div_class
                 ),
             )
@@ -356,35 +660,92 @@ class Wikidot:
         wiki_id: str,
         thread_id: str,
         containing_post_id: Optional[str] = None,
-    ) -> Tuple[RawThreadMeta, List[RawPost]]:
+    ) -> ThreadPage:
         """Get posts from a page of a wiki thread.
 
         :param wiki_id: The ID of the wiki that contains the thread.
         :param thread_id: The ID of the thread.
         :param post_id: If provided, the thread page will be the one that contains this post; if not, the page will be the first in the thread.
 
-        Returns a tuple with 2 items:
+        Returns the page, with meta info about the thread and the posts on
+        the page indexed by ID. Posts are only fully parsed once asked for.
 
-        1. Meta info about the thread.
-        2. List of posts in this page of the thread.
+        If no post with the given ID is in the thread, a null page is returned (i.e. the page will have no posts).
 
-        If no post with the given ID is in the thread, a null page is returned (i.e. the list of posts will be empty).
+        Pages already downloaded during this activation are returned from the cache.
         """
+        cached_page = self.thread_pages.get(
+            wiki_id, thread_id, containing_post_id
+        )
+        if cached_page is not None:
+            return cached_page
+
         module_kwargs = {"t": thread_id.lstrip("t-")}
         if containing_post_id is not None:
             module_kwargs["postId"] = containing_post_id.lstrip("post-")
 
-        thread_page = BeautifulSoup(
+        thread_page = make_soup(
             self.module(
                 wiki_id,
                 "forum/ForumViewThreadModule",
                 **module_kwargs,
             )["body"],
-            "html.parser",
+            self.html_parser,
+        )
+        page = ThreadPage.from_soup(thread_id, thread_page)
+        self.thread_pages.store(
+            wiki_id, thread_id, page, first_page=containing_post_id is None
+        )
+        return page
+
+    def recent_posts(
+        self, wiki_id: str, page_number: int = 1
+    ) -> Tuple[List[RssPost], int]:
+        """Get a page of the most recent posts in a wiki's forum, newest
+        first.
+
+        Returns a tuple of the posts and the number of pages.
+        """
+        module_result = make_soup(
+            self.module(
+                wiki_id, "forum/ForumRecentPostsModule", pageNo=page_number
+            )["body"],
+            self.html_parser,
+        )
+        return (
+            parse_recent_posts(module_result),
+            count_pages(module_result)[0],
+        )
+
+    def forum_categories(self, wiki_id: str) -> List[str]:
+        """Get the IDs of a wiki's forum categories."""
+        return parse_forum_categories(
+            make_soup(
+                self.module(wiki_id, "forum/ForumStartModule")["body"],
+                self.html_parser,
+            )
+        )
+
+    def category_threads(
+        self, wiki_id: str, category_id: str, page_number: int = 1
+    ) -> Tuple[List[ListedThread], int]:
+        """Get a page of the threads in a forum category, most recently
+        posted in first.
+
+        Returns a tuple of the threads and the number of pages.
+        """
+        module_result = make_soup(
+            self.module(
+                wiki_id,
+                "forum/ForumViewCategoryModule",
+                c=category_id.lstrip("c-"),
+                p=page_number,
+            )["body"],
+            self.html_parser,
         )
         return (
-            parse_thread_meta(thread_page),
-            parse_thread_page(thread_id, thread_page),
+            parse_category_threads(module_result),
+            count_pages(module_result)[0],
         )
 
     def login(self, username: str, password: str) -> None:
@@ -393,7 +754,11 @@ class Wikidot:
 
         last_error: Optional[requests.ConnectionError] = None
         for attempt_count in range(self.MODULE_ATTEMPT_LIMIT):
-            attempt_delay = 2**attempt_count * self.PAGINATION_DELAY_S
+            attempt_delay = (
+                2**attempt_count * self.RETRY_DELAY_S
+                if attempt_count > 0
+                else 0.0
+            )
             logger.debug(
                 "Trying login connection %s",
                 {
@@ -402,18 +767,27 @@ class Wikidot:
                     "max_attempts": self.MODULE_ATTEMPT_LIMIT,
                 },
             )
-            time.sleep(attempt_delay)
+            if attempt_count > 0:
+                self.request_stats.record_retry("login", "www")
+            if attempt_delay > 0:
+                self.backoff("login", "www", attempt_delay)
+            started = time.monotonic()
             try:
-                response = self.post(
-                    "https://www.wikidot.com/default--flow/login__LoginPopupScreen",
-                    data=dict(
-                        login=username,
-                        password=password,
-                        action="Login2Action",
-                        event="login",
-                    ),
-                )
+                with self.request_slot("www"):
+                    started = time.monotonic()
+                    response = self.post(
+                        f"{self.site_url('www', secure=True)}/default--flow/login__LoginPopupScreen",
+                        data=dict(
+                            login=username,
+                            password=password,
+                            action="Login2Action",
+                            event="login",
+                        ),
+                    )
             except requests.ConnectionError as error:
+                self.request_stats.record_request(
+                    "login", "www", time.monotonic() - started, error=True
+                )
                 last_error = error
                 logger.debug(
                     "Login connection failed %s",
@@ -432,6 +806,13 @@ class Wikidot:
                     exc_info=True,
                 )
                 raise
+            self.request_stats.record_request(
+                "login",
+                "www",
+                time.monotonic() - started,
+                len(response.content or b""),
+                error=response.status_code >= 500,
+            )
             if response.status_code >= 500:
                 logger.warning(
                     "Wikibork when logging in %s",
@@ -490,9 +871,9 @@ class Wikidot:
 
         Connection needs to be logged in.
         """
-        contacts = BeautifulSoup(
+        contacts = make_soup(
             self.module("www", "dashboard/messages/DMContactsModule")["body"],
-            "html.parser",
+            self.html_parser,
         )
         # Back contacts are stored in optional table.contact-list-table
         # which immediately follows h2 (there is an optional one
@@ -525,26 +906,58 @@ class Wikidot:
             addresses[username.strip()] = address
         return addresses
 
+    def remember_page_id(self, wiki_id: str, slug: str, page_id: int) -> None:
+        """Record a page ID that was found by other means, so that it need
+        not be downloaded later."""
+        if self.page_ids is not None:
+            self.page_ids.store(wiki_id, slug, page_id)
+
+    def forget_page_id(self, wiki_id: str, slug: str) -> None:
+        """Forget the recorded ID of a page that may no longer be at the
+        given slug."""
+        if self.page_ids is not None:
+            self.page_ids.invalidate(wiki_id, slug)
+
+    @contextmanager
+    def deferring_page_id_writes(self, wiki_id: str) -> Iterator[None]:
+        """Context manager in which pages on the given wiki may be modified
+        from other threads, with any page IDs learned or forgotten only
+        written to the database once it exits."""
+        if self.page_ids is None:
+            yield
+            return
+        with self.page_ids.deferred_writes(wiki_id):
+            yield
+
     def get_page_id(self, wiki_id: str, slug: str) -> int:
+        """Get a page's ID, from the cache if known or otherwise from its
+        source."""
+        if self.page_ids is not None:
+            page_id = self.page_ids.get(wiki_id, slug)
+            if page_id is not None:
+                return page_id
+        page_id = self.download_page_id(wiki_id, slug)
+        self.remember_page_id(wiki_id, slug, page_id)
+        return page_id
+
+    def download_page_id(self, wiki_id: str, slug: str) -> int:
         """Get a page's ID from its source."""
-        try:
-            wiki = next(
-                wiki for wiki in self.supported_wikis if wiki["id"] == wiki_id
-            )
-        except StopIteration as error:
+        if not any(wiki["id"] == wiki_id for wiki in self.supported_wikis):
             raise RuntimeError(
                 f"Cannot access page from unsupported wiki {wiki_id}"
-            ) from error
-        page_url = (
-            "http{}://{}.wikidot.com/{}/norender/true/noredirect/true".format(
-                "s" if wiki["secure"] else "", wiki_id, slug
             )
+        page_url = (
+            f"{self.site_url(wiki_id)}/{slug}/norender/true/noredirect/true"
         )
 
         page_text = None
         last_error: Optional[requests.ConnectionError] = None
         for attempt_count in range(self.MODULE_ATTEMPT_LIMIT):
-            attempt_delay = 2**attempt_count * self.PAGINATION_DELAY_S
+            attempt_delay = (
+                2**attempt_count * self.RETRY_DELAY_S
+                if attempt_count > 0
+                else 0.0
+            )
             logger.debug(
                 "Trying page connection %s",
                 {
@@ -554,10 +967,20 @@ class Wikidot:
                     "max_attempts": self.MODULE_ATTEMPT_LIMIT,
                 },
             )
-            time.sleep(attempt_delay)
+            self.check_available("page", wiki_id)
+            if attempt_count > 0:
+                self.request_stats.record_retry("page", wiki_id)
+            if attempt_delay > 0:
+                self.backoff("page", wiki_id, attempt_delay)
+            started = time.monotonic()
             try:
-                response = self._session.get(page_url)
+                with self.request_slot(wiki_id):
+                    started = time.monotonic()
+                    response = self._session.get(page_url)
             except requests.ConnectionError as error:
+                self.request_stats.record_request(
+                    "page", wiki_id, time.monotonic() - started, error=True
+                )
                 last_error = error
                 logger.debug(
                     "Page connection failed %s",
@@ -580,6 +1003,13 @@ class Wikidot:
                     exc_info=True,
                 )
                 raise
+            self.request_stats.record_request(
+                "page",
+                wiki_id,
+                time.monotonic() - started,
+                len(response.content or b""),
+                error=response.status_code >= 500,
+            )
 
             if response.status_code == 500:
                 logger.warning(
@@ -606,12 +1036,17 @@ class Wikidot:
                 )
                 continue
 
+            self.breaker.record_success(wiki_id)
             page_text = response.text
             break
         else:
+            # All retries exhausted; only a failure of Wikidot's counts
+            # towards the breaker, once for the whole request
             if last_error is not None:
+                self.breaker.record_failure(wiki_id)
                 raise OngoingConnectionError from last_error
             if response.status_code == 500:
+                self.breaker.record_failure(wiki_id)
                 raise Wikibork
             raise OngoingConnectionError
         assert page_text is not None
@@ -649,6 +1084,8 @@ class Wikidot:
             page_id=str(page_id),
             new_name=to_slug,
         )
+        self.forget_page_id(wiki_id, from_slug)
+        self.remember_page_id(wiki_id, to_slug, page_id)
 
     def delete_page(self, wiki_id: str, slug: str) -> None:
         """Deletes a page.
@@ -676,6 +1113,7 @@ class Wikidot:
             event="deletePage",
             page_id=str(page_id),
         )
+        self.forget_page_id(wiki_id, slug)
 
     def set_tags(self, wiki_id: str, slug: str, tags: str) -> None:
         """Sets the tags on a page.
@@ -684,7 +1122,29 @@ class Wikidot:
         to have already observed them.
 
         Connection needs to be logged in.
+
+        If the page's ID was cached and Wikidot rejects it, the cached ID
+        is assumed to be stale and the update is tried once more with a
+        freshly downloaded ID.
         """
+        was_cached = (
+            self.page_ids is not None
+            and self.page_ids.get(wiki_id, slug) is not None
+        )
+        try:
+            self._set_tags(wiki_id, slug, tags)
+        except RuntimeError:
+            if not was_cached:
+                raise
+            logger.warning(
+                "Failed to set tags with cached page ID %s",
+                {"slug": slug, "wiki_id": wiki_id},
+                exc_info=True,
+            )
+            self.forget_page_id(wiki_id, slug)
+            self._set_tags(wiki_id, slug, tags)
+
+    def _set_tags(self, wiki_id: str, slug: str, tags: str) -> None:
         page_id = self.get_page_id(wiki_id, slug)
         logger.debug(
             "Setting page tags %s",
@@ -0,0 +1,109 @@
+"""Compare HTML parsers on forum thread pages.
+
+Each page is parsed into thread meta and posts as Wikidot.thread does,
+once with each parser. Pages are the bodies of ForumViewThreadModule
+responses in tests/thread_pages unless other files are given, or the
+stand-in is asked to generate them:
+
+    python3 -m tests.benchmark_parsers
+    python3 -m tests.benchmark_parsers --repeat 20 recorded/*.html
+    python3 -m tests.benchmark_parsers --threads 20
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from notifier.parsethread import (
+    HTML_PARSERS,
+    make_soup,
+    parse_thread_meta,
+    parse_thread_page,
+)
+from notifier.types import RawPost, RawThreadMeta
+from tests.standin import StandinOptions, World, render_thread
+
+THREAD_PAGES = Path(__file__).parent / "thread_pages"
+
+
+def standin_thread_pages(thread_count: int) -> List[str]:
+    """Generate every page of some of the stand-in's threads."""
+    world = World(
+        StandinOptions(
+            wiki_count=1, threads_per_wiki=thread_count, posts_per_thread=40
+        )
+    )
+    return [
+        render_thread(thread, page)
+        for thread in world.threads.values()
+        for page in range(1, thread.page_count() + 1)
+    ]
+
+
+def parse(
+    thread_page: str, parser: str
+) -> Tuple[RawThreadMeta, List[RawPost]]:
+    """Parse a thread page the way Wikidot.thread does."""
+    soup = make_soup(thread_page, parser)
+    return parse_thread_meta(soup), parse_thread_page("t-0", soup)
+
+
+def benchmark(thread_pages: List[str], repeat: int) -> Dict[str, float]:
+    """Time parsing the pages with each parser, after checking that they
+    all agree. Returns the mean seconds per page for each parser."""
+    for thread_page in thread_pages:
+        expected = parse(thread_page, HTML_PARSERS[-1])
+        for parser in HTML_PARSERS:
+            if parse(thread_page, parser) != expected:
+                raise RuntimeError(f"Parser {parser} disagrees on a page")
+
+    timings = {}
+    for parser in HTML_PARSERS:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for thread_page in thread_pages:
+                parse(thread_page, parser)
+        timings[parser] = (time.perf_counter() - started) / (
+            repeat * len(thread_pages)
+        )
+    return timings
+
+
+def read_command_line_arguments() -> argparse.Namespace:
+    """Reads the benchmark's options from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "recorded",
+        type=Path,
+        nargs="*",
+        help="Files containing thread pages; defaults to those in"
+        f" {THREAD_PAGES}",
+    )
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Use this many stand-in threads instead of files",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = read_command_line_arguments()
+    if args.threads:
+        pages = standin_thread_pages(args.threads)
+    else:
+        pages = [
+            path.read_text(encoding="utf-8")
+            for path in args.recorded or sorted(THREAD_PAGES.glob("*.html"))
+        ]
+    results = benchmark(pages, args.repeat)
+    slowest = max(results.values())
+    print(f"{len(pages)} thread pages, {args.repeat} repeats")
+    for name, seconds in results.items():
+        print(
+            f"{name:>12}: {seconds * 1000:7.2f} ms/page"
+            f" ({slowest / seconds:.1f}x)"
+        )
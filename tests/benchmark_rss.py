@@ -0,0 +1,124 @@
+"""Compare the streaming RSS parser with feedparser on forum post feeds.
+
+Each feed is parsed into posts once with each parser. Feeds are generated
+by the stand-in unless recorded feed/forum/posts.xml documents are given
+as files:
+
+    python3 -m tests.benchmark_rss
+    python3 -m tests.benchmark_rss --repeat 200 recorded/*.xml
+"""
+
+import argparse
+import calendar
+import time
+from operator import itemgetter
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import feedparser
+
+from notifier.parserss import parse_rss_posts
+from notifier.parsethread import parse_thread_url
+from notifier.types import RssPost
+from notifier.wikidot import Wikidot
+from tests.standin import StandinOptions, World, render_rss
+
+
+def standin_feeds(wiki_count: int) -> List[bytes]:
+    """Generate the feeds of some of the stand-in's wikis."""
+    world = World(
+        StandinOptions(
+            wiki_count=wiki_count, threads_per_wiki=10, posts_per_thread=10
+        )
+    )
+    return [render_rss(world, wiki_id).encode() for wiki_id in world.wiki_ids]
+
+
+def parse_with_feedparser(feed: bytes) -> List[RssPost]:
+    """Parse a feed the way new posts were found before the streaming
+    parser."""
+    posts: List[RssPost] = []
+    for entry in feedparser.parse(feed)["entries"]:
+        thread_id, post_id = itemgetter("thread_id", "post_id")(
+            parse_thread_url(entry["id"])
+        )
+        posts.append(
+            {
+                "thread_id": thread_id,
+                "post_id": post_id,
+                "posted_timestamp": calendar.timegm(entry["published_parsed"]),
+            }
+        )
+    return posts
+
+
+def parse_streaming(feed: bytes) -> List[RssPost]:
+    """Parse a feed in chunks as it would arrive from the response."""
+    return list(
+        parse_rss_posts(
+            feed[index : index + Wikidot.RSS_CHUNK_SIZE]
+            for index in range(0, len(feed), Wikidot.RSS_CHUNK_SIZE)
+        )
+    )
+
+
+PARSERS: Dict[str, Callable[[bytes], List[RssPost]]] = {
+    "feedparser": parse_with_feedparser,
+    "streaming": parse_streaming,
+}
+
+
+def benchmark(feeds: List[bytes], repeat: int) -> Dict[str, float]:
+    """Time parsing the feeds with each parser, after checking that they
+    all agree. Returns the mean seconds per feed for each parser."""
+    for feed in feeds:
+        expected = parse_with_feedparser(feed)
+        for name, parse in PARSERS.items():
+            if parse(feed) != expected:
+                raise RuntimeError(f"Parser {name} disagrees on a feed")
+
+    timings = {}
+    for name, parse in PARSERS.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for feed in feeds:
+                parse(feed)
+        timings[name] = (time.perf_counter() - started) / (
+            repeat * len(feeds)
+        )
+    return timings
+
+
+def read_command_line_arguments() -> argparse.Namespace:
+    """Reads the benchmark's options from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "recorded",
+        type=Path,
+        nargs="*",
+        help="Files containing recorded RSS feeds",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--wikis",
+        type=int,
+        default=20,
+        help="Stand-in wikis to use if no feeds are given",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = read_command_line_arguments()
+    if args.recorded:
+        feeds = [path.read_bytes() for path in args.recorded]
+    else:
+        feeds = standin_feeds(args.wikis)
+    results = benchmark(feeds, args.repeat)
+    slowest = max(results.values())
+    print(f"{len(feeds)} feeds, {args.repeat} repeats")
+    for name, seconds in results.items():
+        print(
+            f"{name:>12}: {seconds * 1000:7.2f} ms/feed"
+            f" ({slowest / seconds:.1f}x)"
+        )
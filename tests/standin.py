@@ -0,0 +1,805 @@
+"""Local stand-in for Wikidot, for exercising the notifier end to end
+without contacting wikidot.com.
+
+Serves a synthetic set of wikis, forum threads and user config pages over
+the same endpoints the notifier uses. Every wiki is served from a path
+prefix on one host, so point the notifier at it with the Wikidot site URL
+option, e.g.:
+
+    [wikidot]
+    site_url = "http://127.0.0.1:8787/{wiki_id}"
+
+Run with:
+
+    python3 -m tests.standin --port 8787 --wikis 20 --users 5000
+
+GET /_standin/stats returns a count of requests served by endpoint.
+
+The RSS feed is served with an ETag and answers a matching If-None-Match
+with 304 Not Modified, counted separately as 'rss-not-modified'.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+POSTS_PER_THREAD_PAGE = 10
+RECENT_POSTS_PER_PAGE = 20
+THREADS_PER_CATEGORY_PAGE = 20
+RSS_ITEM_COUNT = 30
+FREQUENCIES = ["hourly", "8hourly", "daily", "weekly", "monthly"]
+
+
+@dataclass
+class StandinOptions:
+    """Shape and behaviour of the stand-in."""
+
+    config_wiki_id: str = "notifications"
+    user_config_category: str = "notify"
+    wiki_config_category: str = "wiki"
+    wiki_count: int = 3
+    categories_per_wiki: int = 3
+    threads_per_wiki: int = 50
+    posts_per_thread: int = 15
+    user_count: int = 100
+    subscriptions_per_user: int = 3
+    # Proportion of posts that are replies to an earlier post
+    reply_rate: float = 0.4
+    # New posts made per second across each wiki while the server runs
+    new_posts_per_wiki_per_s: float = 0.0
+    # Time over which the initial posts are spread, ending now
+    history_s: int = 60 * 60 * 24
+    latency_s: float = 0.0
+    latency_jitter_s: float = 0.0
+    # Proportion of requests that fail with a 500
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class Post:
+    """A forum post."""
+
+    id: int
+    thread_id: int
+    parent_id: Optional[int]
+    user_id: int
+    timestamp: int
+    title: str
+    content: str
+    replies: List["Post"] = field(default_factory=list)
+
+
+@dataclass
+class Thread:
+    """A forum thread."""
+
+    id: int
+    wiki_id: str
+    category_id: int
+    title: str
+    user_id: int
+    timestamp: int
+    posts: List[Post] = field(default_factory=list)
+
+    def top_level_posts(self) -> List[Post]:
+        """Posts that are not replies, in order."""
+        return [post for post in self.posts if post.parent_id is None]
+
+    def page_of_post(self, post_id: int) -> Optional[int]:
+        """The 1-based page that contains the given post."""
+        for index, post in enumerate(self.top_level_posts()):
+            if post_id in (tree_post.id for tree_post in walk(post)):
+                return index // POSTS_PER_THREAD_PAGE + 1
+        return None
+
+    def page_count(self) -> int:
+        """The number of pages in the thread."""
+        return max(1, -(-len(self.top_level_posts()) // POSTS_PER_THREAD_PAGE))
+
+    def last_post_timestamp(self) -> int:
+        """When the thread was last posted in."""
+        return max(
+            (post.timestamp for post in self.posts), default=self.timestamp
+        )
+
+
+@dataclass
+class Page:
+    """A page on a wiki, as seen by ListPages."""
+
+    id: int
+    wiki_id: str
+    category: str
+    name: str
+    title: str
+    user_id: int
+    timestamp: int
+    tags: str
+    form: Dict[str, str]
+
+    @property
+    def fullname(self) -> str:
+        """The slug of the page including its category."""
+        return f"{self.category}:{self.name}"
+
+
+def walk(post: Post) -> Iterator[Post]:
+    """Iterate a post and all replies to it, depth first."""
+    yield post
+    for reply in post.replies:
+        yield from walk(reply)
+
+
+def username(user_id: int) -> str:
+    """The name of a synthetic user."""
+    return f"standin-user-{user_id}"
+
+
+class World:
+    """Synthetic wikis and their content."""
+
+    def __init__(self, options: StandinOptions):
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.started = int(time.time())
+        self.last_advanced = time.monotonic()
+        self.wiki_ids = [
+            f"standin-wiki-{index + 1}" for index in range(options.wiki_count)
+        ]
+        self.threads: Dict[int, Thread] = {}
+        self.posts: Dict[int, Post] = {}
+        self.pages: Dict[Tuple[str, str], Page] = {}
+        self._next_id = 1000
+        self._build()
+
+    def _id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _build(self) -> None:
+        options = self.options
+        start = self.started - options.history_s
+        for wiki_id in self.wiki_ids:
+            for _ in range(options.threads_per_wiki):
+                thread_timestamp = self.random.randint(start, self.started)
+                thread = Thread(
+                    id=self._id(),
+                    wiki_id=wiki_id,
+                    category_id=self.random.randint(
+                        1, options.categories_per_wiki
+                    ),
+                    title="",
+                    user_id=self.random.randint(1, options.user_count),
+                    timestamp=thread_timestamp,
+                )
+                thread.title = f"Thread {thread.id}"
+                self.threads[thread.id] = thread
+                for post_timestamp in sorted(
+                    self.random.randint(thread_timestamp, self.started)
+                    for _ in range(options.posts_per_thread)
+                ):
+                    self.add_post(thread, post_timestamp)
+
+        # The config wiki lists each wiki and each user
+        for wiki_id in self.wiki_ids:
+            self._add_page(
+                options.config_wiki_id,
+                options.wiki_config_category,
+                wiki_id,
+                wiki_id,
+                1,
+                {"id": wiki_id, "secure": "0"},
+            )
+        thread_ids = list(self.threads)
+        for user_id in range(1, options.user_count + 1):
+            subscriptions = "\n".join(
+                f"http://{self.threads[thread_id].wiki_id}.wikidot.com/forum/t-{thread_id}"
+                for thread_id in self.random.sample(
+                    thread_ids,
+                    min(options.subscriptions_per_user, len(thread_ids)),
+                )
+            )
+            self._add_page(
+                options.config_wiki_id,
+                options.user_config_category,
+                str(user_id),
+                username(user_id),
+                user_id,
+                {
+                    "frequency": self.random.choice(FREQUENCIES),
+                    "language": "en",
+                    "method": "pm",
+                    "subscriptions": subscriptions,
+                    "unsubscriptions": "",
+                },
+            )
+
+    def _add_page(
+        self,
+        wiki_id: str,
+        category: str,
+        name: str,
+        title: str,
+        user_id: int,
+        form: Dict[str, str],
+    ) -> None:
+        page = Page(
+            id=self._id(),
+            wiki_id=wiki_id,
+            category=category,
+            name=name,
+            title=title,
+            user_id=user_id,
+            timestamp=self.started - self.options.history_s,
+            tags="",
+            form=form,
+        )
+        self.pages[(wiki_id, page.fullname)] = page
+
+    def add_post(self, thread: Thread, timestamp: int) -> Post:
+        """Add a post to a thread, possibly as a reply."""
+        parent = (
+            self.random.choice(thread.posts)
+            if thread.posts and self.random.random() < self.options.reply_rate
+            else None
+        )
+        post = Post(
+            id=self._id(),
+            thread_id=thread.id,
+            parent_id=None if parent is None else parent.id,
+            user_id=self.random.randint(1, self.options.user_count),
+            timestamp=timestamp,
+            title="" if parent is not None else f"Post in {thread.title}",
+            content=f"Synthetic post content {self._next_id}",
+        )
+        thread.posts.append(post)
+        if parent is not None:
+            parent.replies.append(post)
+        self.posts[post.id] = post
+        return post
+
+    def advance(self) -> None:
+        """Add any new posts that would have been made since last time."""
+        rate = self.options.new_posts_per_wiki_per_s
+        now = time.monotonic()
+        elapsed = now - self.last_advanced
+        if rate <= 0 or elapsed * rate * len(self.wiki_ids) < 1:
+            return
+        self.last_advanced = now
+        threads = list(self.threads.values())
+        for wiki_id in self.wiki_ids:
+            wiki_threads = [t for t in threads if t.wiki_id == wiki_id]
+            for _ in range(int(elapsed * rate)):
+                self.add_post(
+                    self.random.choice(wiki_threads), int(time.time())
+                )
+
+
+def render_user(user_id: int) -> str:
+    """A Wikidot nametag."""
+    name = username(user_id)
+    return (
+        '<span class="printuser avatarhover">'
+        f'<a href="http://www.wikidot.com/user:info/{name}"'
+        f' onclick="WIKIDOT.page.listeners.userInfo({user_id}); return false;">'
+        f"{name}</a></span>"
+    )
+
+
+def render_date(timestamp: int) -> str:
+    """A Wikidot date."""
+    return (
+        f'<span class="odate time_{timestamp} format_%25e%20%25b%20%25Y">'
+        f"{formatdate(timestamp, usegmt=True)}</span>"
+    )
+
+
+def render_pager(current: int, count: int) -> str:
+    """A Wikidot pager, or nothing if there is only one page."""
+    if count <= 1:
+        return ""
+    selectors = "".join(
+        (
+            f'<span class="current">{page}</span>'
+            if page == current
+            else f'<span class="target"><a href="#">{page}</a></span>'
+        )
+        for page in range(1, count + 1)
+    )
+    return (
+        f'<div class="pager"><span class="pager-no">page {current} of'
+        f" {count}</span>{selectors}</div>"
+    )
+
+
+def render_post(post: Post) -> str:
+    """A post container, including the containers of its replies."""
+    replies = "".join(render_post(reply) for reply in post.replies)
+    return (
+        f'<div class="post-container" id="fpc-{post.id}">'
+        f'<div class="post" id="post-{post.id}"><div class="long">'
+        f'<div class="head"><div class="title" id="post-title-{post.id}">'
+        f"{html.escape(post.title)}</div>"
+        f'<div class="info">{render_user(post.user_id)}'
+        f" {render_date(post.timestamp)}</div></div>"
+        f'<div class="content" id="post-content-{post.id}">'
+        f"<p>{html.escape(post.content)}</p></div>"
+        f"</div></div>{replies}</div>"
+    )
+
+
+def render_thread(thread: Thread, page: int) -> str:
+    """A page of the ForumViewThreadModule."""
+    top_level_posts = thread.top_level_posts()[
+        (page - 1) * POSTS_PER_THREAD_PAGE : page * POSTS_PER_THREAD_PAGE
+    ]
+    pager = render_pager(page, thread.page_count())
+    return (
+        '<div class="forum-thread-box">'
+        '<div class="forum-breadcrumbs"><a href="/forum/start">Forum</a>'
+        f' » <a href="/forum/c-{thread.category_id}/category">'
+        f"Category {thread.category_id}</a>"
+        f" » {html.escape(thread.title)}</div>"
+        '<div class="description-block well"><div class="statistics">'
+        f"Started by: {render_user(thread.user_id)}<br/>"
+        f"Date started: {render_date(thread.timestamp)}</div></div>"
+        f'{pager}<div id="thread-container" class="thread-container">'
+        '<div id="thread-container-posts">'
+        f'{"".join(render_post(post) for post in top_level_posts)}'
+        f"</div></div>{pager}</div>"
+    )
+
+
+def render_wikidot_syntax(source: str) -> str:
+    """Renders the small amount of Wikidot syntax used in ListPages bodies
+    by the notifier."""
+    source = re.sub(
+        r'\[\[(div|span)_? class="([^"]*)"\]\]', r'<\1 class="\2">', source
+    )
+    source = re.sub(r"\[\[/(div|span)\]\]", r"</\1>", source)
+    return source
+
+
+def render_listpages_item(body: str, page: Page) -> str:
+    """A single ListPages item."""
+    values: Dict[str, Callable[[], str]] = {
+        "fullname": lambda: html.escape(page.fullname),
+        "title": lambda: html.escape(page.title),
+        "created_by": lambda: username(page.user_id),
+        "created_by_id": lambda: str(page.user_id),
+        "created_at": lambda: render_date(page.timestamp),
+        "tags": lambda: html.escape(page.tags),
+        "page_id": lambda: str(page.id),
+    }
+
+    def substitute(match: "re.Match[str]") -> str:
+        name, argument = match.group(1), match.group(2)
+        if name in ("form_raw", "form_data") and argument is not None:
+            return html.escape(page.form.get(argument, ""))
+        if name in values:
+            return values[name]()
+        return match.group(0)
+
+    return re.sub(r"%%([a-z_]+)(?:\{([a-z_]+)\})?%%", substitute, body)
+
+
+def render_listpages(
+    world: World, wiki_id: str, params: Dict[str, str]
+) -> str:
+    """A page of the ListPagesModule."""
+    category = params.get("category", "")
+    per_page = int(params.get("perPage", "20"))
+    offset = int(params.get("offset", "0"))
+    body = render_wikidot_syntax(params.get("module_body", "%%fullname%%"))
+    pages = sorted(
+        (
+            page
+            for (page_wiki_id, _), page in world.pages.items()
+            if page_wiki_id == wiki_id
+            and (category in ("", "*") or page.category == category)
+        ),
+        key=lambda page: page.timestamp,
+    )
+    items = "".join(
+        render_listpages_item(body, page)
+        for page in pages[offset : offset + per_page]
+    )
+    pager = render_pager(
+        offset // per_page + 1, -(-len(pages) // per_page) or 1
+    )
+    return f'<div class="list-pages-box">{items}{pager}</div>'
+
+
+def render_rss(world: World, wiki_id: str) -> str:
+    """The forum's new posts RSS feed."""
+    posts = sorted(
+        (
+            post
+            for post in world.posts.values()
+            if world.threads[post.thread_id].wiki_id == wiki_id
+        ),
+        key=lambda post: post.timestamp,
+        reverse=True,
+    )[:RSS_ITEM_COUNT]
+    items = "".join(
+        "<item>"
+        f"<guid>http://{wiki_id}.wikidot.com/forum/t-{post.thread_id}#post-{post.id}</guid>"
+        f"<title>{html.escape(post.title)}</title>"
+        f"<link>http://{wiki_id}.wikidot.com/forum/t-{post.thread_id}/x#post-{post.id}</link>"
+        "<description/>"
+        f"<pubDate>{formatdate(post.timestamp, usegmt=True)}</pubDate>"
+        f"<wikidot:authorName>{username(post.user_id)}</wikidot:authorName>"
+        f"<wikidot:authorUserId>{post.user_id}</wikidot:authorUserId>"
+        f"<content:encoded>{html.escape(post.content)}</content:encoded>"
+        "</item>"
+        for post in posts
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<rss version="2.0" xmlns:wikidot="http://www.wikidot.org/rss-namespace"'
+        ' xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+        f"<channel><title>{wiki_id} - new forum posts</title>"
+        f"<link>http://{wiki_id}.wikidot.com/forum/start</link>"
+        f"{items}</channel></rss>"
+    )
+
+
+def render_recent_posts(world: World, wiki_id: str, page: int) -> str:
+    """A page of the ForumRecentPostsModule."""
+    posts = sorted(
+        (
+            post
+            for post in world.posts.values()
+            if world.threads[post.thread_id].wiki_id == wiki_id
+        ),
+        key=lambda post: post.timestamp,
+        reverse=True,
+    )
+    items = "".join(
+        f'<div class="post" id="post-{post.id}"><div class="long">'
+        '<div class="head"><div class="title">'
+        f'<a href="/forum/t-{post.thread_id}/x#post-{post.id}">'
+        f"{html.escape(post.title)}</a></div>"
+        f'<div class="info">{render_user(post.user_id)}'
+        f" {render_date(post.timestamp)}</div></div>"
+        f'<div class="content"><p>{html.escape(post.content)}</p></div>'
+        "</div></div>"
+        for post in posts[
+            (page - 1) * RECENT_POSTS_PER_PAGE : page * RECENT_POSTS_PER_PAGE
+        ]
+    )
+    pager = render_pager(page, -(-len(posts) // RECENT_POSTS_PER_PAGE) or 1)
+    return f'<div class="forum-recent-posts-box">{pager}{items}{pager}</div>'
+
+
+def render_forum_start(world: World, wiki_id: str) -> str:
+    """The ForumStartModule, listing the forum's categories."""
+    category_ids = sorted(
+        {
+            thread.category_id
+            for thread in world.threads.values()
+            if thread.wiki_id == wiki_id
+        }
+    )
+    rows = "".join(
+        '<tr><td class="name"><div class="title">'
+        f'<a href="/forum/c-{category_id}/category">'
+        f"Category {category_id}</a></div></td></tr>"
+        for category_id in category_ids
+    )
+    return f'<div class="forum-start-box"><table>{rows}</table></div>'
+
+
+def render_category(
+    world: World, wiki_id: str, category_id: int, page: int
+) -> str:
+    """A page of the ForumViewCategoryModule, most recently posted in
+    threads first."""
+    threads = sorted(
+        (
+            thread
+            for thread in world.threads.values()
+            if thread.wiki_id == wiki_id and thread.category_id == category_id
+        ),
+        key=lambda thread: thread.last_post_timestamp(),
+        reverse=True,
+    )
+    start = (page - 1) * THREADS_PER_CATEGORY_PAGE
+    rows = "".join(
+        '<tr><td class="name"><div class="title">'
+        f'<a href="/forum/t-{thread.id}/x">{html.escape(thread.title)}</a>'
+        "</div></td>"
+        f'<td class="started">{render_user(thread.user_id)}'
+        f"<br/>{render_date(thread.timestamp)}</td>"
+        f'<td class="posts">{len(thread.posts)}</td>'
+        f'<td class="last">{render_date(thread.last_post_timestamp())}</td>'
+        "</tr>"
+        for thread in threads[start : start + THREADS_PER_CATEGORY_PAGE]
+    )
+    pager = render_pager(
+        page, -(-len(threads) // THREADS_PER_CATEGORY_PAGE) or 1
+    )
+    return (
+        f'<div class="forum-category-box">{pager}'
+        f'<table class="table">{rows}</table>{pager}</div>'
+    )
+
+
+class StandinServer(ThreadingHTTPServer):
+    """HTTP server holding the synthetic world."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], options: StandinOptions):
+        super().__init__(address, StandinRequestHandler)
+        self.options = options
+        self.world = World(options)
+        self.stats: Counter[str] = Counter()
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """The URL of the server, to which a wiki ID is appended."""
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def count(self, endpoint: str) -> None:
+        """Record a request to an endpoint."""
+        with self.stats_lock:
+            self.stats[endpoint] += 1
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    """Handles a single request to the stand-in."""
+
+    server: StandinServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # pylint: disable=redefined-builtin
+        logger.debug(format, *args)
+
+    def _respond(
+        self,
+        body: str,
+        *,
+        status: int = 200,
+        content_type: str = "text/html",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        encoded = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(encoded)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _simulate_conditions(self) -> bool:
+        """Apply latency and maybe fail. Returns whether to continue."""
+        options = self.server.options
+        delay = options.latency_s + random.uniform(0, options.latency_jitter_s)
+        if delay > 0:
+            time.sleep(delay)
+        if random.random() < options.error_rate:
+            self.server.count("error")
+            self._respond("Internal Server Error", status=500)
+            return False
+        return True
+
+    def _route(self) -> Tuple[str, str]:
+        """Split the request path into the wiki ID and the rest."""
+        path = urlparse(self.path).path
+        wiki_id, _, rest = path.lstrip("/").partition("/")
+        return wiki_id, "/" + rest
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Serve the RSS feed and page sources."""
+        wiki_id, path = self._route()
+        if wiki_id == "_standin" and path == "/stats":
+            with self.server.stats_lock:
+                stats = dict(self.server.stats)
+            self._respond(json.dumps(stats), content_type="application/json")
+            return
+        if not self._simulate_conditions():
+            return
+        world = self.server.world
+        if path == "/feed/forum/posts.xml":
+            with world.lock:
+                world.advance()
+                feed = render_rss(world, wiki_id)
+            etag = '"' + hashlib.sha1(feed.encode("utf-8")).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.server.count("rss-not-modified")
+                self._respond("", status=304, headers={"ETag": etag})
+                return
+            self.server.count("rss")
+            self._respond(
+                feed,
+                content_type="application/rss+xml",
+                headers={"ETag": etag},
+            )
+            return
+        match = re.match(r"^/(.+)/norender/true/noredirect/true$", path)
+        if match:
+            self.server.count("norender")
+            page = world.pages.get((wiki_id, match.group(1)))
+            if page is None:
+                self._respond("Page does not exist", status=404)
+                return
+            self._respond(
+                "<html><script>WIKIREQUEST.info.pageId = "
+                f"{page.id};</script><body></body></html>"
+            )
+            return
+        self.server.count("unknown")
+        self._respond("Not found", status=404)
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Serve the module connector and login."""
+        wiki_id, path = self._route()
+        length = int(self.headers.get("Content-Length", 0))
+        params = {
+            key: values[0]
+            for key, values in parse_qs(
+                self.rfile.read(length).decode("utf-8")
+            ).items()
+        }
+        if not self._simulate_conditions():
+            return
+        if path == "/default--flow/login__LoginPopupScreen":
+            self.server.count("login")
+            self._respond(
+                "Logged in",
+                headers={"Set-Cookie": "wikidot_token7=standin; Path=/"},
+            )
+            return
+        if path == "/ajax-module-connector.php":
+            module_name = params.get("moduleName", "")
+            self.server.count(module_name)
+            with self.server.world.lock:
+                response = self._module(wiki_id, module_name, params)
+            self._respond(
+                json.dumps(response), content_type="application/json"
+            )
+            return
+        self.server.count("unknown")
+        self._respond("Not found", status=404)
+
+    def _module(
+        self, wiki_id: str, module_name: str, params: Dict[str, str]
+    ) -> Dict[str, Any]:
+        world = self.server.world
+        if module_name == "forum/ForumViewThreadModule":
+            thread = world.threads.get(int(params.get("t", "0")))
+            if thread is None or thread.wiki_id != wiki_id:
+                return {"status": "no_thread", "message": ""}
+            page_number = int(params.get("pageNo", "1"))
+            if "postId" in params:
+                page_number = thread.page_of_post(int(params["postId"])) or 1
+            return {
+                "status": "ok",
+                "body": render_thread(thread, page_number),
+            }
+        if module_name == "forum/ForumRecentPostsModule":
+            return {
+                "status": "ok",
+                "body": render_recent_posts(
+                    world, wiki_id, int(params.get("pageNo", "1"))
+                ),
+            }
+        if module_name == "forum/ForumStartModule":
+            return {
+                "status": "ok",
+                "body": render_forum_start(world, wiki_id),
+            }
+        if module_name == "forum/ForumViewCategoryModule":
+            return {
+                "status": "ok",
+                "body": render_category(
+                    world,
+                    wiki_id,
+                    int(params.get("c", "0")),
+                    int(params.get("p", "1")),
+                ),
+            }
+        if module_name == "list/ListPagesModule":
+            return {
+                "status": "ok",
+                "body": render_listpages(world, wiki_id, params),
+            }
+        if module_name == "dashboard/messages/DMContactsModule":
+            # All synthetic users receive notifications by PM
+            return {"status": "ok", "body": "<h1>Contacts</h1>"}
+        if module_name == "Empty":
+            self.server.count(f"{params.get('action')}.{params.get('event')}")
+            if params.get("event") == "saveTags":
+                page = next(
+                    (
+                        page
+                        for page in world.pages.values()
+                        if str(page.id) == params.get("pageId")
+                    ),
+                    None,
+                )
+                if page is None:
+                    return {"status": "not_ok", "message": "No such page"}
+                page.tags = params.get("tags", "")
+            return {"status": "ok", "body": ""}
+        return {"status": "not_ok", "message": f"No module {module_name}"}
+
+
+def read_command_line_arguments() -> argparse.Namespace:
+    """Reads the stand-in's options from the command line."""
+    defaults = StandinOptions()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--wikis", type=int, default=defaults.wiki_count)
+    parser.add_argument(
+        "--threads", type=int, default=defaults.threads_per_wiki
+    )
+    parser.add_argument(
+        "--posts-per-thread", type=int, default=defaults.posts_per_thread
+    )
+    parser.add_argument("--users", type=int, default=defaults.user_count)
+    parser.add_argument(
+        "--new-posts-per-s",
+        type=float,
+        default=defaults.new_posts_per_wiki_per_s,
+        help="New posts made per second on each wiki",
+    )
+    parser.add_argument("--latency", type=float, default=defaults.latency_s)
+    parser.add_argument(
+        "--latency-jitter", type=float, default=defaults.latency_jitter_s
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=defaults.error_rate
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = read_command_line_arguments()
+    server = StandinServer(
+        (args.host, args.port),
+        StandinOptions(
+            wiki_count=args.wikis,
+            threads_per_wiki=args.threads,
+            posts_per_thread=args.posts_per_thread,
+            user_count=args.users,
+            new_posts_per_wiki_per_s=args.new_posts_per_s,
+            latency_s=args.latency,
+            latency_jitter_s=args.latency_jitter,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        ),
+    )
+    logger.info(
+        "Serving Wikidot stand-in %s",
+        {
+            "url": server.base_url,
+            "wikis": server.world.wiki_ids,
+            "threads": len(server.world.threads),
+            "posts": len(server.world.posts),
+        },
+    )
+    server.serve_forever()
@@ -1,3 +1,4 @@
+import time
 from typing import List, Optional, Sequence, Set
 
 import pytest
@@ -10,6 +11,7 @@ from notifier.types import (
     AuthConfig,
     ChannelLogDump,
     Context,
+    DownloadedPosts,
     LocalConfig,
     NotifiablePost,
     PostInfo,
@@ -347,6 +349,21 @@ def sample_database(
         "notify_start_timestamp": 0,
         "notify_end_timestamp": 0,
         "end_timestamp": 0,
+        "wikidot_requests": [
+            {
+                "kind": "forum/ForumViewThreadModule",
+                "wiki_id": None,
+                "request_count": 2,
+                "error_count": 1,
+                "retry_count": 1,
+                "skipped_count": 0,
+                "response_bytes": 1000,
+                "sleep_s": 10.0,
+                "latency_p50_s": 0.5,
+                "latency_p90_s": 1.5,
+                "latency_max_s": 1.5,
+            }
+        ],
     }
     db.store_user_configs(sample_user_configs)
     db.store_supported_wikis(sample_wikis)
@@ -730,3 +747,185 @@ def test_thread_creator_fallback_to_first_post_author(
     posts = sample_database.get_notifiable_posts_for_user("60", (0, 300))
     assert len(posts) == 1
     assert posts[0]["thread_creator"] == "T6U-FirstPoster"
+
+
+@pytest.mark.needs_database
+def test_page_id_cache(sample_database: MySqlDriver) -> None:
+    """Test storing, updating and forgetting page IDs."""
+    sample_database.store_page_id("my-wiki", "notify:1", 100)
+    sample_database.store_page_id("my-wiki", "notify:2", 200)
+    sample_database.store_page_id("other-wiki", "notify:1", 300)
+    sample_database.store_page_id("my-wiki", "notify:2", 201)
+    assert sample_database.get_page_ids("my-wiki") == {
+        "notify:1": 100,
+        "notify:2": 201,
+    }
+    sample_database.delete_page_id("my-wiki", "notify:1")
+    assert sample_database.get_page_ids("my-wiki") == {"notify:2": 201}
+    assert sample_database.get_page_ids("other-wiki") == {"notify:1": 300}
+
+
+@pytest.mark.needs_database
+def test_rss_validators(sample_database: MySqlDriver) -> None:
+    """Test that RSS validators are stored per wiki and survive the wikis
+    being refreshed."""
+    assert sample_database.get_rss_validators("my-wiki") == {
+        "etag": None,
+        "last_modified": None,
+    }
+    sample_database.store_rss_validators(
+        "my-wiki",
+        {"etag": '"abc"', "last_modified": "Sat, 01 Jan 2000 00:00:00 GMT"},
+    )
+    sample_database.store_supported_wikis(
+        [{"id": "my-wiki", "name": "My Wiki", "secure": 1}]
+    )
+    assert sample_database.get_rss_validators("my-wiki") == {
+        "etag": '"abc"',
+        "last_modified": "Sat, 01 Jan 2000 00:00:00 GMT",
+    }
+
+
+@pytest.mark.needs_database
+def test_context_thread_fresh_until_timestamps(
+    sample_database: MySqlDriver,
+) -> None:
+    """Test looking up until when threads' context is fresh."""
+    assert (
+        sample_database.get_context_thread_fresh_until_timestamps([], 60)
+        == {}
+    )
+    fresh_until_timestamps = (
+        sample_database.get_context_thread_fresh_until_timestamps(
+            ["t-1", "t-2", "t-1", "t-0"], 60 * 60
+        )
+    )
+    assert set(fresh_until_timestamps) == {"t-1", "t-2"}
+    assert all(
+        0 < fresh_until_timestamp - time.time() <= 60 * 60
+        for fresh_until_timestamp in fresh_until_timestamps.values()
+    )
+
+
+@pytest.mark.needs_database
+def test_get_subscribed_users(sample_database: MySqlDriver) -> None:
+    """Test getting the users who may be notified, with their manual
+    subscriptions."""
+    users = {
+        user["user_id"]: user
+        for user in sample_database.get_subscribed_users()
+    }
+    assert "1" in users
+    manual_subs = users["1"]["manual_subs"]
+    assert sub("t-1", None, 1) in manual_subs
+    assert sub("t-3", "p-32", 1) in manual_subs
+    assert sub("t-4", None, -1) in manual_subs
+
+
+@pytest.mark.needs_database
+def test_context_thread_starters(sample_database: MySqlDriver) -> None:
+    """Test looking up who started threads with stored context."""
+    assert sample_database.get_context_thread_starters([]) == {}
+    assert sample_database.get_context_thread_starters(
+        ["t-1", "t-3", "t-1", "t-0"]
+    ) == {"t-1": "1", "t-3": "2"}
+
+
+@pytest.mark.needs_database
+def test_store_downloaded_posts(sample_database: MySqlDriver) -> None:
+    """Test that a wiki's posts, context and timestamp are stored together
+    or not at all."""
+    thread: Context.Thread = {
+        "thread_id": "t-9",
+        "thread_title": "Thread 9",
+        "thread_created_timestamp": 90,
+        "thread_snippet": "",
+        "thread_creator_username": "UserR1",
+        "first_post_id": "p-91",
+        "first_post_author_user_id": "1",
+        "first_post_author_username": "UserR1",
+        "first_post_created_timestamp": 90,
+    }
+    post: NotifiablePost = {
+        "post_id": "p-92",
+        "posted_timestamp": 92,
+        "post_title": "",
+        "post_snippet": "",
+        "author_user_id": "1",
+        "author_username": "UserR1",
+        "context_wiki_id": "my-wiki",
+        "context_forum_category_id": None,
+        "context_thread_id": "t-9",
+        "context_parent_post_id": None,
+    }
+    downloaded: DownloadedPosts = {
+        "wiki_id": "my-wiki",
+        "categories": [],
+        "threads": [thread],
+        "parent_posts": [],
+        "posts": [post, {**post, "post_id": "p-93", "posted_timestamp": 93}],
+        "latest_post_timestamp": 93,
+        "rss_validators": {"etag": '"v1"', "last_modified": None},
+        "thread_pages": [],
+    }
+    previous_timestamp = sample_database.get_latest_post_timestamp("my-wiki")
+
+    # A post that can't be stored prevents anything being stored
+    with pytest.raises(Exception):
+        sample_database.store_downloaded_posts(
+            {
+                **downloaded,
+                "posts": [{**post, "post_id": "p-" + "9" * 100}],
+            }
+        )
+    assert (
+        sample_database.get_latest_post_timestamp("my-wiki")
+        == previous_timestamp
+    )
+    assert (
+        sample_database.get_context_thread_fresh_until_timestamps(["t-9"], 60)
+        == {}
+    )
+
+    sample_database.store_downloaded_posts(downloaded)
+    assert sample_database.get_latest_post_timestamp("my-wiki") == 93
+    assert sample_database.get_rss_validators("my-wiki")["etag"] == '"v1"'
+    assert set(
+        sample_database.get_context_thread_fresh_until_timestamps(["t-9"], 60)
+    ) == {"t-9"}
+    assert sorted(
+        post["post_id"]
+        for post in sample_database.get_stored_thread_posts(["t-9"])
+    ) == ["p-92", "p-93"]
+    assert sample_database.get_stored_thread_posts([]) == []
+
+
+@pytest.mark.needs_database
+def test_store_context_threads_kept(sample_database: MySqlDriver) -> None:
+    """Test that onboarded context is kept until it expires, even though no
+    posts need it."""
+    thread: Context.Thread = {
+        "thread_id": "t-11",
+        "thread_created_timestamp": 110,
+        "thread_title": "Onboarded thread",
+        "thread_snippet": "",
+        "thread_creator_username": "T11U-Starter",
+        "first_post_id": "p-111",
+        "first_post_author_user_id": "111",
+        "first_post_author_username": "T11U-Starter",
+        "first_post_created_timestamp": 110,
+    }
+    sample_database.store_context_threads([thread], int(time.time()) + 60 * 60)
+    sample_database.store_context_threads(
+        [{**thread, "thread_id": "t-12", "first_post_id": "p-121"}], 0
+    )
+    # Deleting any post purges unused context
+    sample_database.delete_post("p-0")
+    fresh_until_timestamps = (
+        sample_database.get_context_thread_fresh_until_timestamps(
+            ["t-11", "t-12"], 60
+        )
+    )
+    assert set(fresh_until_timestamps) == {"t-11"}
+    # Kept context is fresh for as long as it is kept
+    assert fresh_until_timestamps["t-11"] - time.time() > 30 * 60
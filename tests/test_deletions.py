@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List, Optional
 from unittest.mock import MagicMock
 import pytest
 
@@ -6,12 +7,22 @@ from notifier import timing
 from notifier.database.drivers.base import BaseDatabaseDriver
 from notifier.database.drivers.mysql import MySqlDriver
 from notifier.database.utils import resolve_driver_from_config
-from notifier.deletions import clear_deleted_posts, delete_posts
+from notifier.deletions import (
+    clear_deleted_posts,
+    delete_posts,
+    reconcile_thread_page,
+    reconcile_thread_pages,
+)
+from notifier.threadpages import ThreadPage
 from notifier.types import (
     AuthConfig,
+    DownloadedThreadPage,
     LocalConfig,
     NotifiablePost,
     PostMeta,
+    RawPost,
+    StoredThreadPost,
+    ThreadPagePost,
 )
 
 
@@ -135,6 +146,23 @@ def test_clear_deleted_posts_checks_expected_posts(
     assert actual_post_ids == expected_post_ids
 
 
+def thread_page(current_page: int, posts: List[RawPost]) -> ThreadPage:
+    """Shorthand for a downloaded page of a thread."""
+    return ThreadPage.from_posts(
+        "thread-1",
+        {
+            "category_id": None,
+            "category_name": None,
+            "title": "Test Thread",
+            "creator_username": "user1",
+            "created_timestamp": 1000000000,
+            "page_count": 2,
+            "current_page": current_page,
+        },
+        posts,
+    )
+
+
 @pytest.mark.needs_database
 def test_delete_posts_with_existing_post(
     deletions_test_database: BaseDatabaseDriver, mocker: MagicMock
@@ -143,22 +171,21 @@ def test_delete_posts_with_existing_post(
     mock_wikidot = MagicMock()
 
     # Thread exists and contains the post we're checking
-    thread_meta = {
-        "current_page": 1,
-        "created_timestamp": 1000000000,
-        "title": "Test Thread",
-        "creator_username": "user1",
-    }
-    thread_posts = [
-        {
-            "id": "post-exists",
-            "snippet": "This post exists",
-            "user_id": "user1",
-            "username": "user1",
-            "posted_timestamp": 1000000000,
-        }
-    ]
-    mock_wikidot.thread.return_value = (thread_meta, thread_posts)
+    mock_wikidot.thread.return_value = thread_page(
+        1,
+        [
+            {
+                "id": "post-exists",
+                "thread_id": "thread-1",
+                "parent_post_id": None,
+                "posted_timestamp": 1000000000,
+                "title": "",
+                "snippet": "This post exists",
+                "user_id": "user1",
+                "username": "user1",
+            }
+        ],
+    )
     posts: list[PostMeta] = [
         {
             "wiki_id": "test-wiki",
@@ -183,15 +210,7 @@ def test_delete_posts_with_empty_thread(
 ) -> None:
     """Test that delete_posts treats empty threads as deleted."""
     mock_wikidot = MagicMock()
-    mock_wikidot.thread.return_value = (
-        {
-            "current_page": 1,
-            "created_timestamp": 1000000000,
-            "title": "Empty Thread",
-            "creator_username": "user1",
-        },
-        [],  # No posts
-    )
+    mock_wikidot.thread.return_value = thread_page(1, [])  # No posts
     posts: list[PostMeta] = [
         {
             "wiki_id": "test-wiki",
@@ -212,23 +231,22 @@ def test_delete_posts_with_missing_post(
 ) -> None:
     """Test that delete_posts deletes posts that don't exist remotely."""
     mock_wikidot = MagicMock()
-    thread_meta = {
-        "current_page": 2,
-        "created_timestamp": 1000000000,
-        "title": "Test Thread",
-        "creator_username": "user1",
-    }
     # Thread exists but doesn't contain the post we're checking
-    thread_posts = [
-        {
-            "id": "other-post",
-            "snippet": "Some other post",
-            "user_id": "user2",
-            "username": "user2",
-            "posted_timestamp": 1000000001,
-        }
-    ]
-    mock_wikidot.thread.return_value = (thread_meta, thread_posts)
+    mock_wikidot.thread.return_value = thread_page(
+        2,
+        [
+            {
+                "id": "other-post",
+                "thread_id": "thread-1",
+                "parent_post_id": None,
+                "posted_timestamp": 1000000001,
+                "title": "",
+                "snippet": "Some other post",
+                "user_id": "user2",
+                "username": "user2",
+            }
+        ],
+    )
     posts: list[PostMeta] = [
         {
             "wiki_id": "test-wiki",
@@ -239,3 +257,142 @@ def test_delete_posts_with_missing_post(
     delete_post_spy = mocker.spy(deletions_test_database, "delete_post")
     delete_posts(posts, deletions_test_database, mock_wikidot)
     delete_post_spy.assert_called_once_with("missing-post")
+
+
+@pytest.mark.needs_database
+def test_clear_deleted_posts_skips_verified_posts(
+    deletions_test_database: BaseDatabaseDriver, mocker: MagicMock
+) -> None:
+    """Test that posts seen on a thread page since the rake began are not
+    checked for deletion again."""
+    called_posts = []
+
+    def fake_delete_posts(
+        posts: List[PostMeta],
+        _database: BaseDatabaseDriver,
+        _wikidot: MagicMock,
+    ) -> None:
+        called_posts.extend(posts)
+
+    mocker.patch(
+        "notifier.deletions.delete_posts", side_effect=fake_delete_posts
+    )
+    deletions_test_database.store_posts_verified(["p-2"], timing.timestamp())
+    clear_deleted_posts(deletions_test_database, MagicMock())
+    assert {post["post_id"] for post in called_posts} == {"p-1"}
+
+
+def page_post(
+    post_id: str, posted_timestamp: int, parent_post_id: Optional[str] = None
+) -> ThreadPagePost:
+    """Shorthand for a post on a downloaded thread page."""
+    return {
+        "id": post_id,
+        "parent_post_id": parent_post_id,
+        "posted_timestamp": posted_timestamp,
+    }
+
+
+def stored_post(
+    post_id: str, posted_timestamp: int, parent_post_id: Optional[str] = None
+) -> StoredThreadPost:
+    """Shorthand for a stored post in a thread."""
+    return {
+        "thread_id": "t-1",
+        "post_id": post_id,
+        "posted_timestamp": posted_timestamp,
+        "parent_post_id": parent_post_id,
+    }
+
+
+def test_reconcile_thread_page() -> None:
+    """Test telling which stored posts must have been on a thread page."""
+    stored = [
+        stored_post("p-1", 10),
+        stored_post("p-2", 20),
+        stored_post("p-3", 30),
+        stored_post("p-4", 35, "p-3"),
+        stored_post("p-5", 40),
+        stored_post("p-6", 45, "p-5"),
+        stored_post("p-7", 50),
+    ]
+    page: DownloadedThreadPage = {
+        "thread_id": "t-1",
+        "page_count": 3,
+        "current_page": 2,
+        "posts": [page_post("p-2", 20), page_post("p-5", 40)],
+    }
+    # p-1 and p-7 could be on other pages, as could p-4, which replies to
+    # a post that isn't on this page
+    assert reconcile_thread_page(page, stored) == (
+        {"p-2", "p-5"},
+        {"p-3", "p-6"},
+    )
+
+    # The last page must hold every later top-level post
+    assert reconcile_thread_page({**page, "current_page": 3}, stored) == (
+        {"p-2", "p-5"},
+        {"p-3", "p-6", "p-7"},
+    )
+
+    # The only page must hold every post
+    assert reconcile_thread_page(
+        {**page, "page_count": 1, "current_page": None}, stored
+    ) == ({"p-2", "p-5"}, {"p-1", "p-3", "p-4", "p-6", "p-7"})
+
+    # A page with no posts says nothing
+    assert reconcile_thread_page({**page, "posts": []}, stored) == (
+        set(),
+        set(),
+    )
+
+
+def test_reconcile_thread_pages(mocker: MagicMock) -> None:
+    """Test that stored posts are verified or deleted according to the
+    pages downloaded from their threads."""
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_stored_thread_posts.return_value = [
+        stored_post("p-1", 10),
+        stored_post("p-2", 20),
+        stored_post("p-3", 30),
+    ]
+    reconcile_thread_pages(
+        database,
+        [
+            {
+                "thread_id": "t-1",
+                "page_count": 2,
+                "current_page": 1,
+                "posts": [page_post("p-1", 10), page_post("p-3", 30)],
+            },
+            # Seen on another page, so not deleted despite the first
+            {
+                "thread_id": "t-1",
+                "page_count": 2,
+                "current_page": 2,
+                "posts": [page_post("p-2", 20)],
+            },
+        ],
+    )
+    database.get_stored_thread_posts.assert_called_once_with({"t-1"})
+    verified_posts_ids, _ = database.store_posts_verified.call_args[0]
+    assert verified_posts_ids == {"p-1", "p-2", "p-3"}
+    database.delete_post.assert_not_called()
+
+    database.reset_mock()
+    reconcile_thread_pages(
+        database,
+        [
+            {
+                "thread_id": "t-1",
+                "page_count": 1,
+                "current_page": None,
+                "posts": [page_post("p-1", 10), page_post("p-3", 30)],
+            }
+        ],
+    )
+    database.delete_post.assert_called_once_with("p-2")
+
+    database.reset_mock()
+    reconcile_thread_pages(database, [])
+    database.get_stored_thread_posts.assert_not_called()
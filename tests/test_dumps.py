@@ -87,6 +87,7 @@ def test_upload_dry_run_with_sample_data(
     def test_func(dump: LogDump) -> None:
         assert isinstance(dump["channels"], list)
         assert len(dump["channels"]) == 2
+        assert dump["activations"][0]["wikidot_requests"][0]["sleep_s"] == 10
         nonlocal test_func_was_called
         test_func_was_called = True
 
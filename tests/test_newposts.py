@@ -1,5 +1,9 @@
-from _pytest.monkeypatch import MonkeyPatch
-from notifier.newposts import fetch_new_posts_rss
+from typing import List
+from unittest.mock import MagicMock
+
+from notifier.newposts import backfill_new_posts, chunk_new_posts
+from notifier.parserss import parse_rss_posts
+from notifier.types import RssPost
 
 
 sample_rss_xml = """
@@ -81,13 +85,9 @@ sample_rss_xml = """
 """
 
 
-def test_rss_parse(monkeypatch: MonkeyPatch) -> None:
+def test_rss_parse() -> None:
     """Test that RSS feeds are parsed as expected."""
-
-    # Disable wiki_id to URL interpolation
-    monkeypatch.setattr("notifier.newposts.new_posts_rss", "{}")
-
-    new_posts = list(fetch_new_posts_rss(sample_rss_xml))
+    new_posts = list(parse_rss_posts([sample_rss_xml.encode()]))
     assert new_posts == [
         {
             "thread_id": "t-1",
@@ -110,3 +110,95 @@ def test_rss_parse(monkeypatch: MonkeyPatch) -> None:
             "posted_timestamp": 1700000000,
         },
     ]
+
+
+# The sample feed as well-formed XML, as Wikidot serves it
+well_formed_rss_xml = (
+    sample_rss_xml.replace(
+        '<rss version="2.0">',
+        '<rss version="2.0"'
+        ' xmlns:wikidot="http://www.wikidot.org/rss-namespace"'
+        ' xmlns:content="http://purl.org/rss/1.0/modules/content/">',
+    )
+    .replace("<p>Sample text", "<![CDATA[<p>Sample text]]>")
+    .encode()
+)
+
+
+def split_document(document: bytes, size: int) -> List[bytes]:
+    """Split a document into chunks as if it were being streamed."""
+    return [
+        document[index : index + size]
+        for index in range(0, len(document), size)
+    ]
+
+
+def test_rss_parse_streamed(mocker: MagicMock) -> None:
+    """Test that a well-formed feed is parsed the same however it is split
+    up as it arrives, without falling back to feedparser."""
+    lenient_parse = mocker.patch("notifier.parserss.parse_rss_posts_leniently")
+    new_posts = list(parse_rss_posts([well_formed_rss_xml]))
+    assert new_posts == list(
+        parse_rss_posts(split_document(well_formed_rss_xml, 7))
+    )
+    lenient_parse.assert_not_called()
+    assert new_posts == [
+        {
+            "thread_id": f"t-{n}",
+            "post_id": f"post-{n}1",
+            "posted_timestamp": 1700000000,
+        }
+        for n in range(1, 5)
+    ]
+
+
+def test_rss_parse_invalid_character() -> None:
+    """Test that a feed with a character that isn't allowed in XML is still
+    parsed, without repeating the posts read before it."""
+    document = well_formed_rss_xml.replace(
+        b"forum/t-3/sample-title#post-31",
+        b"forum/t-3/sample\x0btitle#post-31",
+    )
+    assert b"\x0b" in document
+    new_posts = list(parse_rss_posts(split_document(document, 100)))
+    assert [post["post_id"] for post in new_posts] == [
+        "post-11",
+        "post-21",
+        "post-31",
+        "post-41",
+    ]
+
+
+def test_chunk_new_posts() -> None:
+    """Test that new posts are chunked oldest first without splitting
+    posts made at the same time."""
+    new_posts: List[RssPost] = [
+        {"thread_id": thread_id, "post_id": post_id, "posted_timestamp": ts}
+        for thread_id, post_id, ts in [
+            ("t-2", "post-5", 50),
+            ("t-1", "post-1", 10),
+            ("t-2", "post-2", 20),
+            ("t-1", "post-3", 20),
+            ("t-1", "post-4", 40),
+        ]
+    ]
+    chunks = chunk_new_posts(new_posts, 2)
+    assert [[post["post_id"] for post in chunk] for chunk in chunks] == [
+        ["post-1", "post-3", "post-2"],
+        ["post-4", "post-5"],
+    ]
+    assert chunk_new_posts([], 2) == []
+
+
+def test_backfill_unreadable_listing(mocker: MagicMock) -> None:
+    """Test that a recent posts listing with no readable posts is taken to
+    mean that posts were missed, rather than that there are none."""
+    wikidot = mocker.MagicMock()
+    wikidot.backfill_page_limit = 10
+    wikidot.recent_posts.return_value = ([], 1)
+    assert backfill_new_posts("my-wiki", wikidot, 100) == ([], False)
+    wikidot.recent_posts.return_value = (
+        [{"thread_id": "t-1", "post_id": "post-1", "posted_timestamp": 90}],
+        1,
+    )
+    assert backfill_new_posts("my-wiki", wikidot, 100) == ([], True)
@@ -0,0 +1,91 @@
+from typing import List, Optional
+
+from notifier.notifiability import NotifiabilityIndex
+from notifier.types import NotifiablePost, SubscribedUser, Subscription
+
+
+def post(
+    author_user_id: str,
+    posted_timestamp: int = 100,
+    parent_post_id: Optional[str] = None,
+) -> NotifiablePost:
+    """Shorthand for a new post in thread t-1."""
+    return {
+        "post_id": "p-2",
+        "posted_timestamp": posted_timestamp,
+        "post_title": "",
+        "post_snippet": "",
+        "author_user_id": author_user_id,
+        "author_username": f"User{author_user_id}",
+        "context_wiki_id": "my-wiki",
+        "context_forum_category_id": None,
+        "context_thread_id": "t-1",
+        "context_parent_post_id": parent_post_id,
+    }
+
+
+def user(
+    user_id: str, manual_subs: List[Subscription], last_notified: int = 10
+) -> SubscribedUser:
+    """Shorthand for a subscribed user."""
+    return {
+        "user_id": user_id,
+        "last_notified_timestamp": last_notified,
+        "manual_subs": manual_subs,
+    }
+
+
+def test_thread_starter_and_parent_author() -> None:
+    """Test that posts are notifiable to their thread's starter and the
+    author of the post they reply to, except for their own posts."""
+    index = NotifiabilityIndex(
+        [
+            user("1", []),
+            user("3", [{"thread_id": "t-1", "post_id": None, "sub": -1}]),
+            user("5", [], last_notified=1000),
+        ]
+    )
+    assert index.is_notifiable(post("9"), "1", None)
+    assert index.is_notifiable(post("9", parent_post_id="p-0"), "8", "1")
+    assert not index.is_notifiable(post("1"), "1", None)
+    # Users no longer subscribed to anything aren't notified
+    assert not index.is_notifiable(post("9"), "8", None)
+    # Users already notified about later posts aren't notified
+    assert not index.is_notifiable(post("9"), "5", None)
+    # Unsubscribed users aren't notified even about their own threads
+    assert not index.is_notifiable(post("9"), "3", None)
+
+
+def test_manual_subscriptions() -> None:
+    """Test that manual subscriptions make posts notifiable."""
+    index = NotifiabilityIndex(
+        [
+            user("2", [{"thread_id": "t-1", "post_id": None, "sub": 1}]),
+            user("4", [{"thread_id": "t-1", "post_id": "p-1", "sub": 1}]),
+        ]
+    )
+    assert index.is_notifiable(post("9"), "9", None)
+    assert not index.is_notifiable(post("2"), "9", None)
+    only_post_sub = NotifiabilityIndex(
+        [user("4", [{"thread_id": "t-1", "post_id": "p-1", "sub": 1}])]
+    )
+    assert only_post_sub.is_notifiable(
+        post("9", parent_post_id="p-1"), "9", "9"
+    )
+    assert not only_post_sub.is_notifiable(
+        post("9", parent_post_id="p-0"), "9", "9"
+    )
+    assert only_post_sub.report() == {
+        "checked_post_count": 2,
+        "skipped_post_count": 1,
+        "skipped_context_count": 0,
+    }
+
+
+def test_unknown_context_is_kept() -> None:
+    """Test that posts are kept if their context isn't known well enough
+    to tell whether they're notifiable."""
+    index = NotifiabilityIndex([])
+    assert index.is_notifiable(post("9"), None, None)
+    assert index.is_notifiable(post("9", parent_post_id="p-1"), "9", None)
+    assert not index.is_notifiable(post("9"), "9", None)
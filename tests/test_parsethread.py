@@ -1,14 +1,26 @@
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional, cast
 
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 
-from notifier.parsethread import count_pages, get_user_from_nametag
+from notifier.parsethread import (
+    HTML_PARSERS,
+    count_pages,
+    get_user_from_nametag,
+    make_soup,
+    parse_thread_meta,
+    parse_thread_page,
+)
+from notifier.threadpages import ThreadPage
+from tests.standin import StandinOptions, World, render_thread
 
 # pylint:disable=missing-function-docstring
 # pylint:disable=missing-class-docstring
 
+THREAD_PAGES = Path(__file__).parent / "thread_pages"
+
 
 def test_get_user_from_nametag() -> None:
     @dataclass
@@ -119,3 +131,110 @@ def test_count_pages() -> None:
         262,
         263,
     ).test()
+
+
+def test_html_parser_parity() -> None:
+    """Test that every HTML parser reads the same posts from threads."""
+    world = World(StandinOptions(wiki_count=1, threads_per_wiki=10))
+    thread_pages = [
+        (f"t-{thread.id}", render_thread(thread, page))
+        for thread in world.threads.values()
+        for page in range(1, thread.page_count() + 1)
+    ] + [
+        ("t-1234567", path.read_text(encoding="utf-8"))
+        for path in sorted(THREAD_PAGES.glob("*.html"))
+    ]
+    for thread_id, thread_page in thread_pages:
+        results = [
+            (
+                parse_thread_meta(make_soup(thread_page, parser)),
+                parse_thread_page(thread_id, make_soup(thread_page, parser)),
+            )
+            for parser in HTML_PARSERS
+        ]
+        assert len(results[0][1]) > 0
+        assert all(result == results[0] for result in results[1:])
+
+
+def test_parse_recorded_thread_page() -> None:
+    """Test reading a thread page in Wikidot's own markup."""
+    soup = make_soup((THREAD_PAGES / "page-1.html").read_text("utf-8"))
+    assert parse_thread_meta(soup) == {
+        "category_id": "c-891087",
+        "category_name": "Drafts & Critique / Critique",
+        "title": 'Sandbox critique: "SCP-XXXX" & other drafts',
+        "creator_username": "Croquembouche",
+        "created_timestamp": 1236187867,
+        "page_count": 2,
+        "current_page": 1,
+    }
+    posts = {post["id"]: post for post in parse_thread_page("t-1", soup)}
+    assert list(posts) == [
+        "post-4567890",
+        "post-4567891",
+        "post-4567895",
+        "post-4567892",
+        "post-4567893",
+        "post-4567894",
+    ]
+    # The edit note and folded copy of a post don't leak into it
+    assert posts["post-4567890"] == {
+        "id": "post-4567890",
+        "thread_id": "t-1",
+        "parent_post_id": None,
+        "posted_timestamp": 1236187867,
+        "title": "",
+        "snippet": "Looking for critique on two drafts:\n\n"
+        "SCP-XXXX \u2014 a Keter-class\xa0entity\nThe Ta...",
+        "user_id": "2893766",
+        "username": "Croquembouche",
+    }
+    assert posts["post-4567895"]["parent_post_id"] == "post-4567891"
+    assert [
+        (post["user_id"], post["username"]) for post in posts.values()
+    ] == [
+        ("2893766", "Croquembouche"),
+        ("", "Anonymous"),
+        ("462110", "Anonymous"),
+        ("", "Dr Thomas"),
+        ("2893766", "Croquembouche"),
+        ("", "Anonymous"),
+    ]
+
+
+def test_thread_page_index() -> None:
+    """Test that a thread page finds posts and their parents by ID, only
+    parsing the posts that are asked for."""
+    world = World(
+        StandinOptions(wiki_count=1, threads_per_wiki=1, posts_per_thread=30)
+    )
+    thread = next(iter(world.threads.values()))
+    thread_page = render_thread(thread, 1)
+    expected = parse_thread_page(f"t-{thread.id}", make_soup(thread_page))
+    reply = next(post for post in expected if post["parent_post_id"])
+
+    page = ThreadPage.from_soup(f"t-{thread.id}", make_soup(thread_page))
+    assert page.page_number == 1
+    assert len(page) == len(expected)
+    assert reply["id"] in page
+    assert "post-0" not in page and page.get("post-0") is None
+    assert page.get(reply["id"]) == reply
+    assert page.parent(reply["id"]) == next(
+        post for post in expected if post["id"] == reply["parent_post_id"]
+    )
+    assert page.first_post() == expected[0]
+    # Only the posts asked for have been parsed
+    assert len(page._parsed) == len(  # pylint:disable=protected-access
+        {reply["id"], reply["parent_post_id"], expected[0]["id"]}
+    )
+    assert page.get(reply["id"]) is page.get(reply["id"])
+
+    assert page.posts == expected
+    assert page.index == [
+        {
+            "id": post["id"],
+            "parent_post_id": post["parent_post_id"],
+            "posted_timestamp": post["posted_timestamp"],
+        }
+        for post in expected
+    ]
@@ -0,0 +1,793 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, cast
+from unittest.mock import MagicMock
+
+import pytest
+
+from notifier.config.remote import fetch_supported_wikis
+from notifier.config.user import find_valid_user_configs
+from notifier.database.drivers.base import BaseDatabaseDriver
+from notifier.newposts import (
+    ThreadPagePrefetcher,
+    download_posts_with_context,
+    get_fresh_threads,
+    get_new_posts,
+    poll_new_posts,
+    store_posts_with_context,
+)
+from notifier.notifiability import NotifiabilityIndex
+from notifier.onboarding import onboard_wiki
+from notifier.pageids import PageIdCache
+from notifier.types import (
+    DownloadedPosts,
+    LocalConfig,
+    RssValidators,
+    SupportedWikiConfig,
+)
+from notifier.wikidot import (
+    OngoingConnectionError,
+    Wikibork,
+    Wikidot,
+    WikiUnavailable,
+)
+from tests.standin import StandinOptions, StandinServer
+
+
+@pytest.fixture(scope="module")
+def standin() -> Iterator[StandinServer]:
+    """Run a stand-in Wikidot server for the duration of the tests."""
+    server = StandinServer(
+        ("127.0.0.1", 0),
+        StandinOptions(
+            wiki_count=2,
+            threads_per_wiki=5,
+            posts_per_thread=25,
+            user_count=300,
+        ),
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def standin_wikidot(server: StandinServer, config: LocalConfig) -> Wikidot:
+    """Connect to the stand-in rather than Wikidot."""
+    wikis: List[SupportedWikiConfig] = [
+        {"id": wiki_id, "name": wiki_id, "secure": 0}
+        for wiki_id in server.world.wiki_ids
+    ]
+    wikis.append(
+        {"id": config["config_wiki_id"], "name": "Config", "secure": 1}
+    )
+    return Wikidot(
+        wikis,
+        options={
+            "site_url": server.base_url + "/{wiki_id}",
+            "requests_per_second": 1000.0,
+        },
+    )
+
+
+def ingest_wiki(
+    wiki_id: str,
+    database: BaseDatabaseDriver,
+    wikidot: Wikidot,
+    notifiability: Optional[NotifiabilityIndex] = None,
+) -> None:
+    """Poll one wiki for new posts and store them with their context, the
+    way get_new_posts does for each wiki, but without catching errors."""
+    polled = poll_new_posts(
+        wiki_id,
+        wikidot,
+        database.get_latest_post_timestamp(wiki_id),
+        database.get_rss_validators(wiki_id),
+    )
+    if polled is None:
+        return
+    for downloaded in download_posts_with_context(
+        wiki_id,
+        wikidot,
+        polled,
+        get_fresh_threads(database, polled.new_posts),
+        wikidot.ingestion_chunk_size,
+        notifiability,
+    ):
+        store_posts_with_context(database, downloaded)
+
+
+def test_standin_config(
+    standin: StandinServer, notifier_config: LocalConfig
+) -> None:
+    """Test that wiki and user configs can be read from the stand-in."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wikis = fetch_supported_wikis(notifier_config, wikidot)
+    assert sorted(wiki["id"] for wiki in wikis) == standin.world.wiki_ids
+    users = find_valid_user_configs(notifier_config, wikidot)
+    assert len(users) == 300
+    assert all(len(user["subscriptions"]) == 3 for user in users)
+
+
+def test_standin_new_posts(
+    standin: StandinServer, notifier_config: LocalConfig
+) -> None:
+    """Test that posts from the stand-in's feed can be found in its
+    threads."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[0]
+    new_posts, _ = wikidot.forum_feed(wiki_id)
+    assert new_posts is not None and len(new_posts) == 30
+    for new_post in new_posts[:5]:
+        page = wikidot.thread(
+            wiki_id, new_post["thread_id"], new_post["post_id"]
+        )
+        post = page.get(new_post["post_id"])
+        assert post is not None
+        assert post["posted_timestamp"] == new_post["posted_timestamp"]
+        assert page.meta["category_id"] is not None
+
+
+def test_standin_parallel_ingestion(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that posts from several wikis are downloaded at once and stored
+    from one thread, each wiki's timestamp after its posts."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wikidot.ingestion_concurrency = 2
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_supported_wikis.return_value = [
+        {"id": wiki_id, "name": wiki_id, "secure": 0}
+        for wiki_id in standin.world.wiki_ids
+    ]
+    database.get_latest_post_timestamp.return_value = 0
+    database.get_rss_validators.return_value = {
+        "etag": None,
+        "last_modified": None,
+    }
+    database.get_context_thread_fresh_until_timestamps.return_value = {}
+    writing_threads: Set[threading.Thread] = set()
+    stored_wikis: List[str] = []
+
+    def store_downloaded_posts(downloaded: DownloadedPosts) -> None:
+        writing_threads.add(threading.current_thread())
+        stored_wikis.append(downloaded["wiki_id"])
+        assert len(downloaded["posts"]) == 30
+        assert all(
+            post["context_wiki_id"] == downloaded["wiki_id"]
+            for post in downloaded["posts"]
+        )
+        assert downloaded["latest_post_timestamp"] == max(
+            post["posted_timestamp"] for post in downloaded["posts"]
+        )
+
+    database.store_downloaded_posts.side_effect = store_downloaded_posts
+
+    get_new_posts(database, wikidot)
+
+    assert writing_threads == {threading.current_thread()}
+    assert sorted(stored_wikis) == standin.world.wiki_ids
+
+
+def test_standin_rss_prefetch(
+    standin: StandinServer,
+    notifier_config: LocalConfig,
+    mocker: MagicMock,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that every wiki's feed is polled, and the workload logged,
+    before any threads are downloaded."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_supported_wikis.return_value = [
+        {"id": wiki_id, "name": wiki_id, "secure": 0}
+        for wiki_id in standin.world.wiki_ids
+    ]
+    database.get_latest_post_timestamp.return_value = 0
+    database.get_rss_validators.return_value = {
+        "etag": None,
+        "last_modified": None,
+    }
+    database.get_context_thread_fresh_until_timestamps.return_value = {}
+
+    def workload_logs() -> List[logging.LogRecord]:
+        return [
+            record
+            for record in caplog.records
+            if record.msg == "Polled RSS feeds %s"
+        ]
+
+    thread = wikidot.thread
+    logged_before_threads: List[bool] = []
+
+    def logging_thread(*args: Any, **kwargs: Any) -> Any:
+        logged_before_threads.append(len(workload_logs()) == 1)
+        return thread(*args, **kwargs)
+
+    mocker.patch.object(wikidot, "thread", logging_thread)
+    with caplog.at_level(logging.INFO, logger="notifier.newposts"):
+        get_new_posts(database, wikidot)
+    assert len(logged_before_threads) > 0
+    assert all(logged_before_threads)
+    (workload_log,) = workload_logs()
+    workload = cast(Dict[str, Any], workload_log.args)
+    assert workload["changed_wiki_count"] == len(standin.world.wiki_ids)
+    assert workload["new_post_count"] == 30 * len(standin.world.wiki_ids)
+
+
+def test_standin_reuses_thread_context(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that first pages are not downloaded for threads with recent
+    context."""
+
+    def ingest(fresh_until_timestamp: Optional[int]) -> Tuple[int, int]:
+        """Ingest one wiki's posts, with all of its threads having context
+        that is fresh until the given time, and count thread downloads and
+        thread context writes."""
+        wikidot = standin_wikidot(standin, notifier_config)
+        wiki_id = standin.world.wiki_ids[0]
+        database = mocker.MagicMock(spec=BaseDatabaseDriver)
+        database.get_latest_post_timestamp.return_value = 0
+        database.get_rss_validators.return_value = {
+            "etag": None,
+            "last_modified": None,
+        }
+        database.get_context_thread_fresh_until_timestamps.return_value = (
+            {}
+            if fresh_until_timestamp is None
+            else {
+                f"t-{thread.id}": fresh_until_timestamp
+                for thread in standin.world.threads.values()
+            }
+        )
+        downloads_before = standin.stats["forum/ForumViewThreadModule"]
+        ingest_wiki(wiki_id, database, wikidot)
+        return (
+            standin.stats["forum/ForumViewThreadModule"] - downloads_before,
+            len(database.store_downloaded_posts.call_args[0][0]["threads"]),
+        )
+
+    unknown_downloads, unknown_writes = ingest(None)
+    stale_downloads, stale_writes = ingest(int(time.time()) - 60)
+    fresh_downloads, fresh_writes = ingest(int(time.time()) + 60 * 60)
+    assert stale_downloads == unknown_downloads
+    assert stale_writes == unknown_writes == 5
+    assert fresh_downloads < unknown_downloads
+    assert fresh_writes < unknown_writes
+
+
+def test_standin_thread_prefetch(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that thread pages are downloaded ahead of the posts being
+    processed, without changing what is stored or downloading more."""
+
+    def ingest(depth: int) -> Tuple[List[DownloadedPosts], int, Set[str]]:
+        """Ingest one wiki's posts, and return what was stored, how many
+        thread pages were downloaded and which threads downloaded them."""
+        wikidot = standin_wikidot(standin, notifier_config)
+        wikidot.ingestion_chunk_size = 10
+        wikidot.thread_prefetch_depth = depth
+        wiki_id = standin.world.wiki_ids[0]
+        database = mocker.MagicMock(spec=BaseDatabaseDriver)
+        database.get_latest_post_timestamp.return_value = 0
+        database.get_rss_validators.return_value = {
+            "etag": None,
+            "last_modified": None,
+        }
+        database.get_context_thread_fresh_until_timestamps.return_value = {}
+        thread = wikidot.thread
+        thread_names: Set[str] = set()
+
+        def recording_thread(*args: Any, **kwargs: Any) -> Any:
+            thread_names.add(threading.current_thread().name)
+            return thread(*args, **kwargs)
+
+        mocker.patch.object(wikidot, "thread", recording_thread)
+        downloads_before = standin.stats["forum/ForumViewThreadModule"]
+        ingest_wiki(wiki_id, database, wikidot)
+        return (
+            [
+                call[0][0]
+                for call in database.store_downloaded_posts.call_args_list
+            ],
+            standin.stats["forum/ForumViewThreadModule"] - downloads_before,
+            thread_names,
+        )
+
+    stored, downloads, thread_names = ingest(0)
+    prefetched, prefetched_downloads, prefetch_thread_names = ingest(2)
+    assert not any(name.startswith("prefetch-") for name in thread_names)
+    assert any(name.startswith("prefetch-") for name in prefetch_thread_names)
+    assert len(prefetched) == len(stored) > 1
+    for chunk, prefetched_chunk in zip(stored, prefetched):
+        for key in ("posts", "threads", "parent_posts", "categories"):
+            assert prefetched_chunk[key] == chunk[key]
+    assert prefetched_downloads == downloads
+
+
+def test_standin_resumes_after_failure(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that ingestion stores progress a chunk at a time, so that a
+    retry after a failure picks up where it stopped."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wikidot.ingestion_chunk_size = 10
+    # Only count the downloads made while processing posts
+    wikidot.thread_prefetch_depth = 0
+    wiki_id = standin.world.wiki_ids[1]
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_latest_post_timestamp.return_value = 0
+    database.get_rss_validators.return_value = {
+        "etag": None,
+        "last_modified": None,
+    }
+    database.get_context_thread_fresh_until_timestamps.return_value = {}
+
+    # Fail partway through the wiki
+    thread = wikidot.thread
+    thread_calls = 0
+
+    def failing_thread(*args: Any, **kwargs: Any) -> Any:
+        nonlocal thread_calls
+        thread_calls += 1
+        if thread_calls > 12:
+            raise RuntimeError("Simulated failure")
+        return thread(*args, **kwargs)
+
+    mocker.patch.object(wikidot, "thread", failing_thread)
+    with pytest.raises(RuntimeError):
+        ingest_wiki(wiki_id, database, wikidot)
+    stored: List[DownloadedPosts] = [
+        call[0][0] for call in database.store_downloaded_posts.call_args_list
+    ]
+    assert len(stored) > 0
+    assert all(chunk["rss_validators"] is None for chunk in stored)
+    checkpoints = [chunk["latest_post_timestamp"] or 0 for chunk in stored]
+    assert checkpoints == sorted(checkpoints)
+    stored_post_ids = {
+        post["post_id"] for chunk in stored for post in chunk["posts"]
+    }
+    assert all(
+        post["posted_timestamp"] <= checkpoints[-1]
+        for chunk in stored
+        for post in chunk["posts"]
+    )
+
+    # Retry from the checkpoint
+    mocker.patch.object(wikidot, "thread", thread)
+    database.store_downloaded_posts.reset_mock()
+    database.get_latest_post_timestamp.return_value = checkpoints[-1]
+    ingest_wiki(wiki_id, database, wikidot)
+    resumed: List[DownloadedPosts] = [
+        call[0][0] for call in database.store_downloaded_posts.call_args_list
+    ]
+    resumed_post_ids = {
+        post["post_id"] for chunk in resumed for post in chunk["posts"]
+    }
+    assert resumed[-1]["rss_validators"] is not None
+    assert stored_post_ids.isdisjoint(resumed_post_ids)
+    assert len(stored_post_ids | resumed_post_ids) == 30
+
+
+def test_standin_failed_wiki_stops_prefetch(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that when a wiki's posts can't be stored, its thread pages stop
+    being downloaded ahead while other wikis carry on."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wikidot.ingestion_concurrency = 1
+    wikidot.ingestion_chunk_size = 10
+    failing_wiki_id, other_wiki_id = standin.world.wiki_ids
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_supported_wikis.return_value = [
+        {"id": wiki_id, "name": wiki_id, "secure": 0}
+        for wiki_id in standin.world.wiki_ids
+    ]
+    database.get_latest_post_timestamp.return_value = 0
+    database.get_rss_validators.return_value = {
+        "etag": None,
+        "last_modified": None,
+    }
+    database.get_context_thread_fresh_until_timestamps.return_value = {}
+    events: List[Tuple[str, str]] = []
+
+    def store_downloaded_posts(downloaded: DownloadedPosts) -> None:
+        events.append(("store", downloaded["wiki_id"]))
+        if downloaded["wiki_id"] == failing_wiki_id:
+            raise RuntimeError("Simulated failure")
+
+    database.store_downloaded_posts.side_effect = store_downloaded_posts
+    close = ThreadPagePrefetcher.close
+
+    def recording_close(prefetcher: ThreadPagePrefetcher) -> None:
+        events.append(("close", prefetcher.wiki_id))
+        close(prefetcher)
+
+    mocker.patch.object(ThreadPagePrefetcher, "close", recording_close)
+
+    get_new_posts(database, wikidot)
+
+    assert events.count(("store", failing_wiki_id)) == 1
+    assert events.count(("store", other_wiki_id)) == 3
+    last_other_store = max(
+        index
+        for index, event in enumerate(events)
+        if event == ("store", other_wiki_id)
+    )
+    assert events.index(("close", failing_wiki_id)) < last_other_store
+    assert events.count(("close", failing_wiki_id)) == 1
+
+
+def test_standin_notifiability_filter(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that posts nobody would be notified about are not stored, nor
+    is context that only they needed."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[0]
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_latest_post_timestamp.return_value = 0
+    database.get_rss_validators.return_value = {
+        "etag": None,
+        "last_modified": None,
+    }
+    database.get_context_thread_fresh_until_timestamps.return_value = {}
+    database.get_context_thread_starters.return_value = {}
+    subscribed_thread = next(
+        thread
+        for thread in standin.world.threads.values()
+        if thread.wiki_id == wiki_id
+    )
+    notifiability = NotifiabilityIndex(
+        [
+            {
+                "user_id": "0",
+                "last_notified_timestamp": 0,
+                "manual_subs": [
+                    {
+                        "thread_id": f"t-{subscribed_thread.id}",
+                        "post_id": None,
+                        "sub": 1,
+                    }
+                ],
+            }
+        ]
+    )
+    ingest_wiki(wiki_id, database, wikidot, notifiability)
+    stored: List[DownloadedPosts] = [
+        call[0][0] for call in database.store_downloaded_posts.call_args_list
+    ]
+    stored_posts = [post for chunk in stored for post in chunk["posts"]]
+    assert len(stored_posts) > 0
+    assert {post["context_thread_id"] for post in stored_posts} == {
+        f"t-{subscribed_thread.id}"
+    }
+    assert [
+        thread["thread_id"] for chunk in stored for thread in chunk["threads"]
+    ] == [f"t-{subscribed_thread.id}"]
+    report = notifiability.report()
+    assert report["checked_post_count"] == 30
+    assert report["skipped_post_count"] == 30 - len(stored_posts)
+    # At least the context of the other threads was skipped
+    assert report["skipped_context_count"] >= 4
+    # The checkpoint still covers the skipped posts
+    assert stored[-1]["latest_post_timestamp"] == max(
+        post.timestamp
+        for post in standin.world.posts.values()
+        if standin.world.threads[post.thread_id].wiki_id == wiki_id
+    )
+
+
+def test_standin_rss_not_modified(
+    standin: StandinServer, notifier_config: LocalConfig
+) -> None:
+    """Test that an unchanged feed is not downloaded again."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[1]
+    posts, validators = wikidot.forum_feed(wiki_id)
+    assert posts is not None and len(posts) == 30
+    assert validators["etag"] is not None
+    not_modified_count = standin.stats["rss-not-modified"]
+    posts, next_validators = wikidot.forum_feed(wiki_id, validators)
+    assert posts is None
+    assert next_validators == validators
+    assert standin.stats["rss-not-modified"] == not_modified_count + 1
+
+
+def test_standin_rss_through_wikidot(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that feeds are requested within the connection's request
+    slots, and not at all from a wiki that has been failing."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[0]
+    request_slot = mocker.spy(wikidot, "request_slot")
+    posts, _ = wikidot.forum_feed(wiki_id)
+    assert posts is not None
+    request_slot.assert_called_once_with(wiki_id)
+
+    polls_before = standin.stats["rss"]
+    for _ in range(wikidot.breaker.failure_threshold):
+        wikidot.breaker.record_failure(wiki_id)
+    with pytest.raises(WikiUnavailable):
+        wikidot.forum_feed(wiki_id)
+    assert standin.stats["rss"] == polls_before
+
+
+def test_standin_rss_overflow_backfill(
+    standin: StandinServer, notifier_config: LocalConfig
+) -> None:
+    """Test that posts that have fallen out of the RSS feed are found by
+    backfilling from the wiki's recent posts."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[0]
+    wiki_posts = sorted(
+        (
+            post
+            for post in standin.world.posts.values()
+            if standin.world.threads[post.thread_id].wiki_id == wiki_id
+        ),
+        key=lambda post: post.timestamp,
+        reverse=True,
+    )
+    latest_post_timestamp = wiki_posts[50].timestamp
+    expected_post_ids = {
+        f"post-{post.id}"
+        for post in wiki_posts
+        if post.timestamp > latest_post_timestamp
+    }
+    assert len(expected_post_ids) > 30
+    no_validators: RssValidators = {"etag": None, "last_modified": None}
+
+    polled = poll_new_posts(
+        wiki_id, wikidot, latest_post_timestamp, no_validators
+    )
+    assert polled is not None and polled.complete
+    post_ids = [post["post_id"] for post in polled.new_posts]
+    assert len(post_ids) == len(set(post_ids))
+    assert set(post_ids) == expected_post_ids
+
+
+def test_standin_rss_overflow_backfill_limit(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that when backfilling stops at the page limit, the posts found
+    are stored but the wiki's latest post timestamp and feed validators
+    are not, so that the posts missed are looked for again."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wikidot.backfill_page_limit = 2
+    wikidot.ingestion_chunk_size = 10
+    wiki_id = standin.world.wiki_ids[0]
+    wiki_posts = sorted(
+        (
+            post
+            for post in standin.world.posts.values()
+            if standin.world.threads[post.thread_id].wiki_id == wiki_id
+        ),
+        key=lambda post: post.timestamp,
+        reverse=True,
+    )
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_latest_post_timestamp.return_value = wiki_posts[-1].timestamp
+    database.get_rss_validators.return_value = {
+        "etag": None,
+        "last_modified": None,
+    }
+    database.get_context_thread_fresh_until_timestamps.return_value = {}
+
+    ingest_wiki(wiki_id, database, wikidot)
+    stored: List[DownloadedPosts] = [
+        call.args[0] for call in database.store_downloaded_posts.call_args_list
+    ]
+    assert 30 < sum(len(downloaded["posts"]) for downloaded in stored)
+    assert all(
+        downloaded["latest_post_timestamp"] is None
+        and downloaded["rss_validators"] is None
+        for downloaded in stored
+    )
+
+
+def test_standin_thread_page_cache(
+    standin: StandinServer, notifier_config: LocalConfig
+) -> None:
+    """Test that thread pages are only downloaded once, however they're
+    asked for."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[0]
+    thread = next(
+        thread
+        for thread in standin.world.threads.values()
+        if thread.wiki_id == wiki_id
+    )
+    first_post, last_post = thread.posts[0], thread.posts[-1]
+    downloads_before = standin.stats["forum/ForumViewThreadModule"]
+
+    first_page = wikidot.thread(wiki_id, f"t-{thread.id}")
+    assert (
+        wikidot.thread(wiki_id, f"t-{thread.id}", f"post-{first_post.id}")
+        is first_page
+    )
+    last_page = wikidot.thread(
+        wiki_id, f"t-{thread.id}", f"post-{last_post.id}"
+    )
+    assert (
+        wikidot.thread(wiki_id, f"t-{thread.id}", f"post-{last_post.id}")
+        is last_page
+    )
+    assert wikidot.thread(wiki_id, f"t-{thread.id}") is first_page
+
+    expected_downloads = 1 if thread.page_count() == 1 else 2
+    assert (
+        standin.stats["forum/ForumViewThreadModule"] - downloads_before
+        == expected_downloads
+    )
+    assert wikidot.thread_pages.report()["hit_count"] == 5 - (
+        expected_downloads
+    )
+
+
+def test_standin_page_ids(
+    standin: StandinServer, notifier_config: LocalConfig
+) -> None:
+    """Test that page IDs and tags can be handled by the stand-in."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    slug = f"{notifier_config['user_config_category']}:1"
+    page = standin.world.pages[(notifier_config["config_wiki_id"], slug)]
+    assert (
+        wikidot.get_page_id(notifier_config["config_wiki_id"], slug) == page.id
+    )
+    wikidot.set_tags(
+        notifier_config["config_wiki_id"], slug, "_1 restricted-inbox"
+    )
+    assert page.tags == "_1 restricted-inbox"
+
+
+def test_standin_listed_page_ids(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: MagicMock
+) -> None:
+    """Test that page IDs from the user config listing are recorded once
+    one of them has been checked against its page's source, and not at all
+    if it doesn't match."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_page_ids.return_value = {}
+    wikidot.page_ids = PageIdCache(database)
+    downloads_before = standin.stats["norender"]
+    users = find_valid_user_configs(notifier_config, wikidot)
+    assert standin.stats["norender"] == downloads_before + 1
+    assert database.store_page_id.call_count == len(users)
+    for call in database.store_page_id.call_args_list:
+        wiki_id, slug, page_id = call.args
+        assert standin.world.pages[(wiki_id, slug)].id == page_id
+
+    database.reset_mock()
+    database.get_page_ids.return_value = {}
+    wikidot.page_ids = PageIdCache(database)
+    mocker.patch.object(wikidot, "download_page_id", return_value=-1)
+    find_valid_user_configs(notifier_config, wikidot)
+    # Only the checked page's ID, as found in its source, is recorded
+    database.store_page_id.assert_called_once()
+    assert database.store_page_id.call_args.args[2] == -1
+
+
+def test_standin_onboarding(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: Any
+) -> None:
+    """Test that onboarding loads context for a wiki's most recently active
+    threads, within its request budget."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[0]
+    threads = sorted(
+        (
+            thread
+            for thread in standin.world.threads.values()
+            if thread.wiki_id == wiki_id
+        ),
+        key=lambda thread: thread.last_post_timestamp(),
+        reverse=True,
+    )
+    now = int(time.time())
+    # Leave out the least recently active thread
+    max_age_s = now - threads[-2].last_post_timestamp()
+    category_count = len({thread.category_id for thread in threads})
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_context_thread_fresh_until_timestamps.return_value = {
+        f"t-{threads[0].id}": now + 60 * 60
+    }
+    downloads_before = standin.stats["forum/ForumViewThreadModule"]
+
+    report = onboard_wiki(
+        database,
+        wikidot,
+        wiki_id,
+        max_age_s=max_age_s,
+        # Enough for the listings and all but one of the stale threads
+        request_budget=1 + category_count + len(threads) - 3,
+    )
+
+    stored = [
+        context_thread
+        for call in database.store_context_threads.call_args_list
+        for context_thread in call.args[0]
+    ]
+    assert [context_thread["thread_id"] for context_thread in stored] == [
+        f"t-{thread.id}" for thread in threads[1:-2]
+    ]
+    # Kept for as long as the threads were looked back through
+    assert all(
+        call.args[1] >= now + max_age_s
+        for call in database.store_context_threads.call_args_list
+    )
+    assert stored[0]["thread_title"] == threads[1].title
+    assert report["recent_thread_count"] == len(threads) - 1
+    assert report["fresh_thread_count"] == 1
+    assert report["over_budget_thread_count"] == 1
+    assert report["request_count"] == 1 + category_count + len(threads) - 3
+    assert (
+        standin.stats["forum/ForumViewThreadModule"] - downloads_before
+        == len(threads) - 3
+    )
+
+
+def test_standin_onboarding_failures(
+    standin: StandinServer, notifier_config: LocalConfig, mocker: Any
+) -> None:
+    """Test that a category or thread that fails to download is left out
+    without stopping the rest of the wiki from being onboarded."""
+    wikidot = standin_wikidot(standin, notifier_config)
+    wiki_id = standin.world.wiki_ids[0]
+    threads = [
+        thread
+        for thread in standin.world.threads.values()
+        if thread.wiki_id == wiki_id
+    ]
+    failing_category_id = f"c-{threads[0].category_id}"
+    failing_thread_id = next(
+        f"t-{thread.id}"
+        for thread in threads
+        if f"c-{thread.category_id}" != failing_category_id
+    )
+    expected_thread_ids = {
+        f"t-{thread.id}"
+        for thread in threads
+        if f"c-{thread.category_id}" != failing_category_id
+    } - {failing_thread_id}
+    database = mocker.MagicMock(spec=BaseDatabaseDriver)
+    database.get_context_thread_fresh_until_timestamps.return_value = {}
+
+    category_threads = wikidot.category_threads
+    thread = wikidot.thread
+
+    def failing_category_threads(
+        wiki_id: str, category_id: str, *args: Any
+    ) -> Any:
+        if category_id == failing_category_id:
+            raise Wikibork
+        return category_threads(wiki_id, category_id, *args)
+
+    def failing_thread(wiki_id: str, thread_id: str, *args: Any) -> Any:
+        if thread_id == failing_thread_id:
+            raise OngoingConnectionError
+        return thread(wiki_id, thread_id, *args)
+
+    mocker.patch.object(wikidot, "category_threads", failing_category_threads)
+    mocker.patch.object(wikidot, "thread", failing_thread)
+    report = onboard_wiki(
+        database,
+        wikidot,
+        wiki_id,
+        max_age_s=10**9,
+        request_budget=1000,
+    )
+
+    assert {
+        context_thread["thread_id"]
+        for call in database.store_context_threads.call_args_list
+        for context_thread in call.args[0]
+    } == expected_thread_ids
+    assert report["failed_category_count"] == 1
+    assert report["failed_thread_count"] == 1
@@ -0,0 +1,113 @@
+import threading
+from typing import Dict, Set, cast
+from unittest.mock import MagicMock
+
+import pytest
+
+from notifier.notify import deferred_tag_updates
+from notifier.pageids import PageIdCache
+from notifier.tags import TagUpdateQueue
+from notifier.types import LocalConfig
+from tests.test_wikidot import FakeWikidot
+
+
+def test_tag_updates_are_collapsed(mocker: MagicMock) -> None:
+    """Test that only the final tags for each page are written, and only
+    when they differ from the tags the page started with."""
+    wikidot = FakeWikidot(options={"requests_per_second": 1000.0})
+    set_tags = mocker.patch.object(wikidot, "set_tags")
+    queue = TagUpdateQueue("config")
+
+    # Error cleared and then all tags removed - one write
+    queue.set_tags("notify:1", "_3 restricted-inbox", "_3")
+    queue.set_tags("notify:1", "_3 restricted-inbox", "")
+    # Error added that was already present - no write
+    queue.set_tags(
+        "notify:2", "not-a-back-contact _1", "_1 not-a-back-contact"
+    )
+    # Error added and then removed again - no write
+    queue.set_tags("notify:3", "", "blocked-inbox _2")
+    queue.set_tags("notify:3", "blocked-inbox _2", "")
+    # New error - one write
+    queue.set_tags("notify:4", "", {"restricted-inbox", "_5"})
+
+    assert len(queue) == 4
+    report = queue.flush(wikidot)
+
+    assert report == {
+        "requested_count": 6,
+        "coalesced_count": 2,
+        "skipped_count": 2,
+        "written_count": 2,
+        "failed_count": 0,
+    }
+    assert sorted(call.args for call in set_tags.call_args_list) == [
+        ("config", "notify:1", ""),
+        ("config", "notify:4", "_5 restricted-inbox"),
+    ]
+    assert len(queue) == 0
+
+
+def test_tag_update_failures_are_isolated(mocker: MagicMock) -> None:
+    """Test that one failed write does not stop the others."""
+    wikidot = FakeWikidot(options={"requests_per_second": 1000.0})
+
+    def set_tags(wiki_id: str, slug: str, tags: str) -> None:
+        if slug == "notify:1":
+            raise RuntimeError("no")
+
+    mocker.patch.object(wikidot, "set_tags", side_effect=set_tags)
+    queue = TagUpdateQueue("config")
+    queue.set_tags("notify:1", "", "_1 restricted-inbox")
+    queue.set_tags("notify:2", "", "_1 restricted-inbox")
+
+    report = queue.flush(wikidot)
+    assert report["written_count"] == 1
+    assert report["failed_count"] == 1
+
+
+def test_tag_flush_stores_page_ids_afterwards(mocker: MagicMock) -> None:
+    """Test that page IDs found while flushing are only stored once the
+    writes are done, from the flushing thread."""
+    database = mocker.Mock()
+    wikidot = FakeWikidot(
+        options={"requests_per_second": 1000.0},
+        page_ids=PageIdCache(database),
+    )
+    download = mocker.patch.object(
+        wikidot, "download_page_id", return_value=200
+    )
+    database_threads: Set[threading.Thread] = set()
+
+    def get_page_ids(wiki_id: str) -> Dict[str, int]:
+        database_threads.add(threading.current_thread())
+        return {"notify:1": 100}
+
+    def store_page_id(wiki_id: str, slug: str, page_id: int) -> None:
+        database_threads.add(threading.current_thread())
+        assert download.call_count == 1
+
+    database.get_page_ids.side_effect = get_page_ids
+    database.store_page_id.side_effect = store_page_id
+    queue = TagUpdateQueue("config")
+    queue.set_tags("notify:1", "", "_1 restricted-inbox")
+    queue.set_tags("notify:2", "", "_1 restricted-inbox")
+
+    assert queue.flush(wikidot)["written_count"] == 2
+    database.store_page_id.assert_called_once_with("config", "notify:2", 200)
+    assert database_threads == {threading.current_thread()}
+
+
+def test_deferred_tag_updates_flush_on_failure(mocker: MagicMock) -> None:
+    """Test that queued tag updates are written even if notifying the
+    channel fails partway."""
+    wikidot = FakeWikidot(options={"requests_per_second": 1000.0})
+    set_tags = mocker.patch.object(wikidot, "set_tags")
+    config = cast(LocalConfig, {"config_wiki_id": "config"})
+    with pytest.raises(RuntimeError):
+        with deferred_tag_updates("hourly", config, wikidot) as tag_updates:
+            tag_updates.set_tags("notify:1", "", "_1 restricted-inbox")
+            raise RuntimeError
+    set_tags.assert_called_once_with(
+        "config", "notify:1", "_1 restricted-inbox"
+    )
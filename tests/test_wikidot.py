@@ -0,0 +1,367 @@
+import json
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+from requests import Response
+
+from notifier.pacing import RequestPacer, TokenBucket
+from notifier.pageids import PageIdCache
+from notifier.parsethread import count_pages
+from notifier.tags import TagUpdateQueue
+from notifier.threadpages import ThreadPage, ThreadPageCache
+from notifier.types import RawPost, RawThreadMeta
+from notifier.wikidot import Wikibork, Wikidot, WikiUnavailable
+
+
+def make_response(body: Dict[str, Any], status_code: int = 200) -> Response:
+    """Construct a requests response without making a request."""
+    response = Response()
+    response.status_code = status_code
+    # pylint: disable-next=protected-access
+    response._content = json.dumps(body).encode()
+    return response
+
+
+class FakeWikidot(Wikidot):
+    """Wikidot connection that answers every request itself, recording how
+    many requests were in flight at once."""
+
+    RETRY_DELAY_S = 0.0
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.in_flight: Counter[str] = Counter()
+        self.max_in_flight: Counter[str] = Counter()
+        self.lock = threading.Lock()
+
+    def post(self, url: str, **request_kwargs: Any) -> Response:
+        wiki_id = url.split("//")[1].split(".")[0]
+        with self.lock:
+            self.in_flight[wiki_id] += 1
+            self.in_flight["*"] += 1
+            for key in (wiki_id, "*"):
+                self.max_in_flight[key] = max(
+                    self.max_in_flight[key], self.in_flight[key]
+                )
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight[wiki_id] -= 1
+            self.in_flight["*"] -= 1
+        return make_response({"status": "ok", "body": wiki_id})
+
+
+def test_tag_flush_concurrency_limits(mocker: MagicMock) -> None:
+    """Test that tag writes are made at once within the global and
+    per-wiki limits."""
+    wikidot = FakeWikidot(
+        options={
+            "concurrency_limit": 3,
+            "per_wiki_concurrency_limit": 2,
+            "requests_per_second": 1000.0,
+        }
+    )
+    mocker.patch.object(wikidot, "get_page_id", return_value=1)
+    queues = [TagUpdateQueue(wiki_id) for wiki_id in ["a", "b", "c"]]
+    for queue, page_count in zip(queues, [6, 6, 2]):
+        for index in range(page_count):
+            queue.set_tags(f"page-{index}", "", "tag")
+    flushes = [
+        threading.Thread(target=queue.flush, args=(wikidot,))
+        for queue in queues
+    ]
+    for flush in flushes:
+        flush.start()
+    for flush in flushes:
+        flush.join()
+
+    assert 1 < wikidot.max_in_flight["*"] <= 3
+    assert wikidot.max_in_flight["a"] <= 2
+    assert wikidot.max_in_flight["b"] <= 2
+
+
+def test_token_bucket_only_waits_when_exhausted() -> None:
+    """Test that requests within the burst are not delayed and later ones
+    are spaced out at the configured rate."""
+    bucket = TokenBucket(rate=10, capacity=2)
+    delays = [bucket.take() for _ in range(4)]
+    assert delays[:2] == [0.0, 0.0]
+    assert 0.05 < delays[2] <= 0.1
+    assert 0.15 < delays[3] <= 0.2
+
+
+def test_pacer_report() -> None:
+    """Test that the pacer accounts for pacing, backoff and network time
+    separately."""
+    pacer = RequestPacer(rate=100, burst=1)
+    pacer.wait("a.wikidot.com")
+    pacer.wait("b.wikidot.com")
+    pacer.wait("a.wikidot.com")
+    pacer.backoff(0.01)
+    with pacer.measure():
+        time.sleep(0.01)
+    report = pacer.report()
+    assert report["request_count"] == 3
+    assert report["paced_request_count"] == 1
+    assert 0 < report["pacing_wait_s"] <= 0.01
+    assert report["backoff_wait_s"] == 0.01
+    assert report["network_s"] >= 0.01
+
+
+def test_page_id_cache(mocker: MagicMock) -> None:
+    """Test that page IDs are only downloaded when not already known, and
+    that renaming or deleting a page forgets its old slug."""
+    database = mocker.Mock()
+    database.get_page_ids.return_value = {"notify:1": 100}
+    wikidot = FakeWikidot(
+        options={"requests_per_second": 1000.0},
+        page_ids=PageIdCache(database),
+    )
+    download = mocker.patch.object(
+        wikidot, "download_page_id", return_value=200
+    )
+
+    wikidot.set_tags("config", "notify:1", "a")
+    wikidot.set_tags("config", "notify:2", "a")
+    wikidot.set_tags("config", "notify:2", "b")
+    download.assert_called_once_with("config", "notify:2")
+    database.get_page_ids.assert_called_once_with("config")
+    database.store_page_id.assert_called_once_with("config", "notify:2", 200)
+
+    wikidot.rename_page("config", "notify:1", "deleted:1")
+    database.delete_page_id.assert_called_once_with("config", "notify:1")
+    database.store_page_id.assert_called_with("config", "deleted:1", 100)
+    wikidot.delete_page("config", "deleted:1")
+    database.delete_page_id.assert_called_with("config", "deleted:1")
+    assert download.call_count == 1
+
+
+class PagedWikidot(FakeWikidot):
+    """Wikidot connection that answers with a five page module, where
+    earlier pages take longer to come back."""
+
+    def post(self, url: str, **request_kwargs: Any) -> Response:
+        super().post(url, **request_kwargs)
+        page = int(request_kwargs["data"].get("pageNo", 1))
+        time.sleep(0.01 * (5 - page))
+        return make_response(
+            {
+                "status": "ok",
+                "body": f"""<div class="pager">
+                    <span class="current">{page}</span>
+                    <span class="target">5</span>
+                </div>""",
+            }
+        )
+
+
+def test_concurrent_pagination_is_ordered() -> None:
+    """Test that pages fetched concurrently are yielded in page order."""
+    wikidot = PagedWikidot(
+        options={
+            "per_wiki_concurrency_limit": 4,
+            "pagination_concurrency": 4,
+            "requests_per_second": 1000.0,
+        }
+    )
+    pages = [
+        count_pages(page["body"])[1]
+        for page in wikidot.paginated_module(
+            "a", "Paged", index_key="pageNo", starting_index=1
+        )
+    ]
+    assert pages == [1, 2, 3, 4, 5]
+    assert wikidot.max_in_flight["a"] > 1
+
+
+class FlakyWikidot(FakeWikidot):
+    """Wikidot connection that fails every other request."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.request_count = 0
+
+    def post(self, url: str, **request_kwargs: Any) -> Response:
+        self.request_count += 1
+        if self.request_count % 2 == 1:
+            return make_response({}, 503)
+        return super().post(url, **request_kwargs)
+
+
+def test_request_stats(mocker: MagicMock) -> None:
+    """Test that requests, failures, retries and sleeps are counted per
+    module and per wiki."""
+    wikidot = FlakyWikidot(options={"requests_per_second": 1000.0})
+    backoff = mocker.patch.object(wikidot.pacer, "backoff")
+    wikidot.module("a", "ModuleA")
+    wikidot.module("b", "ModuleA")
+    wikidot.module("a", "ModuleB")
+
+    assert backoff.call_count == 3
+    stats = {
+        (stat["kind"], stat["wiki_id"]): stat
+        for stat in wikidot.request_stats.summarise()
+    }
+    assert set(stats) == {
+        ("ModuleA", "a"),
+        ("ModuleA", "b"),
+        ("ModuleB", "a"),
+    }
+    for stat in stats.values():
+        assert stat["request_count"] == 2
+        assert stat["error_count"] == 1
+        assert stat["retry_count"] == 1
+        assert stat["sleep_s"] == 10
+        assert stat["response_bytes"] > 0
+        assert stat["latency_max_s"] >= 0.02
+
+    totals = wikidot.request_stats.summarise(by_wiki=False)
+    assert [(stat["kind"], stat["request_count"]) for stat in totals] == [
+        ("ModuleA", 4),
+        ("ModuleB", 2),
+    ]
+    assert all(stat["wiki_id"] is None for stat in totals)
+
+
+class BrokenWikidot(FakeWikidot):
+    """Wikidot connection where some wikis always fail."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.broken = {"a"}
+        self.requested: Counter[str] = Counter()
+
+    def post(self, url: str, **request_kwargs: Any) -> Response:
+        wiki_id = url.split("//")[1].split(".")[0]
+        self.requested[wiki_id] += 1
+        if wiki_id in self.broken:
+            return make_response({}, 503)
+        return super().post(url, **request_kwargs)
+
+
+def test_circuit_breaker(mocker: MagicMock) -> None:
+    """Test that a failing wiki stops being requested without affecting
+    others, until a probe succeeds."""
+    wikidot = BrokenWikidot(
+        options={
+            "requests_per_second": 1000.0,
+            "breaker_failure_threshold": 2,
+            "breaker_reset_s": 60,
+        }
+    )
+    backoff = mocker.patch.object(wikidot.pacer, "backoff")
+
+    # Each call counts as one failure, however many times it was retried
+    for _ in range(2):
+        with pytest.raises(Wikibork):
+            wikidot.module("a", "Empty")
+    assert wikidot.requested["a"] == 2 * wikidot.MODULE_ATTEMPT_LIMIT
+    for _ in range(3):
+        with pytest.raises(WikiUnavailable):
+            wikidot.module("a", "Empty")
+    assert wikidot.requested["a"] == 2 * wikidot.MODULE_ATTEMPT_LIMIT
+    assert backoff.call_count == 2 * wikidot.MODULE_ATTEMPT_LIMIT
+    assert wikidot.module("b", "Empty")["body"] == "b"
+    assert wikidot.breaker.unavailable_wikis() == ["a"]
+
+    # Once the reset period has passed, one probe is let through
+    wikidot.breaker.reset_s = 0
+    wikidot.broken = set()
+    assert wikidot.module("a", "Empty")["body"] == "a"
+    assert wikidot.breaker.unavailable_wikis() == []
+
+    stats = {
+        stat["wiki_id"]: stat for stat in wikidot.request_stats.summarise()
+    }
+    assert stats["a"]["skipped_count"] == 3
+    assert stats["b"]["skipped_count"] == 0
+
+
+def test_circuit_breaker_exempts_www(mocker: MagicMock) -> None:
+    """Test that Wikidot's own site is never cut off, as every wiki's
+    messages and lookups go through it."""
+    wikidot = BrokenWikidot(
+        options={
+            "requests_per_second": 1000.0,
+            "breaker_failure_threshold": 1,
+            "breaker_reset_s": 60,
+        }
+    )
+    wikidot.broken = {"www"}
+    mocker.patch.object(wikidot.pacer, "backoff")
+    for _ in range(3):
+        with pytest.raises(Wikibork):
+            wikidot.module("www", "Empty")
+    assert wikidot.breaker.unavailable_wikis() == []
+    wikidot.broken = set()
+    assert wikidot.module("www", "Empty")["body"] == "www"
+
+
+def thread_page(number: int, post_ids: List[str]) -> ThreadPage:
+    """Make a page of thread t-1 with the given posts."""
+    meta: RawThreadMeta = {
+        "category_id": None,
+        "category_name": None,
+        "title": "",
+        "creator_username": None,
+        "created_timestamp": 0,
+        "page_count": 3,
+        "current_page": number,
+    }
+    posts: List[RawPost] = [
+        {
+            "id": post_id,
+            "thread_id": "t-1",
+            "parent_post_id": None,
+            "posted_timestamp": 0,
+            "title": "",
+            "snippet": "",
+            "user_id": "",
+            "username": "",
+        }
+        for post_id in post_ids
+    ]
+    return ThreadPage.from_posts("t-1", meta, posts)
+
+
+def test_thread_page_cache_eviction() -> None:
+    """Test that the least recently used thread page is dropped, along
+    with the ability to find it by its posts."""
+    cache = ThreadPageCache(2)
+    cache.store("a", "t-1", thread_page(1, ["post-1", "post-2"]))
+    cache.store("a", "t-1", thread_page(2, ["post-3"]))
+    assert cache.get("a", "t-1") is not None
+    cache.store("a", "t-1", thread_page(3, ["post-4"]))
+
+    assert cache.get("a", "t-1", "post-2") is not None
+    assert cache.get("a", "t-1", "post-3") is None
+    assert cache.get("a", "t-1", "post-4") is not None
+    assert cache.get("b", "t-1", "post-4") is None
+    assert cache.report() == {
+        "hit_count": 3,
+        "miss_count": 2,
+        "cached_page_count": 2,
+    }
+
+
+def test_thread_page_cache_replaced_page() -> None:
+    """Test that a page replaced by a newer download of the same page
+    number is no longer found by the posts that have moved off it."""
+    cache = ThreadPageCache(4)
+    cache.store("a", "t-1", thread_page(1, ["post-1", "post-2"]))
+    cache.store("a", "t-1", thread_page(2, ["post-3", "post-4"]))
+    # post-1 was deleted, so each later post moved back a place
+    cache.store("a", "t-1", thread_page(1, ["post-2", "post-3"]))
+
+    page = cache.get("a", "t-1", "post-3")
+    assert page is not None and page.page_number == 1
+    assert cache.get("a", "t-1", "post-1") is None
+    page = cache.get("a", "t-1", "post-4")
+    assert page is not None and page.page_number == 2
+    # post-4 was deleted too
+    cache.store("a", "t-1", thread_page(2, ["post-5"]))
+    assert cache.get("a", "t-1", "post-4") is None
+    assert cache.get("a", "t-1", "post-3") is not None